@@ -0,0 +1,404 @@
+# TACTIX_LIVE/historical/historical_loader.py
+"""
+Ingesta del archivo histórico (eventing CSV + tracking JSONL, los mismos formatos que lee
+SimulationEngine.load_data) a un dataset Parquet particionado para el flujo batch.
+
+Entrada: una carpeta por partido con los archivos de match_sources() (eventing_file.csv,
+tracking_file.jsonl, ids_tracking.json), organizada como <raíz>/<temporada>/<competición>/<partido>.
+Los niveles que falten se rellenan con "unknown".
+
+Salida (particiones estilo Hive, legibles con pyarrow.dataset, pandas, Spark o DuckDB):
+
+    <salida>/eventing/season=S/competition=C/match=M/part-0.parquet   un evento por fila
+    <salida>/frames/...                                               un frame por fila (balón)
+    <salida>/tracking/...                                             un jugador por frame y fila
+
+- En paralelo: cada archivo fuente es una tarea de un pool de procesos ('workers').
+- Memoria acotada por proceso: el tracking se lee y escribe por bloques de 'chunk_size' frames
+  (un row group por bloque); el eventing de un partido se lee entero (hay que ordenarlo).
+- Incremental: _manifest.json guarda la huella de cada fuente (tamaño, mtime y hash, como
+  MatchCache). Solo se convierten los archivos nuevos o cambiados; un mtime distinto con el
+  mismo tamaño lo decide el hash. El manifest se guarda cada 'checkpoint' s y al terminar, y
+  cada parquet se escribe a un temporal y se renombra: si se interrumpe, se retoma donde quedó.
+- Los partidos cuyas fuentes ya no existen se eliminan del dataset.
+- Tipos fijos en todo el dataset (FRAMES_SCHEMA, TRACKING_SCHEMA, EVENTING_TYPES; ids como
+  texto), para que se pueda leer junto aunque cada partido traiga valores distintos.
+
+Uso:
+    python -m TACTIX_LIVE.historical.historical_loader RAW_DIR OUT_DIR [--workers 8] [--force]
+"""
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from TACTIX_LIVE.utils.config_loader import load_config
+from TACTIX_LIVE.utils.frame_store import FrameStore, Roster, iter_jsonl_chunks
+from TACTIX_LIVE.utils.match_cache import file_digest, fingerprint
+from TACTIX_LIVE.utils.match_loader import (EVENTING_FILE, TRACKING_FILE, load_eventing, load_roster,
+                                            match_sources)
+
+DEFAULTS = {
+    'workers': None,             # Procesos del pool (None = núcleos de la máquina)
+    'chunk_size': 5000,          # Frames de tracking por bloque / row group
+    'compression': 'zstd',       # Compresión de los parquet
+    'checkpoint': 30.0,          # s entre guardados del manifest
+    'max_tasks_per_child': 20,   # Tareas por proceso antes de renovarlo (devuelve la memoria)
+}
+PARTITION_KEYS = ('season', 'competition', 'match')
+# Particiones siempre como texto (pyarrow inferiría season=2023 como entero)
+PARTITIONING = ds.partitioning(pa.schema([(k, pa.string()) for k in PARTITION_KEYS]), flavor='hive')
+# Esquemas fijos de todo el dataset: los ids van como texto (un proveedor puede mezclar ids
+# numéricos y no numéricos, p.ej. árbitros 'ref-1'), así todos los archivos son compatibles
+FRAMES_SCHEMA = pa.schema([
+    ('frame', pa.int64()), ('period', pa.int64()), ('game_time', pa.float64()), ('timestamp', pa.string()),
+    ('ball_x', pa.float32()), ('ball_y', pa.float32()), ('ball_z', pa.float32()), ('ball_detected', pa.bool_()),
+    ('extras', pa.string()),
+])
+TRACKING_SCHEMA = pa.schema([
+    ('frame', pa.int64()), ('period', pa.int64()), ('game_time', pa.float64()), ('player_id', pa.string()),
+    ('team_id', pa.string()), ('x', pa.float32()), ('y', pa.float32()), ('is_detected', pa.bool_()),
+])
+# Eventing: las columnas del CSV cambian según el proveedor. Las numéricas conocidas tienen tipo
+# fijo; los ids, el texto libre y cualquier otra columna (también las vacías) van como texto
+EVENTING_TYPES = {
+    'game_time': pa.float64(), 'period': pa.int64(), 'game_time_seconds': pa.float64(),
+    'x': pa.float64(), 'y': pa.float64(), 'end_x': pa.float64(), 'end_y': pa.float64(),
+}
+MANIFEST_FILE = "_manifest.json"  # Con '_' para que los lectores de datasets lo ignoren
+MANIFEST_VERSION = 1
+UNKNOWN = "unknown"
+
+
+def historical_options(config: dict = None) -> dict:
+    """DEFAULTS con lo que venga en config['historical']."""
+    return {**DEFAULTS, **(config or {}).get('historical', {})}
+
+
+# --- Descubrimiento ---
+
+def _partition_value(name: str) -> str:
+    """Valor seguro como nombre de carpeta de partición (sin '/', '=' ni espacios)."""
+    return re.sub(r"[^\w.\-]+", "_", name).strip("_") or UNKNOWN
+
+
+def discover_matches(raw_dir: str) -> list:
+    """
+    Carpetas de partido bajo raw_dir (las que tienen eventing o tracking), con su partición:
+    [{'season', 'competition', 'match', 'dir'}], ordenadas por ruta.
+    """
+    matches = []
+    root = os.path.abspath(raw_dir)
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        if EVENTING_FILE not in filenames and TRACKING_FILE not in filenames:
+            continue
+        rel = os.path.relpath(dirpath, root)
+        parts = [] if rel == "." else rel.split(os.sep)
+        parts = parts or [os.path.basename(root)]
+        parts = [UNKNOWN] * (3 - len(parts)) + parts[-3:]
+        matches.append({**dict(zip(PARTITION_KEYS, map(_partition_value, parts))), 'dir': dirpath})
+    return matches
+
+
+def partition_dir(out_dir: str, kind: str, partition: dict) -> str:
+    return os.path.join(out_dir, kind, *(f"{k}={partition[k]}" for k in PARTITION_KEYS))
+
+
+# --- Conversión (se ejecuta en el pool) ---
+
+def _remove(*paths):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _write_atomic(path: str, write):
+    """Escribe con write(tmp) y renombra: un lector nunca ve un parquet a medias."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    try:
+        write(tmp)
+    except BaseException:
+        _remove(tmp)
+        raise
+    os.replace(tmp, path)
+
+
+def _eventing_table(events: pd.DataFrame) -> pa.Table:
+    """Eventos -> tabla con los tipos de EVENTING_TYPES y el resto como texto (igual en todos los partidos)."""
+    columns = {}
+    for name in events.columns:
+        kind = EVENTING_TYPES.get(name, pa.string())
+        if kind == pa.string():
+            # object: los Int64 (ids) salen como 7, no 7.0; categorías y NA -> texto o nulo
+            columns[name] = pa.array([None if pd.isna(v) else str(v) for v in events[name].astype(object)],
+                                     type=kind)
+        else:
+            columns[name] = pa.array(pd.to_numeric(events[name], errors='coerce').astype('float64'),
+                                     from_pandas=True).cast(kind)
+    return pa.table(columns)
+
+
+def convert_eventing(path: str, out_path: str, options: dict) -> int:
+    """CSV de eventing -> parquet (con game_time y period normalizados, como load_eventing). Filas."""
+    events = load_eventing(path)
+    table = _eventing_table(events)
+    _write_atomic(out_path, lambda tmp: pq.write_table(table, tmp, compression=options['compression']))
+    return table.num_rows
+
+
+def _ids_array(values) -> pa.Array:
+    """Ids de jugador/equipo como texto (el tipo de TRACKING_SCHEMA), None -> nulo."""
+    return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+
+
+def _flag_array(values: np.ndarray) -> pa.Array:
+    """1/0/-1 (int8) -> booleano con nulos."""
+    return pa.array(values == 1, mask=values < 0)
+
+
+def _frame_table(store: FrameStore) -> pa.Table:
+    ball = store.ball if store.has_ball else np.full((len(store), 3), np.nan, dtype=np.float32)
+    ball_detected = store.ball_detected if store.has_ball else np.full(len(store), -1, dtype=np.int8)
+    return pa.table({
+        'frame': store.frame,
+        'period': store.period.astype(np.int64),
+        'game_time': pa.array(store.game_time, mask=np.isnan(store.game_time)),
+        'timestamp': pa.array([None if t is None else str(t) for t in store.timestamp], type=pa.string()),
+        'ball_x': pa.array(ball[:, 0], mask=np.isnan(ball[:, 0])),
+        'ball_y': pa.array(ball[:, 1], mask=np.isnan(ball[:, 1])),
+        'ball_z': pa.array(ball[:, 2], mask=np.isnan(ball[:, 2])),
+        'ball_detected': _flag_array(ball_detected),
+        'extras': pa.array(store.extras.tolist(), type=pa.string()),
+    }, schema=FRAMES_SCHEMA)
+
+
+def _tracking_table(store: FrameStore, player_ids: pa.Array, team_ids: pa.Array) -> pa.Table:
+    """Formato largo: una fila por jugador presente en cada frame."""
+    rows, ents = np.nonzero(~np.isnan(store.xy[:, :, 0]))
+    xy = store.xy[rows, ents]
+    return pa.table({
+        'frame': store.frame[rows],
+        'period': store.period[rows].astype(np.int64),
+        'game_time': pa.array(store.game_time[rows], mask=np.isnan(store.game_time[rows])),
+        'player_id': player_ids.take(ents),
+        'team_id': team_ids.take(ents),
+        'x': xy[:, 0],
+        'y': xy[:, 1],
+        'is_detected': _flag_array(store.detected[rows, ents]),
+    }, schema=TRACKING_SCHEMA)
+
+
+def convert_tracking(path: str, ids_path: str, frames_path: str, tracking_path: str, options: dict) -> int:
+    """
+    JSONL de tracking -> parquet de frames y de jugadores, por bloques de chunk_size frames
+    (un FrameStore por bloque; la memoria no depende del tamaño del partido). Frames leídos.
+    """
+    roster = load_roster(ids_path) if ids_path else Roster()
+    for out in (frames_path, tracking_path):
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+    frames_tmp, tracking_tmp = frames_path + ".tmp", tracking_path + ".tmp"
+    frames_writer = pq.ParquetWriter(frames_tmp, FRAMES_SCHEMA, compression=options['compression'])
+    tracking_writer = pq.ParquetWriter(tracking_tmp, TRACKING_SCHEMA, compression=options['compression'])
+    n = 0
+    try:
+        for chunk in iter_jsonl_chunks(path, options['chunk_size']):
+            store = FrameStore(roster)
+            store.append(chunk)
+            n += len(store)
+            # El roster crece con los jugadores que no estaban en el archivo de IDs
+            teams = [roster.team_ids[t] if t >= 0 else None for t in roster.player_team]
+            tracking_writer.write_table(_tracking_table(store, _ids_array(roster.player_ids), _ids_array(teams)))
+            frames_writer.write_table(_frame_table(store))
+    except BaseException:
+        frames_writer.close()
+        tracking_writer.close()
+        _remove(frames_tmp, tracking_tmp)
+        raise
+    frames_writer.close()
+    tracking_writer.close()
+    os.replace(frames_tmp, frames_path)
+    os.replace(tracking_tmp, tracking_path)
+    return n
+
+
+def convert_task(task: dict) -> dict:
+    """Una tarea del pool: convierte un archivo fuente y devuelve filas, hash y tiempo."""
+    start = time.monotonic()
+    options = task['options']
+    if task['kind'] == 'eventing':
+        rows = convert_eventing(task['source'], task['outputs'][0], options)
+    else:
+        rows = convert_tracking(task['source'], task['ids'], *task['outputs'], options)
+    return {'rows': rows, 'digest': file_digest(task['source']), 'seconds': time.monotonic() - start}
+
+
+# --- Planificación (proceso principal) ---
+
+def _read_manifest(out_dir: str) -> dict:
+    try:
+        with open(os.path.join(out_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {'version': MANIFEST_VERSION, 'files': {}}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {'version': MANIFEST_VERSION, 'files': {}}
+    return manifest
+
+
+def _write_manifest(out_dir: str, manifest: dict):
+    os.makedirs(out_dir, exist_ok=True)
+    tmp = os.path.join(out_dir, MANIFEST_FILE + ".tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(tmp, os.path.join(out_dir, MANIFEST_FILE))
+
+
+def _unchanged(entry: dict, source: str, ids: str = None) -> bool:
+    """La fuente (y su archivo de IDs) siguen como cuando se convirtieron. Actualiza el mtime si solo cambió ese."""
+    for key, path in (('source', source), ('ids', ids)):
+        if path is None:
+            continue
+        old, current = entry.get(key), fingerprint(path, digest=False)
+        if old is None or current['size'] != old['size']:
+            return False
+        if current['mtime_ns'] != old['mtime_ns']:
+            if fingerprint(path)['digest'] != old['digest']:
+                return False
+            old['mtime_ns'] = current['mtime_ns']
+    return True
+
+
+def plan_tasks(raw_dir: str, out_dir: str, manifest: dict, options: dict, force: bool = False) -> tuple:
+    """
+    (tareas pendientes, claves del manifest que ya no tienen fuente, archivos sin cambios).
+    Una tarea por archivo fuente nuevo o cambiado; las más grandes primero para repartir mejor el pool.
+    """
+    files = manifest['files']
+    root = os.path.abspath(raw_dir)
+    tasks, seen = [], set()
+    for match in discover_matches(raw_dir):
+        sources = match_sources(match['dir'])
+        partition = {k: match[k] for k in PARTITION_KEYS}
+        for kind in ('eventing', 'tracking'):
+            source = sources[kind]
+            if not os.path.exists(source):
+                continue
+            key = os.path.relpath(source, root)
+            seen.add(key)
+            ids = sources['ids'] if kind == 'tracking' and os.path.exists(sources['ids']) else None
+            entry = files.get(key)
+            if not force and entry is not None and _unchanged(entry, source, ids):
+                continue
+            if kind == 'eventing':
+                outputs = [os.path.join(partition_dir(out_dir, 'eventing', partition), "part-0.parquet")]
+            else:
+                outputs = [os.path.join(partition_dir(out_dir, name, partition), "part-0.parquet")
+                           for name in ('frames', 'tracking')]
+            tasks.append({'key': key, 'kind': kind, 'source': source, 'ids': ids, 'partition': partition,
+                          'outputs': outputs, 'options': options,
+                          # Huellas antes de leer: si la fuente cambia durante la conversión se repite
+                          'prints': {'source': fingerprint(source, digest=False),
+                                     'ids': fingerprint(ids, digest=False) if ids else None}})
+    tasks.sort(key=lambda t: t['prints']['source']['size'], reverse=True)
+    return tasks, [k for k in files if k not in seen], len(seen) - len(tasks)
+
+
+def _remove_outputs(out_dir: str, entry: dict):
+    _remove(*(os.path.join(out_dir, rel) for rel in entry.get('outputs', [])))
+
+
+def convert_archive(raw_dir: str, out_dir: str, options: dict = None, force: bool = False, log=print) -> dict:
+    """
+    Convierte (o actualiza) el dataset de out_dir a partir del archivo de raw_dir.
+    Devuelve un resumen: archivos convertidos, sin cambios, eliminados y con error, y filas.
+    """
+    options = {**DEFAULTS, **(options or {})}
+    manifest = _read_manifest(out_dir)
+    tasks, removed, unchanged = plan_tasks(raw_dir, out_dir, manifest, options, force)
+    summary = {'converted': 0, 'unchanged': unchanged, 'removed': len(removed), 'failed': 0, 'rows': 0}
+    for key in removed:
+        _remove_outputs(out_dir, manifest['files'].pop(key))
+
+    if tasks:
+        workers = min(options['workers'] or os.cpu_count() or 1, len(tasks))
+        log(f"🗂️ {len(tasks)} archivos por convertir con {workers} procesos")
+        context = multiprocessing.get_context('spawn')
+        last_save = time.monotonic()
+        with concurrent.futures.ProcessPoolExecutor(workers, mp_context=context,
+                                                    max_tasks_per_child=options['max_tasks_per_child']) as pool:
+            futures = {pool.submit(convert_task, task): task for task in tasks}
+            for future in concurrent.futures.as_completed(futures):
+                task = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    summary['failed'] += 1
+                    log(f"⚠️ {task['key']}: {e}")
+                    continue
+                prints = task['prints']
+                manifest['files'][task['key']] = {
+                    'kind': task['kind'],
+                    'partition': task['partition'],
+                    'source': {**prints['source'], 'digest': result['digest']},
+                    'ids': {**prints['ids'], 'digest': file_digest(task['ids'])} if task['ids'] else None,
+                    'outputs': [os.path.relpath(p, out_dir) for p in task['outputs']],
+                    'rows': result['rows'],
+                }
+                summary['converted'] += 1
+                summary['rows'] += result['rows']
+                log(f"   {task['key']}: {result['rows']} filas en {result['seconds']:.1f} s")
+                if time.monotonic() - last_save >= options['checkpoint']:
+                    _write_manifest(out_dir, manifest)
+                    last_save = time.monotonic()
+    _write_manifest(out_dir, manifest)
+    return summary
+
+
+# --- Lectura ---
+
+def read_dataset(out_dir: str, kind: str = 'eventing', columns: list = None, **partition):
+    """
+    Lee un dataset convertido como DataFrame, filtrando por partición sin abrir el resto de
+    archivos: read_dataset(out, 'eventing', season='2023-2024', competition='liga').
+    Las columnas season/competition/match se añaden a partir de las carpetas.
+    """
+    dataset = ds.dataset(os.path.join(out_dir, kind), format='parquet', partitioning=PARTITIONING)
+    condition = None
+    for key, value in partition.items():
+        if key not in PARTITION_KEYS:
+            raise ValueError(f"Partición desconocida: {key} (válidas: {', '.join(PARTITION_KEYS)})")
+        term = ds.field(key) == _partition_value(str(value))
+        condition = term if condition is None else condition & term
+    return dataset.to_table(columns=columns, filter=condition).to_pandas()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archivo histórico (CSV/JSONL) -> dataset Parquet particionado")
+    parser.add_argument('raw_dir', help="raíz con <temporada>/<competición>/<partido>/")
+    parser.add_argument('out_dir', help="carpeta del dataset")
+    parser.add_argument('--env', default=os.environ.get("APP_ENV", "dev"))
+    parser.add_argument('--workers', type=int, help="procesos del pool (por defecto, núcleos)")
+    parser.add_argument('--force', action='store_true', help="reconvertir aunque las fuentes no hayan cambiado")
+    args = parser.parse_args(argv)
+
+    options = historical_options(load_config(args.env))
+    if args.workers:
+        options['workers'] = args.workers
+    t0 = time.monotonic()
+    summary = convert_archive(args.raw_dir, args.out_dir, options, force=args.force)
+    print(f"✅ {' | '.join(f'{k}={v}' for k, v in summary.items())} ({time.monotonic() - t0:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+# TACTIX_LIVE/streaming/job_scheduler.py
+"""
+Cálculos pesados disparados por eventos clave (Goles, Tiros) fuera del camino de ingesta.
+
+El streaming_worker llama a observe() con cada micro-batch ya procesado (FrameStore + eventos)
+de un partido. El planificador:
+
+- Guarda los últimos 'history' s de tracking de cada partido (copias de los arrays del batch,
+  sin dicts) para poder recortar la ventana de un evento.
+- Con cada evento cuyo type_name esté en 'triggers' crea un trabajo para la ventana
+  [evento - window_before, evento + window_after]. Espera a que el tracking cubra el final de
+  la ventana (o 'max_wait' s reales) y entonces copia la ventana (snapshot) y la manda a un
+  pool de procesos: el hilo de ingesta nunca calcula ni espera resultados. Un temporizador
+  vuelve a despachar al vencer 'max_wait', aunque el partido haya dejado de enviar batches.
+- Fusión: como mucho un trabajo en espera por partido. Un evento repetido (reentrega) se
+  ignora; uno nuevo a menos de 'coalesce' s de juego del que espera se fusiona con él
+  (ventana unida) y uno posterior lo sustituye. Una ráfaga de eventos no acumula trabajo.
+- Acotado: como mucho 'max_workers' trabajos en el pool; el resto espera en su partido, donde
+  todavía se puede fusionar o sustituir.
+- Cancelación: un trabajo cuyo evento ha quedado más de 'stale_after' s de juego por detrás
+  del tracking del partido se cancela antes de enviarse, y su resultado se descarta si ya
+  estaba en marcha. También se descarta si ya hay un resultado de un evento posterior.
+
+El cálculo (pitch_control_job) es una función de módulo para que se pueda enviar al pool; los
+resultados quedan en results[match_id] y se pasan a on_result(result) si se indica (fuera del
+lock del planificador, así que on_result puede volver a llamarlo).
+"""
+import concurrent.futures
+import multiprocessing
+import sys
+import threading
+import time
+
+import numpy as np
+
+from TACTIX_LIVE.streaming.processing_logic import PitchControl, pitch_control_options, player_velocities
+
+DEFAULTS = {
+    'triggers': ["Goal", "Shot"],  # type_name de los eventos que disparan el cálculo
+    'window_before': 2.0,          # s de juego antes del evento
+    'window_after': 1.0,           # s de juego después del evento
+    'step': 5,                     # Se calcula uno de cada 'step' frames de la ventana
+    'history': 15.0,               # s de tracking que se guardan por partido
+    'coalesce': 2.0,               # s de juego: eventos más cercanos se calculan juntos
+    'max_wait': 5.0,               # s reales de espera al tracking posterior al evento
+    'stale_after': 30.0,           # s de juego: resultado que ya no interesa
+    'max_workers': 2,              # Procesos del pool (trabajos en marcha como máximo)
+}
+
+# Significado de los contadores
+_HELP = {
+    'submitted': "Trabajos enviados al pool",
+    'completed': "Trabajos terminados con resultado vigente",
+    'coalesced': "Eventos fusionados con un trabajo en espera",
+    'superseded': "Trabajos en espera sustituidos por un evento posterior",
+    'duplicates': "Eventos repetidos ignorados",
+    'cancelled': "Trabajos cancelados antes de enviarse",
+    'stale': "Resultados descartados por llegar tarde",
+    'failed': "Trabajos con error",
+}
+
+
+def job_options(config: dict = None) -> dict:
+    """DEFAULTS con lo que venga en config['jobs']."""
+    return {**DEFAULTS, **(config or {}).get('jobs', {})}
+
+
+# --- Cálculo (se ejecuta en el pool) ---
+
+_models = {}  # PitchControl por opciones, reutilizado entre trabajos del mismo proceso
+
+
+def pitch_control_job(snapshot: dict, options: dict = None) -> dict:
+    """
+    Pitch control de la ventana de un evento. snapshot: match_id, events, game_time, period,
+    xy (frames x jugadores x 2), team y ball (frames x 3). Devuelve el control del equipo 0 por
+    frame calculado (ny x nx), su media por frame y el mapa del frame más cercano al evento.
+    """
+    options = pitch_control_options({'pitch_control': options or {}})
+    key = repr(sorted(options.items()))
+    model = _models.get(key)
+    if model is None:
+        model = _models[key] = PitchControl(options)
+
+    t, period, xy = snapshot['game_time'], snapshot['period'], snapshot['xy']
+    prev = np.concatenate([xy[:1], xy[:-1]])
+    dt = np.diff(t, prepend=np.nan)
+    dt[1:][(period[1:] != period[:-1]) | ~(dt[1:] > 0) | (dt[1:] > 1.0)] = np.nan
+    velocity = player_velocities(xy, prev, dt, options['max_player_speed'])
+
+    rows = np.arange(0, len(t), max(1, int(snapshot.get('step', 1))))
+    control = model.compute_batch(xy[rows], snapshot['team'], velocity[rows], snapshot['ball'][rows])
+    event_time = snapshot['events'][-1]['game_time']
+    nearest = int(np.argmin(np.abs(t[rows] - event_time)))
+    return {
+        'match_id': snapshot['match_id'],
+        'events': snapshot['events'],
+        'game_time': t[rows],
+        'home_control': control.mean(axis=(1, 2)),
+        'control': control,
+        'event_control': control[nearest],
+    }
+
+
+# --- Planificación (hilo del worker) ---
+
+class _History:
+    """Últimos segundos de tracking de un partido como lista de bloques (uno por micro-batch)."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.chunks = []
+        self.team = None
+        self.game_time = np.nan  # Último tiempo de juego visto
+
+    def add(self, store):
+        team = store.roster.team_index
+        if self.team is None or not np.array_equal(team, self.team):
+            self.clear()  # Tabla de jugadores nueva: cambian los índices
+            self.team = team.copy()
+        t = store.game_time
+        ok = ~np.isnan(t)
+        if not ok.any():
+            return
+        n = len(team)
+        xy = store.xy[ok, :n]
+        if xy.shape[1] < n:
+            xy = np.pad(xy, ((0, 0), (0, n - xy.shape[1]), (0, 0)), constant_values=np.nan)
+        ball = store.ball[ok] if store.has_ball else np.full((int(ok.sum()), 3), np.nan, dtype=np.float32)
+        self.chunks.append((t[ok].copy(), store.period[ok].copy(), xy.copy(), ball.copy()))
+        self.game_time = float(np.nanmax(t))
+        while len(self.chunks) > 1 and self.chunks[0][0].max() < self.game_time - self.seconds:
+            self.chunks.pop(0)
+
+    def window(self, start: float, end: float):
+        parts = [c for c in self.chunks if c[0].max() >= start and c[0].min() <= end]
+        if not parts:
+            return None
+        t, period, xy, ball = (np.concatenate(cols) for cols in zip(*parts))
+        keep = (t >= start) & (t <= end)
+        return t[keep], period[keep], xy[keep], ball[keep]
+
+    def clear(self):
+        self.chunks = []
+        self.team = None
+        self.game_time = np.nan
+
+
+class _Job:
+    __slots__ = ('match_id', 'events', 'start', 'end', 'created', 'future')
+
+    def __init__(self, match_id: str, event: dict, before: float, after: float):
+        self.match_id = match_id
+        self.events = [event]
+        self.start = event['game_time'] - before
+        self.end = event['game_time'] + after
+        self.created = time.monotonic()
+        self.future = None
+
+    @property
+    def game_time(self) -> float:
+        return self.events[-1]['game_time']
+
+
+def _event_key(event: dict):
+    return event.get('event_id'), event.get('type_name'), event.get('game_time')
+
+
+class JobScheduler:
+    """
+    Cola de trabajos por partido disparados por eventos, con fusión, cancelación y un pool de
+    procesos acotado. Cada trabajo ejecuta job(snapshot, job_params) en el pool. executor:
+    cualquier concurrent.futures.Executor (por defecto un ProcessPoolExecutor con 'max_workers'
+    procesos 'spawn', que no hereda los hilos del worker).
+    """
+
+    def __init__(self, options: dict = None, job=pitch_control_job, job_params: dict = None,
+                 executor=None, on_result=None):
+        self.options = {**DEFAULTS, **(options or {})}
+        self.job = job
+        self.job_params = job_params
+        self.on_result = on_result
+        self.triggers = set(self.options['triggers'])
+        self._executor = executor
+        self._own_executor = executor is None
+        self.pending = {}   # match_id -> _Job en espera (uno por partido)
+        self.running = {}   # match_id -> _Job en el pool (uno por partido)
+        self.results = {}   # match_id -> último resultado
+        self.counts = {'submitted': 0, 'completed': 0, 'coalesced': 0, 'superseded': 0,
+                       'duplicates': 0, 'cancelled': 0, 'stale': 0, 'failed': 0}
+        self._history = {}
+        self._seen = {}     # match_id -> claves de los eventos recientes (reentregas)
+        self._lock = threading.RLock()
+        self._idle = threading.Condition(self._lock)  # Avisa cuando termina un trabajo
+        self._timer = None  # Re-despacho al vencer el max_wait del trabajo en espera más antiguo
+        self._timer_at = None
+        self._closed = False
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                self.options['max_workers'], mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    # --- Entrada ---
+    def observe(self, match_id: str, frames=None, events=()):
+        """Micro-batch de un partido: guarda el tracking, encola los eventos clave y despacha."""
+        with self._lock:
+            history = self._history.get(match_id)
+            if history is None:
+                history = self._history[match_id] = _History(self.options['history'])
+            if frames is not None and len(frames):
+                history.add(frames)
+            for event in events:
+                if event.get('type_name') in self.triggers and event.get('game_time') is not None:
+                    self._trigger(match_id, event)
+        self.dispatch()
+
+    def _trigger(self, match_id: str, event: dict):
+        seen = self._seen.setdefault(match_id, {})
+        key = _event_key(event)
+        if key in seen:
+            self.counts['duplicates'] += 1
+            return
+        seen[key] = event['game_time']
+        for old in [k for k, t in seen.items() if t < event['game_time'] - self.options['stale_after']]:
+            del seen[old]
+
+        job = self.pending.get(match_id)
+        o = self.options
+        if job is not None and abs(event['game_time'] - job.game_time) <= o['coalesce']:
+            # Eventos seguidos (tiro y gol): un solo cálculo con la ventana de ambos
+            job.events.append(event)
+            job.events.sort(key=lambda e: e['game_time'])
+            job.start = min(job.start, event['game_time'] - o['window_before'])
+            job.end = max(job.end, event['game_time'] + o['window_after'])
+            self.counts['coalesced'] += 1
+        elif job is not None and event['game_time'] < job.game_time:
+            self.counts['superseded'] += 1  # Llega tarde un evento anterior al que ya espera
+        else:
+            if job is not None:
+                self.counts['superseded'] += 1
+            self.pending[match_id] = _Job(match_id, event, o['window_before'], o['window_after'])
+
+    # --- Despacho ---
+    def _stale(self, job: _Job) -> bool:
+        now = self._history[job.match_id].game_time
+        if now - job.game_time > self.options['stale_after']:
+            return True
+        last = self.results.get(job.match_id)
+        return last is not None and last['events'][-1]['game_time'] > job.game_time
+
+    def dispatch(self):
+        """Envía al pool los trabajos listos mientras haya hueco (no bloquea)."""
+        submitted = []
+        with self._lock:
+            if self._closed:
+                return
+            for match_id, job in list(self.pending.items()):
+                if len(self.running) >= self.options['max_workers']:
+                    break
+                if match_id in self.running:
+                    continue
+                history = self._history[match_id]
+                if self._stale(job):
+                    del self.pending[match_id]
+                    self.counts['cancelled'] += 1
+                    continue
+                waited = time.monotonic() - job.created
+                if not history.game_time >= job.end and waited < self.options['max_wait']:
+                    continue  # Falta el tracking de después del evento
+                del self.pending[match_id]
+                window = history.window(job.start, job.end)
+                if window is None:
+                    self.counts['cancelled'] += 1
+                    continue
+                t, period, xy, ball = window
+                snapshot = {'match_id': match_id, 'events': job.events, 'game_time': t, 'period': period,
+                            'xy': xy, 'ball': ball, 'step': self.options['step'],
+                            'team': history.team}
+                job.future = self.executor.submit(self.job, snapshot, self.job_params)
+                self.running[match_id] = job
+                self.counts['submitted'] += 1
+                submitted.append(job)
+            self._schedule_timeout()
+        # Fuera del lock: si el trabajo ya terminó, el callback se ejecuta aquí mismo
+        for job in submitted:
+            job.future.add_done_callback(lambda f, job=job: self._done(job, f))
+
+    def _schedule_timeout(self):
+        """
+        Arma el temporizador para el primer trabajo que espera tracking y vence su max_wait. Con el
+        pool lleno no hace falta (_done vuelve a despachar) y solo cuentan los vencimientos futuros:
+        uno ya pasado que no se ha despachado espera hueco, y re-armar a 0 s sería un bucle activo.
+        """
+        if len(self.running) >= self.options['max_workers']:
+            return
+        now = time.monotonic()
+        waiting = [job.created + self.options['max_wait'] for match_id, job in self.pending.items()
+                   if match_id not in self.running and job.created + self.options['max_wait'] > now]
+        if not waiting:
+            return
+        at = min(waiting)
+        if self._timer is not None and self._timer_at <= at:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(at - now, self._on_timeout)
+        self._timer.daemon = True
+        self._timer_at = at
+        self._timer.start()
+
+    def _on_timeout(self):
+        with self._lock:
+            self._timer = None
+        self.dispatch()
+
+    def _done(self, job: _Job, future):
+        result = None
+        with self._lock:
+            if future.cancelled():
+                self.counts['cancelled'] += 1
+            elif future.exception() is not None:
+                self.counts['failed'] += 1
+                print(f"⚠️ Error en el trabajo del partido {job.match_id}: {future.exception()}", file=sys.stderr)
+            elif self._stale(job):
+                self.counts['stale'] += 1
+            else:
+                result = future.result()
+                self.results[job.match_id] = result
+                self.counts['completed'] += 1
+            if self.running.get(job.match_id) is job:
+                del self.running[job.match_id]
+            self._idle.notify_all()
+        if result is not None and self.on_result is not None:
+            self.on_result(result)
+        self.dispatch()
+
+    # --- Ciclo de vida y métricas ---
+    def close(self, wait: bool = True, timeout: float = None):
+        """Cancela lo que espera y, con wait, deja terminar lo que está en marcha."""
+        with self._lock:
+            self._closed = True
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self.counts['cancelled'] += len(self.pending)
+            self.pending.clear()
+            if wait:
+                self._idle.wait_for(lambda: not self.running, timeout)
+        if self._executor is not None and self._own_executor:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def gauges(self) -> dict:
+        """Estado para collect_metrics del worker: {nombre: (ayuda, valor)}."""
+        with self._lock:
+            gauges = {
+                'jobs_pending': ("Trabajos en espera (uno por partido como máximo)", len(self.pending)),
+                'jobs_running': ("Trabajos en el pool de procesos", len(self.running)),
+            }
+            for name, value in self.counts.items():
+                gauges[f'jobs_{name}_total'] = (_HELP[name], value)
+        return gauges
@@ -0,0 +1,244 @@
+# TACTIX_LIVE/streaming/kinematics.py
+"""
+Cinemática y carga física por jugador a partir de las posiciones del tracking.
+
+- compute_kinematics(): partido completo en una pasada de NumPy sobre (frames x jugadores).
+  Posiciones suavizadas con media móvil centrada, velocidad y aceleración por diferencias
+  centradas, distancia recorrida y carreras de alta intensidad / sprints. Nada cruza un
+  cambio de periodo, un salto atrás del reloj ni un hueco de más de 'max_dt' segundos.
+- KinematicsTracker: la misma información en vivo, O(jugadores) por frame (suavizado
+  exponencial causal en lugar de la media centrada, así que los valores difieren un poco).
+
+Velocidades en m/s; umbrales por defecto: alta intensidad > 19.8 km/h, sprint > 25.2 km/h,
+mantenidos al menos 1 s.
+"""
+import numpy as np
+import pandas as pd
+
+from TACTIX_LIVE.utils.preprocess import segment_ids
+
+DEFAULTS = {
+    'smooth_window': 5,      # Frames de la media móvil centrada (impar); en vivo, span del suavizado
+    'max_dt': 1.0,           # Hueco máximo (s) entre frames para seguir en el mismo tramo
+    'max_speed': 12.5,       # Velocidades mayores se consideran saltos del tracking
+    'hi_speed': 5.5,         # Alta intensidad (m/s) = 19.8 km/h
+    'sprint_speed': 7.0,     # Sprint (m/s) = 25.2 km/h
+    'min_duration': 1.0,     # Duración mínima (s) de una carrera para contarla
+}
+
+
+def kinematics_options(config: dict = None) -> dict:
+    """DEFAULTS con lo que venga en config['kinematics']."""
+    return {**DEFAULTS, **(config or {}).get('kinematics', {})}
+
+
+def _segments(game_time, period, max_dt: float) -> np.ndarray:
+    """Tramos continuos (segment_ids) partidos además en los huecos de más de max_dt segundos."""
+    game_time = np.asarray(game_time, dtype=np.float64)
+    seg = segment_ids(period, game_time)
+    gap = np.zeros(len(seg), dtype=bool)
+    gap[1:] = np.diff(game_time) > max_dt
+    return seg + np.cumsum(gap)
+
+
+def _smooth(xy: np.ndarray, seg: np.ndarray, window: int) -> np.ndarray:
+    """Media móvil centrada por jugador sin salir del tramo ni contar posiciones ausentes."""
+    n = len(xy)
+    half = max(0, int(window) // 2)
+    present = ~np.isnan(xy[..., 0])
+    if half == 0 or n == 0:
+        return xy.astype(np.float64)
+    rows = np.arange(n)
+    bounds = np.flatnonzero(np.diff(seg)) + 1
+    seg_start = np.concatenate(([0], bounds))[np.searchsorted(bounds, rows, side='right')]
+    seg_end = np.concatenate((bounds, [n]))[np.searchsorted(bounds, rows, side='right')]
+    lo = np.maximum(rows - half, seg_start)
+    hi = np.minimum(rows + half + 1, seg_end)
+
+    cum = np.zeros((n + 1,) + xy.shape[1:], dtype=np.float64)
+    np.cumsum(np.where(present[..., None], xy, 0.0), axis=0, out=cum[1:])
+    count = np.zeros((n + 1, xy.shape[1]), dtype=np.int64)
+    np.cumsum(present, axis=0, out=count[1:])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = (cum[hi] - cum[lo]) / (count[hi] - count[lo])[..., None]
+    out[~present] = np.nan
+    return out
+
+
+def _derivative(values: np.ndarray, game_time: np.ndarray, seg: np.ndarray) -> np.ndarray:
+    """Diferencias centradas dentro del tramo (laterales en sus extremos); NaN si falta un vecino."""
+    n = len(values)
+    rows = np.arange(n)
+    nxt = np.minimum(rows + 1, n - 1)
+    prv = np.maximum(rows - 1, 0)
+    nxt = np.where(seg[nxt] == seg, nxt, rows)
+    prv = np.where(seg[prv] == seg, prv, rows)
+    dt = (game_time[nxt] - game_time[prv]).reshape((n,) + (1,) * (values.ndim - 1))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = (values[nxt] - values[prv]) / dt
+    out[(nxt == prv)] = np.nan
+    return out
+
+
+def _runs(mask: np.ndarray, seg: np.ndarray):
+    """
+    Carreras: tramos consecutivos de True por jugador (sin cruzar tramos). Devuelve
+    (jugador, fila inicial, fila final exclusiva) de cada una.
+    """
+    n, p = mask.shape
+    if n == 0:
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.int64)
+    new_seg = np.ones(n, dtype=bool)
+    new_seg[1:] = seg[1:] != seg[:-1]
+    prev = np.zeros_like(mask)
+    prev[1:] = mask[:-1]
+    start = mask & (~prev | new_seg[:, None])
+    nxt = np.zeros_like(mask)
+    nxt[:-1] = mask[1:]
+    last = np.ones(n, dtype=bool)
+    last[:-1] = seg[1:] != seg[:-1]
+    end = mask & (~nxt | last[:, None])
+    # Orden por jugador y fila: inicios y finales se emparejan en el mismo orden
+    s_player, s_row = np.nonzero(start.T)
+    _, e_row = np.nonzero(end.T)
+    return s_player, s_row, e_row + 1
+
+
+def compute_kinematics(xy, game_time, period, options: dict = None) -> dict:
+    """
+    xy: (frames x jugadores x 2) en metros, NaN = ausente. Devuelve:
+    - speed, acceleration: (frames x jugadores) float32, NaN sin dato
+    - step_distance: (frames x jugadores) metros recorridos desde el frame anterior del tramo
+    - summary: por jugador (arrays de longitud jugadores): distance, top_speed, hi_runs,
+      hi_distance, sprints, sprint_distance
+    """
+    o = {**DEFAULTS, **(options or {})}
+    xy = np.asarray(xy, dtype=np.float64)
+    game_time = np.asarray(game_time, dtype=np.float64)
+    seg = _segments(game_time, period, o['max_dt'])
+    pos = _smooth(xy, seg, o['smooth_window'])
+
+    velocity = _derivative(pos, game_time, seg)
+    speed = np.hypot(velocity[..., 0], velocity[..., 1])
+    speed[speed > o['max_speed']] = np.nan
+    acceleration = _derivative(speed, game_time, seg)
+
+    step = np.zeros(speed.shape, dtype=np.float64)
+    if len(pos) > 1:
+        same = (seg[1:] == seg[:-1])[:, None]
+        dt = np.diff(game_time)[:, None]
+        d = np.hypot(*(pos[1:] - pos[:-1]).transpose(2, 0, 1))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ok = same & (d / dt <= o['max_speed'])
+        step[1:] = np.where(ok, d, 0.0)
+
+    summary = {
+        'distance': step.sum(axis=0),
+        'top_speed': np.fmax.reduce(speed, axis=0) if len(speed) else np.full(speed.shape[1], np.nan),
+    }
+    finite_dt = np.diff(game_time)
+    frame_dt = float(np.median(finite_dt[finite_dt > 0])) if (finite_dt > 0).any() else 0.0
+    step_cum = np.zeros((len(step) + 1, step.shape[1]))
+    np.cumsum(step, axis=0, out=step_cum[1:])
+    with np.errstate(invalid='ignore'):
+        for name, threshold in (('hi', o['hi_speed']), ('sprint', o['sprint_speed'])):
+            player, start, stop = _runs(speed >= threshold, seg)
+            keep = (stop - start) * frame_dt >= o['min_duration']
+            player, start, stop = player[keep], start[keep], stop[keep]
+            # Distancia de la carrera: pasos que terminan en alguno de sus frames
+            dist = step_cum[stop, player] - step_cum[start, player]
+            summary['hi_runs' if name == 'hi' else 'sprints'] = np.bincount(player, minlength=speed.shape[1])
+            summary[f'{name}_distance'] = np.bincount(player, weights=dist, minlength=speed.shape[1])
+
+    return {'speed': speed.astype(np.float32), 'acceleration': acceleration.astype(np.float32),
+            'step_distance': step.astype(np.float32), 'summary': summary}
+
+
+def store_kinematics(store, options: dict = None) -> dict:
+    """compute_kinematics() sobre un FrameStore completo."""
+    return compute_kinematics(store.xy, store.game_time, store.period, options)
+
+
+def physical_load(summary: dict, roster=None) -> pd.DataFrame:
+    """Tabla de carga física por jugador (para el cuerpo técnico), de mayor a menor distancia."""
+    df = pd.DataFrame({
+        'Distancia (m)': summary['distance'].round(1),
+        'Vel. máx (km/h)': (summary['top_speed'] * 3.6).round(1),
+        'Carreras AI': summary['hi_runs'],
+        'Distancia AI (m)': summary['hi_distance'].round(1),
+        'Sprints': summary['sprints'],
+        'Distancia sprint (m)': summary['sprint_distance'].round(1),
+    })
+    if roster is not None:
+        n = len(df)
+        df.insert(0, 'Jugador', [roster.player_names[i] or roster.player_ids[i] for i in range(n)])
+        df.insert(1, 'Equipo', [roster.team_names[t] if t >= 0 else None for t in roster.player_team[:n]])
+    return df[df['Distancia (m)'] > 0].sort_values('Distancia (m)', ascending=False, kind='stable')
+
+
+class KinematicsTracker:
+    """
+    Cinemática en vivo, O(jugadores) por frame. update() recibe cada frame (entidades x 2) con
+    su tiempo y periodo; speed / acceleration son los valores del último frame y summary los
+    acumulados (mismas claves que compute_kinematics). Una carrera cuenta en cuanto supera
+    'min_duration'; desde ahí su distancia se suma a la de alta intensidad / sprint.
+    """
+
+    def __init__(self, n_players: int, options: dict = None):
+        self.options = {**DEFAULTS, **(options or {})}
+        self.alpha = 2.0 / (max(1, int(self.options['smooth_window'])) + 1)
+        self.n = n_players
+        z = np.zeros(n_players)
+        self.pos = np.full((n_players, 2), np.nan)
+        self.speed = np.full(n_players, np.nan)
+        self.acceleration = np.full(n_players, np.nan)
+        self.summary = {'distance': z.copy(), 'top_speed': np.full(n_players, np.nan), 'hi_runs': z.astype(np.int64),
+                        'hi_distance': z.copy(), 'sprints': z.astype(np.int64), 'sprint_distance': z.copy()}
+        # Carrera en curso por umbral: duración (s) y distancia acumulada antes de contarla
+        self._run_time = {'hi': z.copy(), 'sprint': z.copy()}
+        self._run_dist = {'hi': z.copy(), 'sprint': z.copy()}
+        self._time = None
+        self._period = None
+
+    def update(self, xy, game_time: float, period=None):
+        o = self.options
+        xy = np.asarray(xy, dtype=np.float64)[:self.n]
+        dt = None if self._time is None else game_time - self._time
+        if dt is None or not (0 < dt <= o['max_dt']) or period != self._period:
+            # Nuevo tramo: se reinicia el estado por jugador, no los acumulados
+            self.pos[:] = np.nan
+            self.speed[:] = np.nan
+            for name in ('hi', 'sprint'):
+                self._run_time[name][:] = 0.0
+                self._run_dist[name][:] = 0.0
+            dt = None
+        self._time, self._period = game_time, period
+
+        # Operaciones sobre todos los jugadores a la vez: los NaN (ausentes) se propagan solos
+        prev = self.pos
+        self.pos = np.where(np.isnan(prev), xy, prev + self.alpha * (xy - prev))
+        if dt is None:
+            self.speed = np.full(self.n, np.nan)
+            self.acceleration = np.full(self.n, np.nan)
+            return
+        d = np.hypot(self.pos[:, 0] - prev[:, 0], self.pos[:, 1] - prev[:, 1])
+        with np.errstate(invalid='ignore'):
+            ok = d <= o['max_speed'] * dt
+            step = np.where(ok, d, 0.0)
+            new_speed = np.where(ok, d / dt, np.nan)
+            self.acceleration = (new_speed - self.speed) / dt
+            self.speed = new_speed
+            self.summary['distance'] += step
+            np.fmax(self.summary['top_speed'], new_speed, out=self.summary['top_speed'])
+
+            for name, threshold, count in (('hi', o['hi_speed'], 'hi_runs'), ('sprint', o['sprint_speed'], 'sprints')):
+                fast = new_speed >= threshold
+                run_time, run_dist = self._run_time[name], self._run_dist[name]
+                counted = run_time >= o['min_duration']
+                run_time = self._run_time[name] = np.where(fast, run_time + dt, 0.0)
+                crossed = fast & ~counted & (run_time >= o['min_duration'])
+                self.summary[count] += crossed
+                # Antes de contar la carrera su distancia queda en espera; al contarla se suma de golpe
+                pending = np.where(fast & counted, step, 0.0)
+                self.summary[f'{name}_distance'] += np.where(crossed, run_dist + step, pending)
+                self._run_dist[name] = np.where(fast & ~counted & ~crossed, run_dist + step, 0.0)
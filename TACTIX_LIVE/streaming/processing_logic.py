@@ -0,0 +1,360 @@
+# TACTIX_LIVE/streaming/processing_logic.py
+"""
+Cálculos tácticos del flujo en vivo: pitch control y líneas de formación.
+
+Pitch control (modelo físico de Spearman, 2018) vectorizado con NumPy.
+
+Para cada celda de una rejilla del campo se estima la probabilidad de que cada equipo
+controle un balón que llegue a ella:
+
+- Tiempo de intercepción de cada jugador: tras el tiempo de reacción sigue con su velocidad
+  actual y después corre en línea recta a velocidad máxima.
+- Probabilidad de llegada a tiempo t: logística centrada en ese tiempo (incertidumbre tti_sigma).
+- El control se integra en el tiempo desde que llega el balón: cada jugador acumula control a
+  ritmo lambda * P(llegada) sobre la probabilidad que todavía no controla nadie.
+
+Todo se calcula a la vez sobre (frames x jugadores x celdas): sin bucles por celda ni por
+jugador, solo el bucle de integración (decenas de pasos). En cada paso la logística se
+actualiza con una multiplicación (exp(-k(t + dt - tti)) = exp(-k(t - tti)) * exp(-k dt)) y
+las sumas por equipo son un producto de matrices.
+
+Líneas de formación (FormationTracker): posición media de cada jugador con media móvil
+exponencial, actualizada en O(jugadores) por frame, y k-means 1D sobre la profundidad
+(eje x en el sentido de ataque) para agrupar en líneas. El k-means solo se repite cuando
+las medias se han desplazado más de un umbral, partiendo de los centros anteriores.
+
+MatchAnalytics agrupa los cálculos por frame de un partido en vivo (formación y cinemática)
+y es lo que el streaming_worker alimenta con cada micro-batch.
+
+Coordenadas en metros con el origen en el centro del campo (las del tracking).
+"""
+import numpy as np
+
+from TACTIX_LIVE.streaming.kinematics import KinematicsTracker
+
+# Parámetros del modelo (valores de referencia de Spearman, 2018)
+DEFAULTS = {
+    'grid': (50, 32),          # Celdas a lo largo x a lo ancho
+    'pitch': (105.0, 68.0),    # Dimensiones del campo (m)
+    'max_speed': 5.0,          # Velocidad máxima de carrera (m/s)
+    'reaction_time': 0.7,      # Tiempo de reacción (s)
+    'tti_sigma': 0.45,         # Incertidumbre del tiempo de intercepción (s)
+    'lambda_home': 4.3,        # Ritmo de control (1/s) del equipo 0
+    'lambda_away': 4.3,        # Ritmo de control (1/s) del equipo 1
+    'ball_speed': 15.0,        # Velocidad media del balón en un pase (m/s)
+    'dt': 0.04,                # Paso de integración (s)
+    'max_time': 10.0,          # Horizonte máximo de integración desde el inicio (s)
+    'tolerance': 0.01,         # Probabilidad sin asignar admitida para dar por convergida la rejilla
+    'lead_time': 1.0,          # La integración empieza como pronto este tiempo antes del primer jugador
+    'max_player_speed': 12.0,  # Velocidades estimadas por encima se consideran ruido
+    'chunk': 32,               # Frames por bloque en modo batch (acota la memoria)
+}
+
+
+def pitch_control_options(config: dict) -> dict:
+    """Opciones de pitch control: DEFAULTS con lo que venga en config['pitch_control']."""
+    return {**DEFAULTS, **(config or {}).get('pitch_control', {})}
+
+
+def player_velocities(xy: np.ndarray, prev_xy: np.ndarray, dt, max_speed: float = 12.0) -> np.ndarray:
+    """
+    Velocidad (m/s) por diferencia con la posición anterior: (frames x jugadores x 2).
+    dt: segundos entre ambas posiciones (escalar o uno por frame). Sin posición anterior,
+    dt no válido o velocidades imposibles (saltos del tracking) -> 0.
+    """
+    dt = np.asarray(dt, dtype=np.float64).reshape(-1, 1, 1) if np.ndim(dt) else np.float64(dt)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        vel = (np.asarray(xy, dtype=np.float64) - prev_xy) / dt
+    speed = np.hypot(vel[..., 0], vel[..., 1])
+    bad = ~np.isfinite(speed) | (speed > max_speed)
+    vel[bad] = 0.0
+    return vel.astype(np.float32)
+
+
+def store_velocities(store, rows, max_speed: float = 12.0) -> np.ndarray:
+    """
+    Velocidades de las filas 'rows' de un FrameStore respecto a la fila anterior del archivo
+    (solo si es del mismo periodo y está a menos de 1 s).
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    prev = np.maximum(rows - 1, 0)
+    dt = store.game_time[rows] - store.game_time[prev]
+    dt[(rows == 0) | (store.period[rows] != store.period[prev]) | ~(dt > 0) | (dt > 1.0)] = np.nan
+    return player_velocities(store.xy[rows], store.xy[prev], dt, max_speed)
+
+
+class PitchControl:
+    """
+    Modelo de pitch control sobre una rejilla fija. compute() procesa un frame y
+    compute_batch() muchos (en bloques de 'chunk' frames); ambos devuelven la probabilidad de
+    control del equipo 0 por celda, (ny x nx) o (frames x ny x nx), con filas = eje y.
+    La del equipo 1 es 1 - resultado.
+    """
+
+    def __init__(self, options: dict = None):
+        self.options = {**DEFAULTS, **(options or {})}
+        o = self.options
+        nx, ny = o['grid']
+        length, width = o['pitch']
+        self.x = ((np.arange(nx) + 0.5) * length / nx - length / 2).astype(np.float32)
+        self.y = ((np.arange(ny) + 0.5) * width / ny - width / 2).astype(np.float32)
+        gx, gy = np.meshgrid(self.x, self.y)
+        self.cells = np.stack([gx.ravel(), gy.ravel()], axis=1)  # (ny*nx, 2), fila a fila
+        self.shape = (ny, nx)
+        # Pendiente de la logística de llegada
+        self._k = np.pi / np.sqrt(3.0) / o['tti_sigma']
+
+    def compute(self, xy, team, velocity=None, ball=None) -> np.ndarray:
+        """
+        xy: (jugadores x 2) en metros (NaN = no está en el campo); team: índice de equipo por
+        jugador (0/1; otro valor = se ignora); velocity: (jugadores x 2) m/s (None = parados);
+        ball: (x, y[, z]) o None (balón desconocido: sin tiempo de vuelo).
+        """
+        xy = np.asarray(xy)[None]
+        velocity = None if velocity is None else np.asarray(velocity)[None]
+        ball = None if ball is None else np.asarray(ball)[None]
+        return self.compute_batch(xy, team, velocity, ball)[0]
+
+    def compute_batch(self, xy, team, velocity=None, ball=None) -> np.ndarray:
+        """Como compute() con una dimensión inicial de frames en xy, velocity y ball."""
+        xy = np.asarray(xy, dtype=np.float32)
+        out = np.empty((len(xy),) + self.shape, dtype=np.float32)
+        chunk = max(1, int(self.options['chunk']))
+        for a in range(0, len(xy), chunk):
+            b = a + chunk
+            out[a:b] = self._integrate(
+                xy[a:b], np.asarray(team),
+                None if velocity is None else np.asarray(velocity, dtype=np.float32)[a:b],
+                None if ball is None else np.asarray(ball, dtype=np.float32)[a:b],
+            ).reshape((-1,) + self.shape)
+        return out
+
+    def compute_store(self, store, rows) -> np.ndarray:
+        """Batch directo sobre filas de un FrameStore (velocidades por diferencia con la fila anterior)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        velocity = store_velocities(store, rows, self.options['max_player_speed'])
+        ball = store.ball[rows] if store.has_ball else None
+        return self.compute_batch(store.xy[rows], store.roster.team_index, velocity, ball)
+
+    def _integrate(self, xy, team, velocity, ball) -> np.ndarray:
+        o = self.options
+        n_frames, n_players = xy.shape[:2]
+        team = np.concatenate([team, np.full(max(0, n_players - len(team)), -1)])[:n_players]
+        valid = np.isfinite(xy).all(axis=2) & ((team == 0) | (team == 1))  # (F, P)
+
+        # 1. Tiempo de intercepción (F, P, G): reacción + carrera en línea recta
+        start = xy if velocity is None else xy + velocity * o['reaction_time']
+        start = np.where(valid[..., None], start, 0.0).astype(np.float32)
+        dx = self.cells[None, None, :, 0] - start[..., 0:1]
+        dy = self.cells[None, None, :, 1] - start[..., 1:2]
+        tti = np.sqrt(dx * dx + dy * dy) / o['max_speed'] + o['reaction_time']
+        tti[~valid] = np.inf
+
+        # 2. Tiempo de vuelo del balón por celda (F, G); 0 si no hay balón
+        if ball is None:
+            t_ball = np.zeros((n_frames, len(self.cells)), dtype=np.float32)
+        else:
+            bx, by = ball[:, 0:1], ball[:, 1:2]
+            t_ball = np.hypot(self.cells[None, :, 0] - bx, self.cells[None, :, 1] - by) / o['ball_speed']
+            t_ball = np.nan_to_num(t_ball, nan=0.0).astype(np.float32)
+
+        # La integración de cada celda empieza al llegar el balón, pero no antes de 'lead_time'
+        # antes del primer jugador (hasta ahí la probabilidad de llegada es despreciable)
+        first = tti.min(axis=1)
+        t0 = np.maximum(t_ball, np.where(np.isfinite(first), first - o['lead_time'], t_ball))
+
+        # 3. e = exp(-k (t - tti)), actualizado por multiplicación en cada paso; P(llegada) = 1/(1+e)
+        e = np.exp(np.minimum(self._k * (tti - t0[:, None, :]), 80.0)).astype(np.float32)
+        decay = np.float32(np.exp(-self._k * o['dt']))
+        # Ritmo de control por equipo y jugador (2, P) -> sumas por equipo con matmul
+        rates = np.zeros((n_frames, 2, n_players), dtype=np.float32)
+        for t in (0, 1):
+            rates[:, t] = np.where(valid & (team == t), o['lambda_home' if t == 0 else 'lambda_away'], 0.0)
+
+        control = np.zeros((n_frames, 2, len(self.cells)), dtype=np.float32)
+        active = valid.any(axis=1)
+        p = np.empty_like(e)
+        for step in range(int(o['max_time'] / o['dt'])):
+            np.add(e, 1.0, out=p)
+            np.reciprocal(p, out=p)
+            free = 1.0 - control.sum(axis=1, keepdims=True)
+            control += np.matmul(rates, p) * (free * o['dt'])
+            e *= decay
+            if step % 5 == 4 and (free[active] < o['tolerance']).all():
+                break
+
+        total = control.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            home = np.where(total > 0, control[:, 0] / total, 0.5)
+        return home.astype(np.float32)
+
+
+def kmeans_1d(values: np.ndarray, centers: np.ndarray, max_iter: int = 20):
+    """
+    k-means (Lloyd) en una dimensión desde 'centers' (arranque en caliente).
+    Devuelve (centros ordenados, etiqueta de cada valor, suma de errores cuadráticos).
+    Un cluster vacío se resiembra en el valor peor explicado, así ninguna línea queda vacía.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    centers = np.sort(np.asarray(centers, dtype=np.float64))
+    k = len(centers)
+    for _ in range(max_iter):
+        dist = np.abs(values[:, None] - centers[None, :])
+        labels = dist.argmin(axis=1)
+        counts = np.bincount(labels, minlength=k)
+        if (counts == 0).any():
+            worst = dist[np.arange(len(values)), labels].argmax()
+            centers[np.flatnonzero(counts == 0)[0]] = values[worst]
+            centers.sort()
+            continue
+        new = np.bincount(labels, weights=values, minlength=k) / counts
+        new.sort()
+        if np.allclose(new, centers, atol=1e-3):
+            centers = new
+            break
+        centers = new
+    labels = np.abs(values[:, None] - centers[None, :]).argmin(axis=1)
+    return centers, labels, float(((values - centers[labels]) ** 2).sum())
+
+
+class FormationTracker:
+    """
+    Formación de los dos equipos a partir de los frames del tracking.
+
+    - update(): media móvil exponencial (vida media 'half_life' segundos) de la posición de cada
+      jugador presente, O(jugadores). Mientras un jugador tenga pocas muestras se usa su media
+      simple (peso 1/n), así el arranque no queda sesgado por el primer frame. Al cambiar de
+      periodo se reinicia (los equipos cambian de campo).
+    - Solo se reagrupa cuando algún jugador presente se ha alejado más de 'drift' metros de la
+      media usada en el último agrupamiento (o cambian los jugadores presentes).
+    - Por equipo: portero = el más retrasado; el resto se agrupa en 'lines' (3 o 4) líneas por
+      profundidad: se elige el mayor número de líneas cuyas líneas vecinas estén separadas al
+      menos 'min_gap' metros (partir una línea real da dos centros casi juntos).
+    - formations: {equipo: {'label': '4-4-2', 'lines': [[entidades ordenadas por y], ...]
+      de atrás hacia delante, 'goalkeeper': entidad}}.
+    """
+
+    def __init__(self, team_index, half_life: float = 60.0, drift: float = 1.0, lines=(3, 4),
+                 min_gap: float = 5.0, min_players: int = 7):
+        self.team = np.asarray(team_index)
+        self.half_life = half_life
+        self.drift = drift
+        self.lines = tuple(lines)
+        self.min_gap = min_gap
+        self.min_players = min_players
+        self.reclusters = 0
+        self.reset()
+
+    def reset(self):
+        n = len(self.team)
+        self.mean = np.full((n, 2), np.nan)
+        self.samples = np.zeros(n, dtype=np.int64)
+        self.present = np.zeros(n, dtype=bool)
+        self.period = None
+        self.formations = {}
+        self._anchor = np.full((n, 2), np.nan)  # Medias del último agrupamiento
+        self._anchor_present = np.zeros(n, dtype=bool)
+        self._centers = {}  # (equipo, k) -> centros de la última solución
+
+    def update(self, xy, dt: float = 0.1, period=None) -> bool:
+        """Añade un frame (entidades x 2). Devuelve True si se ha recalculado la formación."""
+        if period is not None and period != self.period:
+            if self.period is not None:
+                self.reset()
+            self.period = period
+        xy = np.asarray(xy, dtype=np.float64)[:len(self.team)]
+        self.present = np.isfinite(xy).all(axis=1)
+        alpha = 1.0 - 0.5 ** (dt / self.half_life)
+        seen = self.present
+        self.samples[seen] += 1
+        weight = np.maximum(alpha, 1.0 / self.samples[seen])[:, None]
+        self.mean[seen] = np.where(weight < 1.0, self.mean[seen] + weight * (xy[seen] - self.mean[seen]), xy[seen])
+
+        moved = np.hypot(*(self.mean[self.present] - self._anchor[self.present]).T)
+        changed = (self.present != self._anchor_present).any()
+        if not changed and len(moved) and not (moved > self.drift).any():
+            return False
+        self._recluster()
+        return True
+
+    def _recluster(self):
+        self.reclusters += 1
+        self._anchor = self.mean.copy()
+        self._anchor_present = self.present.copy()
+        means = {t: self.mean[self.present & (self.team == t), 0].mean() for t in (0, 1)
+                 if (self.present & (self.team == t)).any()}
+        for t in (0, 1):
+            players = np.flatnonzero(self.present & (self.team == t))
+            if len(players) < self.min_players:
+                self.formations.pop(t, None)
+                continue
+            # Sentido de ataque: hacia el rival (o hacia el centro si no hay datos del rival)
+            other = means.get(1 - t, 0.0)
+            depth = self.mean[players, 0] * (1.0 if means[t] < other else -1.0)
+            order = np.argsort(depth, kind='stable')
+            goalkeeper, outfield = players[order[0]], players[order[1:]]
+            self.formations[t] = self._lines(t, outfield, depth[order[1:]], goalkeeper)
+
+    def _lines(self, t: int, outfield, depth, goalkeeper) -> dict:
+        best = None
+        for k in self.lines:
+            if k > len(outfield):
+                continue
+            start = self._centers.get((t, k))
+            if start is None:
+                start = np.quantile(depth, (np.arange(k) + 0.5) / k)
+            centers, labels, _ = kmeans_1d(depth, start)
+            self._centers[(t, k)] = centers
+            if best is None or np.diff(centers).min(initial=np.inf) >= self.min_gap:
+                best = (k, labels)
+        k, labels = best
+        lines = []
+        for j in range(k):
+            members = outfield[labels == j]
+            lines.append(members[np.argsort(self.mean[members, 1], kind='stable')].tolist())
+        return {'label': "-".join(str(len(line)) for line in lines), 'lines': lines,
+                'goalkeeper': int(goalkeeper)}
+
+
+class MatchAnalytics:
+    """
+    Estado analítico de un partido en vivo: FormationTracker + KinematicsTracker, alimentados
+    con micro-batches columnares (un FrameStore por batch, con el Roster del partido).
+    Al llegar una tabla de jugadores nueva se reinicia (cambian los índices de equipo).
+    """
+
+    def __init__(self, roster, kinematics: dict = None):
+        self.roster = roster
+        self.kinematics_options = kinematics
+        self.frames = 0
+        self.events = 0
+        self.last_event = None
+        self._reset()
+
+    def _reset(self):
+        team = self.roster.team_index
+        self.formation = FormationTracker(team)
+        self.kinematics = KinematicsTracker(len(team), self.kinematics_options)
+        self._last_time = None
+
+    def set_roster(self, roster):
+        self.roster = roster
+        self._reset()
+
+    def process(self, frames, events: list):
+        n = len(self.roster)
+        xy = frames.xy[:, :n]
+        if xy.shape[1] < n:
+            xy = np.pad(xy, ((0, 0), (0, n - xy.shape[1]), (0, 0)), constant_values=np.nan)
+        for i in range(len(frames)):
+            t, period = float(frames.game_time[i]), int(frames.period[i])
+            if np.isnan(t):
+                continue
+            dt = t - self._last_time if self._last_time is not None else 0.0
+            self.formation.update(xy[i], dt if 0 < dt <= 1.0 else 0.1, period)
+            self.kinematics.update(xy[i], t, period)
+            self._last_time = t
+        self.frames += len(frames)
+        self.events += len(events)
+        if events:
+            self.last_event = events[-1]
@@ -0,0 +1,566 @@
+# TACTIX_LIVE/streaming/streaming_worker.py
+"""
+Consumidor de los topics de tracking y eventing: el lado en vivo de lo que publican el
+simulador, publisher.py y multi_runner.py.
+
+- Fuentes intercambiables (como los sinks de transports.py): Pub/Sub, broker local por
+  socket, archivo de FileSink (reproducción offline) y MemorySink (tests, en proceso).
+- Control de flujo acotado: como mucho 'max_messages' mensajes / 'max_bytes' bytes recibidos
+  sin ack. Al llegar al límite las fuentes se bloquean (backpressure hacia el broker: Pub/Sub
+  deja de entregar, el socket deja de leerse).
+- Micro-batches: el hilo de proceso agrupa hasta 'batch_size' mensajes (o lo que llegue en
+  'batch_latency' s), los decodifica por partido (atributo match_id) a un FrameStore columnar
+  por batch (los frames binarios se escriben sin dicts, ver StreamDecoder.decode_into) y se
+  los pasa a MatchAnalytics (processing_logic).
+- Ack por batch, después de procesarlo (al menos una vez); un solo release del control de flujo.
+- stop(drain=True): deja de aceptar, procesa y confirma lo que quede y después cierra las fuentes.
+- Retraso: edad del mensaje más antiguo sin procesar, recepción -> ack por stream, extremo a
+  extremo si la fuente da la hora de publicación, y 'falling_behind' cuando el retraso supera
+  'lag_warning'. collect_metrics() lo expone en formato Prometheus.
+- Cálculos pesados tras eventos clave (pitch control tras goles y tiros): cada micro-batch se
+  pasa también al JobScheduler (job_scheduler.py), que los lanza en un pool de procesos sin
+  frenar la ingesta.
+
+Uso:
+    python -m TACTIX_LIVE.streaming.streaming_worker --env dev [--metrics 127.0.0.1:9109]
+"""
+import argparse
+import collections
+import functools
+import json
+import math
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+
+import numpy as np
+
+from TACTIX_LIVE.streaming.job_scheduler import JobScheduler, job_options
+from TACTIX_LIVE.streaming.processing_logic import MatchAnalytics
+from TACTIX_LIVE.utils.config_loader import load_config
+from TACTIX_LIVE.utils.frame_store import FrameStore, Roster
+from TACTIX_LIVE.utils.match_loader import add_event_times
+from TACTIX_LIVE.utils.metrics import LatencyHistogram, MetricsServer, RateMeter, StreamMetrics, render_prometheus
+from TACTIX_LIVE.utils.transports import SocketSubscriber, read_frames
+from TACTIX_LIVE.utils.wire_format import StreamDecoder, is_binary
+
+DEFAULTS = {
+    'max_messages': 10000,     # Mensajes recibidos sin ack como máximo
+    'max_bytes': 64 << 20,     # Bytes recibidos sin ack como máximo
+    'batch_size': 500,         # Mensajes por micro-batch
+    'batch_latency': 0.05,     # Espera máxima (s) para completar un micro-batch
+    'lag_warning': 1.0,        # Retraso (s) a partir del que el worker va por detrás
+}
+DEFAULT_MATCH = "default"  # match_id de los mensajes sin ese atributo (simulador de un partido)
+
+# Significado de los contadores de StreamMetrics en el consumidor
+_HELP = {
+    'messages_sent_total': "Mensajes recibidos",
+    'messages_acked_total': "Mensajes procesados y confirmados",
+    'messages_failed_total': "Mensajes que no se pudieron decodificar o procesar",
+    'messages_dropped_total': "Mensajes descartados (deltas sin base, parada sin drenar)",
+    'backpressure_seconds_total': "Tiempo de las fuentes bloqueadas por el control de flujo",
+    'throughput_messages_per_second': "Mensajes procesados por segundo (media de 10 s)",
+    'ack_latency_seconds': "Retraso recepción -> ack",
+}
+
+
+def worker_options(config: dict = None) -> dict:
+    """DEFAULTS con lo que venga en config['worker']."""
+    return {**DEFAULTS, **(config or {}).get('worker', {})}
+
+
+class FlowController:
+    """
+    Límite de mensajes y bytes pendientes de ack. acquire() bloquea mientras no haya hueco
+    (un mensaje mayor que max_bytes pasa si no hay nada pendiente); close() desbloquea a todos.
+    """
+
+    def __init__(self, max_messages: int, max_bytes: int):
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.messages = 0
+        self.bytes = 0
+        self.closed = False
+        self._cond = threading.Condition()
+
+    def _fits(self, size: int) -> bool:
+        return self.messages < self.max_messages and (self.bytes + size <= self.max_bytes or self.bytes == 0)
+
+    def acquire(self, size: int, timeout: float = None) -> bool:
+        with self._cond:
+            if not self._fits(size):
+                ok = self._cond.wait_for(lambda: self.closed or self._fits(size), timeout)
+                if not ok or self.closed:
+                    return False
+            elif self.closed:
+                return False
+            self.messages += 1
+            self.bytes += size
+            return True
+
+    def release(self, messages: int, size: int):
+        with self._cond:
+            self.messages -= messages
+            self.bytes -= size
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class Message:
+    __slots__ = ('stream', 'data', 'attrs', 'received', 'published', 'ack', 'nack')
+
+    def __init__(self, stream: str, data: bytes, attrs: dict, ack=None, nack=None, published: float = None):
+        self.stream = stream
+        self.data = data
+        self.attrs = attrs or {}
+        self.received = time.monotonic()
+        self.published = published  # Epoch (s) de publicación si la fuente lo da
+        self.ack = ack
+        self.nack = nack
+
+
+# --- Fuentes ---
+
+class _ThreadSource:
+    """Base de las fuentes locales: un hilo lector que entrega mensajes con worker.submit()."""
+
+    def __init__(self):
+        self.finished = False  # La fuente no va a entregar más (fin de archivo, conexión cerrada)
+        self._closed = threading.Event()
+        self._thread = None
+
+    def start(self, worker):
+        self._thread = threading.Thread(target=self._run, args=(worker,), daemon=True)
+        self._thread.start()
+
+    def _run(self, worker):
+        try:
+            self.read(worker)
+        finally:
+            self.finished = True
+
+    def read(self, worker):
+        raise NotImplementedError
+
+    def close(self):
+        self._closed.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+
+
+class MemorySource(_ThreadSource):
+    """Colas de un MemorySink del mismo proceso. Un nack devuelve el mensaje a su cola."""
+
+    def __init__(self, sink, topics: dict):
+        super().__init__()
+        self.sink = sink
+        self.topics = topics  # {topic: stream}
+
+    def read(self, worker):
+        queues = {topic: self.sink.queue(topic) for topic in self.topics}
+        while not self._closed.is_set():
+            idle = True
+            for topic, q in queues.items():
+                try:
+                    data, attrs = q.get_nowait()
+                except queue.Empty:
+                    continue
+                idle = False
+                requeue = functools.partial(q.put, (data, attrs))
+                if not worker.submit(self.topics[topic], data, attrs, nack=requeue):
+                    requeue()
+                    return
+            if idle:
+                self._closed.wait(0.005)
+
+
+class SocketSource(_ThreadSource):
+    """Broker local (SocketBroker). Sin persistencia: lo que no se procese al parar se pierde."""
+
+    def __init__(self, address: str, topics: dict):
+        super().__init__()
+        self.topics = topics
+        self.subscriber = SocketSubscriber(address, list(topics))
+
+    def read(self, worker):
+        while not self._closed.is_set():
+            try:
+                message = self.subscriber.recv()
+            except (OSError, ValueError):
+                return
+            if message is None:
+                return
+            topic, data, attrs = message
+            if topic in self.topics and not worker.submit(self.topics[topic], data, attrs):
+                return
+
+    def close(self):
+        self._closed.set()
+        self.subscriber.close()
+        super().close()
+
+
+class FileSource(_ThreadSource):
+    """Reproducción offline de un archivo de FileSink, tan rápido como permita el control de flujo."""
+
+    def __init__(self, path: str, topics: dict):
+        super().__init__()
+        self.path = path
+        self.topics = topics
+
+    def read(self, worker):
+        for topic, data, attrs in read_frames(self.path):
+            if self._closed.is_set():
+                return
+            if topic in self.topics and not worker.submit(self.topics[topic], data, attrs):
+                return
+
+
+class PubSubSource:
+    """
+    Suscripciones de Google Cloud Pub/Sub (streaming pull). El cliente aplica el mismo límite
+    de mensajes/bytes; ack/nack son los del mensaje (el cliente los envía agrupados).
+    """
+
+    def __init__(self, project_id: str, subscriptions: dict, options: dict):
+        # Import diferido: el resto de fuentes funcionan sin las librerías de GCP
+        from google.cloud import pubsub_v1
+
+        self.client = pubsub_v1.SubscriberClient()
+        self.subscriptions = {self.client.subscription_path(project_id, sub): stream
+                              for sub, stream in subscriptions.items()}
+        self.flow_control = pubsub_v1.types.FlowControl(max_messages=options['max_messages'],
+                                                        max_bytes=options['max_bytes'])
+        self.finished = False
+        self._futures = []
+
+    def start(self, worker):
+        for path, stream in self.subscriptions.items():
+            callback = functools.partial(self._on_message, worker, stream)
+            self._futures.append(self.client.subscribe(path, callback=callback, flow_control=self.flow_control))
+
+    @staticmethod
+    def _on_message(worker, stream, message):
+        published = message.publish_time.timestamp() if message.publish_time else None
+        if not worker.submit(stream, message.data, dict(message.attributes), ack=message.ack, nack=message.nack,
+                             published=published):
+            message.nack()
+
+    def close(self):
+        for future in self._futures:
+            future.cancel()
+        for future in self._futures:
+            try:
+                future.result(timeout=5.0)
+            except Exception:
+                pass
+        self.client.close()
+        self.finished = True
+
+
+def create_sources(config: dict, options: dict = None, sink=None) -> list:
+    """
+    Fuentes según config['transport'] (el mismo bloque que create_sink):
+      pubsub -> suscripciones config['pubsub']['subscription_tracking' / 'subscription_eventing']
+                (por defecto '<topic>-sub')
+      socket -> broker en 'address';  file -> reproduce 'path';  memory -> necesita el MemorySink
+    """
+    pubsub = config.get('pubsub', {})
+    topics = {pubsub.get('topic_tracking', 'tracking'): 'tracking',
+              pubsub.get('topic_eventing', 'eventing'): 'eventing'}
+    transport = config.get('transport', {})
+    kind = transport.get('type', 'pubsub')
+    if kind == 'pubsub':
+        subscriptions = {pubsub.get(f'subscription_{stream}', f"{topic}-sub"): stream
+                         for topic, stream in topics.items()}
+        return [PubSubSource(config.get('gcp_project_id', ''), subscriptions, options or worker_options(config))]
+    if kind == 'socket':
+        return [SocketSource(transport.get('address', '127.0.0.1:7070'), topics)]
+    if kind == 'file':
+        return [FileSource(transport.get('path', os.path.join('data', 'stream.bin')), topics)]
+    if kind == 'memory':
+        if sink is None:
+            raise ValueError("El transporte 'memory' solo funciona en el mismo proceso: pasar el MemorySink")
+        return [MemorySource(sink, topics)]
+    raise ValueError(f"Transporte desconocido: '{kind}' (pubsub, memory, socket, file)")
+
+
+# --- Worker ---
+
+class _MatchState:
+    """Decodificador, tabla de jugadores, analítica y lo pendiente del micro-batch de un partido."""
+
+    def __init__(self, match_id: str, analytics_factory, scheduler=None):
+        self.match_id = match_id
+        self.scheduler = scheduler
+        self.roster = Roster()
+        self.decoder = StreamDecoder(self.roster)
+        self.analytics = analytics_factory(self.roster)
+        self.frames = 0
+        self.game_time = math.nan
+        self.last_seen = time.monotonic()
+        self._store = None
+        self._records = []
+        self._events = []
+
+    def add_tracking(self, data: bytes) -> bool:
+        """Frame binario, frame JSON o tabla de jugadores. False si es un delta sin base."""
+        if is_binary(data):
+            if self._store is None:
+                self._store = FrameStore(self.roster)
+            return self.decoder.decode_into(data, self._store)
+        message = json.loads(data)
+        if isinstance(message, dict) and message.get('type') == 'roster':
+            self.flush()  # Lo pendiente se procesa con la tabla anterior
+            self.roster = Roster.from_dict(message)
+            self.decoder.roster = self.roster
+            self.analytics.set_roster(self.roster)
+        else:
+            self._records.append(message)
+        return True
+
+    def add_event(self, data: bytes):
+        self._events.append(json.loads(data))
+
+    def flush(self):
+        """Pasa el micro-batch pendiente (FrameStore + eventos) a la analítica."""
+        store = self._store
+        if self._records:
+            store = store if store is not None else FrameStore(self.roster)
+            store.append(self._records)
+        events = add_event_times(self._events)  # El simulador los publica sin game_time
+        self._store, self._records, self._events = None, [], []
+        if store is None and not events:
+            return
+        store = store if store is not None else FrameStore(self.roster)
+        if len(store):
+            self.frames += len(store)
+            if not np.isnan(store.game_time).all():
+                self.game_time = float(np.nanmax(store.game_time))
+        self.analytics.process(store, events)
+        if self.scheduler is not None:
+            self.scheduler.observe(self.match_id, store, events)
+
+
+class StreamingWorker:
+    """
+    Consumidor con control de flujo y micro-batches. analytics_factory(roster) crea el estado
+    analítico de cada partido (por defecto MatchAnalytics: process(frames, events) y set_roster).
+    scheduler: JobScheduler opcional que recibe también cada micro-batch (cálculos tras eventos).
+    """
+
+    def __init__(self, options: dict = None, analytics_factory=MatchAnalytics, scheduler=None):
+        self.options = {**DEFAULTS, **(options or {})}
+        self.analytics_factory = analytics_factory
+        self.scheduler = scheduler
+        self.flow = FlowController(self.options['max_messages'], self.options['max_bytes'])
+        self.matches = {}
+        self.metrics = {'tracking': StreamMetrics(), 'eventing': StreamMetrics()}
+        self.end_to_end = LatencyHistogram()  # Publicación -> ack (solo fuentes con hora de publicación)
+        self.batch_time = LatencyHistogram()  # Tiempo de proceso de cada micro-batch
+        self.arrivals = RateMeter()
+        self.batches = 0
+        self.errors = 0
+        self.sources = []
+        self._inbox = collections.deque()
+        self._cond = threading.Condition()
+        self._accepting = True
+        self._stopping = False
+        self._thread = None
+
+    # --- Entrada (hilos de las fuentes) ---
+    def submit(self, stream: str, data: bytes, attrs: dict = None, ack=None, nack=None,
+               published: float = None) -> bool:
+        """
+        Entrega un mensaje al worker; bloquea mientras el control de flujo esté lleno.
+        False si el worker ya no acepta mensajes (la fuente debe devolverlo o descartarlo).
+        """
+        start = time.monotonic()
+        while self._accepting:
+            if self.flow.acquire(len(data), timeout=0.5):
+                break
+        else:
+            return False
+        if not self._accepting:
+            self.flow.release(1, len(data))
+            return False
+        message = Message(stream, data, attrs, ack, nack, published)
+        with self._cond:
+            self._inbox.append(message)
+            self.metrics[stream].sent += 1
+            self.metrics[stream].blocked_ms += (message.received - start) * 1000
+            self._cond.notify()
+        self.arrivals.add()
+        return True
+
+    # --- Ciclo de vida ---
+    def start(self, sources=()) -> "StreamingWorker":
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        for source in sources:
+            source.start(self)
+            self.sources.append(source)
+        return self
+
+    def stop(self, drain: bool = True, timeout: float = 10.0):
+        """
+        Deja de aceptar mensajes; con drain procesa y confirma lo que ya estaba recibido y sin
+        drain lo devuelve (nack) para que el broker lo reentregue. Las fuentes se cierran al
+        final: los acks del drenaje tienen que salir por el cliente abierto (Pub/Sub).
+        """
+        self._accepting = False
+        self.flow.close()  # Las fuentes bloqueadas en submit() salen y devuelven su mensaje
+        if not drain:
+            with self._cond:
+                pending = list(self._inbox)
+                self._inbox.clear()
+            for message in pending:
+                if message.nack is not None:
+                    message.nack()
+                self.metrics[message.stream].dropped += 1
+            self.flow.release(len(pending), sum(len(m.data) for m in pending))
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        for source in self.sources:
+            source.close()
+
+    @property
+    def idle(self) -> bool:
+        """Sin mensajes pendientes y con todas las fuentes terminadas (p.ej. fin del archivo)."""
+        return all(s.finished for s in self.sources) and self.flow.messages == 0
+
+    # --- Proceso ---
+    def _next_batch(self) -> list | None:
+        size, latency = self.options['batch_size'], self.options['batch_latency']
+        with self._cond:
+            self._cond.wait_for(lambda: self._inbox or self._stopping)
+            if not self._inbox:
+                return None  # Parado y sin nada pendiente
+            if len(self._inbox) < size and not self._stopping:
+                self._cond.wait_for(lambda: len(self._inbox) >= size or self._stopping, latency)
+            n = min(size, len(self._inbox))
+            return [self._inbox.popleft() for _ in range(n)]
+
+    def _loop(self):
+        while (batch := self._next_batch()) is not None:
+            self._process(batch)
+
+    def _state(self, match_id: str) -> _MatchState:
+        state = self.matches.get(match_id)
+        if state is None:
+            state = self.matches[match_id] = _MatchState(match_id, self.analytics_factory, self.scheduler)
+        return state
+
+    def _process(self, batch: list):
+        start = time.monotonic()
+        touched = {}
+        for message in batch:
+            state = self._state(message.attrs.get('match_id', DEFAULT_MATCH))
+            touched[state.match_id] = state
+            try:
+                if message.stream == 'tracking':
+                    if not state.add_tracking(message.data):
+                        self.metrics['tracking'].dropped += 1
+                else:
+                    state.add_event(message.data)
+            except (ValueError, KeyError, TypeError):
+                self.metrics[message.stream].failed += 1
+        for state in touched.values():
+            state.last_seen = start
+            try:
+                state.flush()
+            except Exception as e:
+                # Un error de la analítica no debe tumbar el consumo ni reentregar el batch sin fin
+                self.errors += 1
+                print(f"⚠️ Error procesando el partido {state.match_id}: {e}", file=sys.stderr)
+
+        # Ack del batch completo y un solo release del control de flujo
+        for message in batch:
+            if message.ack is not None:
+                message.ack()
+        self.flow.release(len(batch), sum(len(m.data) for m in batch))
+        now, wall = time.monotonic(), time.time()
+        for message in batch:
+            self.metrics[message.stream].ack((now - message.received) * 1000)
+            if message.published is not None:
+                self.end_to_end.observe(max(0.0, wall - message.published) * 1000)
+        self.batch_time.observe((now - start) * 1000)
+        self.batches += 1
+
+    # --- Retraso y métricas ---
+    def lag(self) -> float:
+        """Segundos que lleva esperando el mensaje más antiguo sin procesar."""
+        with self._cond:
+            oldest = self._inbox[0].received if self._inbox else None
+        return 0.0 if oldest is None else time.monotonic() - oldest
+
+    def summary(self) -> list:
+        now = time.monotonic()
+        return [{'match_id': s.match_id, 'frames': s.frames, 'events': s.analytics.events,
+                 'game_time': s.game_time, 'idle_s': round(now - s.last_seen, 1)} for s in self.matches.values()]
+
+    def collect_metrics(self) -> str:
+        lag = self.lag()
+        gauges = {
+            'inbox_messages': ("Mensajes recibidos pendientes de procesar", len(self._inbox)),
+            'outstanding_messages': ("Mensajes recibidos sin ack", self.flow.messages),
+            'outstanding_bytes': ("Bytes recibidos sin ack", self.flow.bytes),
+            'lag_seconds': ("Edad del mensaje más antiguo sin procesar", lag),
+            'falling_behind': ("1 si el retraso supera lag_warning", int(lag > self.options['lag_warning'])),
+            'arrival_messages_per_second': ("Mensajes recibidos por segundo (media de 10 s)", self.arrivals.rate()),
+            'batch_p99_seconds': ("p99 del tiempo de proceso de un micro-batch", self.batch_time.percentile(99) / 1000),
+            'end_to_end_p99_seconds': ("p99 publicación -> ack", self.end_to_end.percentile(99) / 1000),
+            'matches_active': ("Partidos con mensajes en los últimos 10 s",
+                               sum(1 for s in self.matches.values() if time.monotonic() - s.last_seen < 10)),
+            'processing_errors_total': ("Errores de la analítica", self.errors),
+        }
+        if self.scheduler is not None:
+            gauges.update(self.scheduler.gauges())
+        return render_prometheus(self.metrics, gauges, prefix="tactix_worker", help_texts=_HELP)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Consumidor en vivo de tracking y eventing")
+    parser.add_argument('--env', default=os.environ.get("APP_ENV", "dev"))
+    parser.add_argument('--metrics', metavar='HOST:PORT', help="endpoint Prometheus local (p.ej. 127.0.0.1:9109)")
+    args = parser.parse_args(argv)
+
+    config = load_config(args.env)
+    options = worker_options(config)
+    scheduler = JobScheduler(job_options(config), job_params=config.get('pitch_control'))
+    worker = StreamingWorker(options, scheduler=scheduler).start(create_sources(config, options))
+    server = MetricsServer(worker.collect_metrics, args.metrics).start() if args.metrics else None
+    if server:
+        print(f"📈 Métricas en http://{server.address}/metrics")
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    print("👂 Consumiendo tracking y eventing (Ctrl+C para parar)...")
+    try:
+        while not stop.wait(1.0) and not worker.idle:
+            pass
+    except KeyboardInterrupt:
+        pass
+    print("\n🛑 Drenando mensajes pendientes...")
+    worker.stop(drain=True)
+    scheduler.close()
+    if server:
+        server.close()
+    for row in worker.summary():
+        print("   " + " | ".join(f"{k}={v}" for k, v in row.items()))
+    print("   trabajos: " + " | ".join(f"{k}={v}" for k, v in scheduler.counts.items() if v))
+
+
+if __name__ == "__main__":
+    main()
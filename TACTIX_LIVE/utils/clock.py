@@ -0,0 +1,159 @@
+# TACTIX_LIVE/utils/clock.py
+import math
+import time
+from collections import deque
+
+import numpy as np
+
+
+class JitterStats:
+    """
+    Retraso (lateness) de cada frame respecto a su deadline: media, desviación (jitter),
+    máximo, frames fuera de presupuesto y percentiles sobre una ventana reciente.
+    """
+
+    def __init__(self, budget: float = 0.04, window: int = 2048):
+        self.budget = budget
+        self.window = deque(maxlen=window)
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.late = 0
+        self.max = 0.0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.window.clear()
+
+    def add(self, lateness: float):
+        # Welford: media y varianza incrementales sin guardar la serie completa
+        self.count += 1
+        d = lateness - self._mean
+        self._mean += d / self.count
+        self._m2 += d * (lateness - self._mean)
+        self.max = max(self.max, lateness)
+        if lateness > self.budget:
+            self.late += 1
+        self.window.append(lateness)
+
+    @property
+    def mean(self) -> float:
+        return self._mean
+
+    @property
+    def jitter(self) -> float:
+        return math.sqrt(self._m2 / self.count) if self.count > 1 else 0.0
+
+    def summary(self) -> dict:
+        """Resumen en milisegundos para la UI y los logs."""
+        recent = np.array(list(self.window) or [0.0], dtype=np.float64)
+        p50, p95, p99 = np.percentile(recent, [50, 95, 99]) * 1000
+        return {
+            'frames': self.count,
+            'mean_ms': self._mean * 1000,
+            'jitter_ms': self.jitter * 1000,
+            'p50_ms': p50,
+            'p95_ms': p95,
+            'p99_ms': p99,
+            'max_ms': self.max * 1000,
+            'late_frames': self.late,
+        }
+
+
+class MasterClock:
+    """
+    Reloj maestro basado en deadlines absolutos de time.monotonic().
+
+    Cada frame avanza una línea de tiempo virtual (segundos de partido) y su deadline se
+    calcula desde el ancla: ancla_real + tiempo_virtual / velocidad. El coste de serializar y
+    publicar no se acumula como deriva: si un frame sale tarde, el siguiente espera menos.
+
+    - speed=math.inf: modo "máximo throughput" (sin esperas).
+    - max_lag: si el retraso supera este umbral (pausa, GC, máquina saturada) se re-ancla en
+      lugar de emitir una ráfaga para recuperar; se cuenta en 'resyncs'.
+    - spin: los últimos segundos antes del deadline se esperan activamente (menos jitter que
+      time.sleep, que suele despertar tarde).
+    """
+
+    def __init__(self, speed: float = 1.0, max_lag: float = 1.0, spin: float = 0.0005,
+                 budget: float = 0.04, clock=time.monotonic, sleep=time.sleep):
+        self.speed = speed
+        self._requested_speed = speed
+        self.max_lag = max_lag
+        self.spin = spin
+        self.stats = JitterStats(budget)
+        self.resyncs = 0
+        self._clock = clock
+        self._sleep = sleep
+        self.reset()
+
+    def reset(self):
+        """Nuevo ancla en el próximo frame (inicio o reanudación del stream)."""
+        self._anchor_wall = None
+        self._media = 0.0
+        self.stats.reset()
+        self.resyncs = 0
+
+    @property
+    def max_throughput(self) -> bool:
+        return math.isinf(self.speed)
+
+    def set_speed(self, speed: float):
+        """
+        Pide un cambio de velocidad (seguro desde otro hilo, p.ej. la UI). Se aplica en el
+        siguiente advance() re-anclando en la posición virtual actual, sin saltos.
+        """
+        self._requested_speed = speed
+
+    def reanchor(self):
+        """Re-ancla en el próximo frame sin borrar estadísticas (p.ej. tras un salto/seek)."""
+        self._anchor_wall = None
+
+    def _rebase(self, now: float):
+        self._anchor_wall = now
+        self._anchor_media = self._media
+
+    def deadline(self) -> float:
+        """Instante (monotonic) en el que debe salir el frame actual."""
+        if self.max_throughput:
+            return self._anchor_wall
+        return self._anchor_wall + (self._media - self._anchor_media) / self.speed
+
+    def advance(self, step: float) -> float:
+        """Avanza la línea de tiempo virtual 'step' segundos de partido y devuelve el deadline."""
+        if self._anchor_wall is None or self._requested_speed != self.speed:
+            self.speed = self._requested_speed
+            self._rebase(self._clock())
+        self._media += max(step, 0.0)
+        if self.max_throughput:
+            self._rebase(self._clock())
+        return self.deadline()
+
+    def wait(self, deadline: float) -> float:
+        """Espera hasta el deadline y registra el retraso real. Devuelve el retraso (s)."""
+        now = self._clock()
+        remaining = deadline - now
+        if remaining > self.spin:
+            self._sleep(remaining - self.spin)
+        now = self._clock()
+        while now < deadline:
+            now = self._clock()
+        return self.observe(deadline, now)
+
+    def observe(self, deadline: float, now: float = None) -> float:
+        """
+        Registra que el frame con ese deadline salió en 'now' (sin esperar). Lo usa wait() y
+        también un planificador externo que espera por su cuenta (p.ej. un event loop asyncio).
+        """
+        now = self._clock() if now is None else now
+        lateness = now - deadline
+        if lateness > self.max_lag:
+            self.resyncs += 1
+            self._rebase(now)
+        if not self.max_throughput:
+            self.stats.add(lateness)
+        return lateness
+
+    def tick(self, step: float) -> float:
+        """advance + wait: avanza 'step' segundos de partido y espera a su deadline."""
+        return self.wait(self.advance(step))
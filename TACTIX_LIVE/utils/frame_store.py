@@ -0,0 +1,436 @@
+# TACTIX_LIVE/utils/frame_store.py
+import json
+
+import numpy as np
+import pandas as pd
+
+from TACTIX_LIVE.utils.time_utils import times_to_seconds
+
+# Claves del frame que se guardan en columnas propias (el resto va a 'extras')
+_CORE_KEYS = {'frame', 'timestamp', 'period', 'player_data', 'ball_data', 'game_time', 'converted_time'}
+
+
+class Roster:
+    """
+    Tablas de metadatos de jugadores y equipos. Cada jugador es una entidad con un índice
+    entero estable, que es el que usan las columnas del FrameStore.
+    """
+
+    def __init__(self):
+        self.player_ids = []
+        self.player_names = []
+        self.player_team = []  # Índice en team_ids (-1 si el jugador no está en el archivo de IDs)
+        self.team_ids = []
+        self.team_names = []
+        self._index = {}
+        self._meta = []
+
+    def __len__(self):
+        return len(self.player_ids)
+
+    @classmethod
+    def from_ids_file(cls, path: str) -> "Roster":
+        """Carga ids_tracking.json (objeto de equipos o lista) con codificación UTF-8."""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        roster = cls()
+        iterator = data.values() if isinstance(data, dict) else data
+        for team in iterator:
+            if not isinstance(team, dict):
+                continue
+            t_idx = roster.add_team(team.get('team_id') or team.get('id'), team.get('team_name') or team.get('name'))
+            for p in team.get('players', []):
+                pid = p.get('player_id') or p.get('id')
+                if pid:
+                    name = p.get('player_name') or p.get('name') or p.get('nickname')
+                    roster.add_player(pid, t_idx, name)
+        return roster
+
+    def add_team(self, team_id, team_name) -> int:
+        self.team_ids.append(team_id)
+        self.team_names.append(team_name)
+        return len(self.team_ids) - 1
+
+    def add_player(self, player_id, team_idx: int = -1, name=None) -> int:
+        """Registra un jugador (idempotente) y devuelve su índice de entidad."""
+        idx = self._index.get(player_id)
+        if idx is not None:
+            return idx
+        idx = len(self.player_ids)
+        self._index[player_id] = idx
+        self.player_ids.append(player_id)
+        self.player_names.append(name)
+        self.player_team.append(team_idx)
+        if team_idx >= 0:
+            self._meta.append({'team_id': self.team_ids[team_idx], 'team_name': self.team_names[team_idx],
+                               'player_name': name})
+        else:
+            self._meta.append({})
+        return idx
+
+    def index_of(self, player_id) -> int | None:
+        return self._index.get(player_id)
+
+    def player_meta(self, idx: int) -> dict:
+        """Metadatos de enriquecimiento (equipo y nombre); vacío para jugadores desconocidos."""
+        return self._meta[idx]
+
+    def enrich(self, players: list) -> list:
+        """
+        Lado consumidor: añade team_id/team_name/player_name a los jugadores de un frame publicado
+        sin metadatos (se resuelven por player_id con la tabla recibida una vez). Modifica la lista.
+        """
+        for p in players:
+            idx = self._index.get(p.get('player_id'))
+            if idx is not None:
+                p.update(self._meta[idx])
+        return players
+
+    @property
+    def team_index(self) -> np.ndarray:
+        """Índice de equipo por entidad como array (para cálculos vectorizados)."""
+        return np.asarray(self.player_team, dtype=np.int16)
+
+    def to_dict(self) -> dict:
+        """Forma serializable (JSON) del roster, en orden de entidad."""
+        return {
+            'teams': [{'team_id': t_id, 'team_name': t_name} for t_id, t_name in zip(self.team_ids, self.team_names)],
+            'players': [{'player_id': pid, 'player_name': name, 'team': team}
+                        for pid, name, team in zip(self.player_ids, self.player_names, self.player_team)],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Roster":
+        roster = cls()
+        for team in data.get('teams', []):
+            roster.add_team(team.get('team_id'), team.get('team_name'))
+        for p in data.get('players', []):
+            roster.add_player(p.get('player_id'), p.get('team', -1), p.get('player_name'))
+        return roster
+
+
+class FrameStore:
+    """
+    Partido completo en arrays contiguos de NumPy (una fila por frame, en el orden del archivo).
+
+    - frame, period, game_time (NaN si el timestamp es nulo) y timestamp (texto original)
+    - xy: (frames x entidades x 2) float32, NaN si el jugador no aparece en el frame
+    - detected: (frames x entidades) int8 -> 1/0 según 'is_detected', -1 si no se informó
+    - imputed: (frames x entidades) bool, posición interpolada en el preprocesado (no observada)
+    - ball: (frames x 3) float32 y ball_detected (int8, mismo criterio)
+    - extras: resto de claves del frame (possession, ...) como texto JSON compacto
+    Los metadatos de jugador/equipo viven una sola vez en el Roster.
+    """
+
+    def __init__(self, roster: Roster = None):
+        self.roster = roster if roster is not None else Roster()
+        self.has_ball = False
+        self._n = 0
+        self._cap = 0
+        self._n_ent = 0
+        self._frame = np.empty(0, dtype=np.int64)
+        self._period = np.empty(0, dtype=np.int16)
+        self._game_time = np.empty(0, dtype=np.float64)
+        self._timestamp = np.empty(0, dtype=object)
+        self._xy = np.empty((0, 0, 2), dtype=np.float32)
+        self._detected = np.empty((0, 0), dtype=np.int8)
+        self._imputed = np.empty((0, 0), dtype=bool)
+        self._ball = np.empty((0, 3), dtype=np.float32)
+        self._ball_detected = np.empty(0, dtype=np.int8)
+        self._extras = np.empty(0, dtype=object)
+
+    def __len__(self):
+        return self._n
+
+    # --- Vistas de solo lectura sobre la parte ocupada ---
+    @property
+    def frame(self):
+        return self._frame[:self._n]
+
+    @property
+    def period(self):
+        return self._period[:self._n]
+
+    @property
+    def game_time(self):
+        return self._game_time[:self._n]
+
+    @property
+    def timestamp(self):
+        return self._timestamp[:self._n]
+
+    @property
+    def xy(self):
+        return self._xy[:self._n, :self._n_ent]
+
+    @property
+    def detected(self):
+        return self._detected[:self._n, :self._n_ent]
+
+    @property
+    def imputed(self):
+        return self._imputed[:self._n, :self._n_ent]
+
+    @property
+    def ball(self):
+        return self._ball[:self._n]
+
+    @property
+    def ball_detected(self):
+        return self._ball_detected[:self._n]
+
+    @property
+    def extras(self):
+        return self._extras[:self._n]
+
+    @property
+    def nbytes(self) -> int:
+        """Memoria aproximada de las columnas (sin contar los strings de timestamp/extras)."""
+        arrays = (self.frame, self.period, self.game_time, self.timestamp, self.xy, self.detected,
+                  self.imputed, self.ball, self.ball_detected, self.extras)
+        return int(sum(a.nbytes for a in arrays))
+
+    # --- Serialización (caché en disco) ---
+    _ARRAY_COLUMNS = ('frame', 'period', 'game_time', 'xy', 'detected', 'imputed', 'ball', 'ball_detected')
+    _TEXT_COLUMNS = ('timestamp', 'extras')
+
+    def to_arrays(self) -> dict:
+        """
+        Columnas como arrays sin objetos Python (aptos para np.savez sin pickle).
+        Los textos se guardan como str + máscara de nulos (o JSON si no son todos str).
+        """
+        arrays = {name: getattr(self, name) for name in self._ARRAY_COLUMNS}
+        arrays['has_ball'] = np.array(self.has_ball)
+        for name in self._TEXT_COLUMNS:
+            values = getattr(self, name)
+            nulls = np.array([v is None for v in values], dtype=bool)
+            if all(isinstance(v, str) for v in values[~nulls]):
+                arrays[name] = np.where(nulls, '', values).astype(str)
+            else:
+                arrays[name + '_json'] = np.array([json.dumps(v) for v in values], dtype=str)
+            arrays[name + '_null'] = nulls
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, roster: Roster) -> "FrameStore":
+        """Inversa de to_arrays (acepta un dict o el NpzFile de np.load)."""
+        store = cls(roster)
+        store._frame = np.asarray(arrays['frame'])
+        store._period = np.asarray(arrays['period'])
+        store._game_time = np.asarray(arrays['game_time'])
+        store._xy = np.asarray(arrays['xy'])
+        store._detected = np.asarray(arrays['detected'])
+        store._imputed = np.asarray(arrays['imputed'])
+        store._ball = np.asarray(arrays['ball'])
+        store._ball_detected = np.asarray(arrays['ball_detected'])
+        store.has_ball = bool(arrays['has_ball'])
+        for name in cls._TEXT_COLUMNS:
+            nulls = np.asarray(arrays[name + '_null'])
+            if name in arrays:
+                values = np.asarray(arrays[name]).astype(object)
+            else:
+                values = np.array([json.loads(v) for v in arrays[name + '_json']] + [None], dtype=object)[:-1]
+            values[nulls] = None
+            setattr(store, '_' + name, values)
+        store._n = store._cap = len(store._frame)
+        store._n_ent = store._xy.shape[1]
+        return store
+
+    # --- Construcción ---
+    def _reserve(self, n_frames: int, n_entities: int):
+        """Amplía la capacidad (crecimiento geométrico) conservando los datos existentes."""
+        if n_frames <= self._cap and n_entities <= self._xy.shape[1]:
+            return
+        cap = max(n_frames, self._cap * 2 if n_frames > self._cap else self._cap)
+        ent = max(n_entities, self._xy.shape[1])
+
+        def grow(old, shape, fill):
+            new = np.full(shape, fill, dtype=old.dtype)
+            new[tuple(slice(0, s) for s in old.shape)] = old
+            return new
+
+        self._frame = grow(self._frame, (cap,), -1)
+        self._period = grow(self._period, (cap,), 1)
+        self._game_time = grow(self._game_time, (cap,), np.nan)
+        self._timestamp = grow(self._timestamp, (cap,), None)
+        self._xy = grow(self._xy, (cap, ent, 2), np.nan)
+        self._detected = grow(self._detected, (cap, ent), -1)
+        self._imputed = grow(self._imputed, (cap, ent), False)
+        self._ball = grow(self._ball, (cap, 3), np.nan)
+        self._ball_detected = grow(self._ball_detected, (cap,), -1)
+        self._extras = grow(self._extras, (cap,), None)
+        self._cap = cap
+
+    def append(self, records: list):
+        """Añade un bloque de frames (dicts tal cual vienen del JSONL) al final del store."""
+        if not records:
+            return
+        start, n_new = self._n, len(records)
+
+        frames = pd.to_numeric(pd.Series([r.get('frame') for r in records], dtype=object), errors='coerce')
+        periods = pd.to_numeric(pd.Series([r.get('period') for r in records], dtype=object), errors='coerce')
+        timestamps = np.array([r.get('timestamp') for r in records], dtype=object)
+
+        # Jugadores aplanados: (fila, player_id, x, y, is_detected)
+        flat = [(i, p.get('player_id'), p.get('x'), p.get('y'), p.get('is_detected'))
+                for i, r in enumerate(records) if isinstance(r.get('player_data'), list)
+                for p in r['player_data'] if isinstance(p, dict) and p.get('player_id') is not None]
+        if flat:
+            rows, pids, xs, ys, dets = zip(*flat)
+            codes, uniques = pd.factorize(np.array(pids, dtype=object))
+            ent_of_code = np.array([self.roster.add_player(u) for u in uniques], dtype=np.intp)
+            ents = ent_of_code[codes]
+        n_ent = max(self._n_ent, len(self.roster))
+
+        self._reserve(start + n_new, n_ent)
+        stop = start + n_new
+        self._frame[start:stop] = frames.fillna(-1).to_numpy(dtype=np.int64)
+        self._period[start:stop] = periods.fillna(1).to_numpy(dtype=np.int16)
+        self._game_time[start:stop] = times_to_seconds(timestamps)
+        self._timestamp[start:stop] = timestamps
+
+        if flat:
+            rows = np.asarray(rows, dtype=np.intp) + start
+            self._xy[rows, ents, 0] = np.array(xs, dtype=np.float32)
+            self._xy[rows, ents, 1] = np.array(ys, dtype=np.float32)
+            self._detected[rows, ents] = _flags(dets)
+
+        balls = [r.get('ball_data') for r in records]
+        if any(isinstance(b, dict) for b in balls):
+            self.has_ball = True
+            balls = [b if isinstance(b, dict) else {} for b in balls]
+            self._ball[start:stop] = np.array([(b.get('x'), b.get('y'), b.get('z')) for b in balls], dtype=np.float32)
+            self._ball_detected[start:stop] = _flags([b.get('is_detected') for b in balls])
+
+        extras = [{k: v for k, v in r.items() if k not in _CORE_KEYS} for r in records]
+        self._extras[start:stop] = [json.dumps(e, separators=(',', ':')) if e else None for e in extras]
+
+        self._n_ent = n_ent
+        self._n = stop
+
+    def append_rows(self, src: "FrameStore", rows, xy=None, detected=None, imputed=None):
+        """
+        Copia las filas 'rows' de otro store (mismo Roster) al final de este. xy/detected/imputed
+        permiten sustituir las columnas de jugadores (p.ej. con huecos ya interpolados).
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        if len(rows) == 0:
+            return
+        start, stop = self._n, self._n + len(rows)
+        n_ent = max(self._n_ent, src._n_ent)
+        self._reserve(stop, n_ent)
+        self._frame[start:stop] = src.frame[rows]
+        self._period[start:stop] = src.period[rows]
+        self._game_time[start:stop] = src.game_time[rows]
+        self._timestamp[start:stop] = src.timestamp[rows]
+        self._extras[start:stop] = src.extras[rows]
+        self._ball[start:stop] = src.ball[rows]
+        self._ball_detected[start:stop] = src.ball_detected[rows]
+        ent = src._n_ent
+        self._xy[start:stop, :ent] = src.xy[rows] if xy is None else xy
+        self._detected[start:stop, :ent] = src.detected[rows] if detected is None else detected
+        self._imputed[start:stop, :ent] = src.imputed[rows] if imputed is None else imputed
+        self.has_ball = self.has_ball or src.has_ball
+        self._n_ent = n_ent
+        self._n = stop
+
+    def append_frame(self, frame: int, period: int, game_time: float, timestamp, ents, xy, detected,
+                     imputed=None, ball=None, ball_detected: int = -1, extras: str = None):
+        """
+        Añade un frame ya en forma de arrays (p.ej. decodificado del formato binario), sin pasar
+        por dicts: ents = índices de entidad presentes, xy (n x 2), detected (n,) en 1/0/-1.
+        Entidades fuera del Roster (llegadas antes de su tabla) amplían las columnas.
+        """
+        ents = np.asarray(ents, dtype=np.intp)
+        row = self._n
+        n_ent = max(self._n_ent, len(self.roster), int(ents.max()) + 1 if len(ents) else 0)
+        self._reserve(row + 1, n_ent)
+        self._frame[row] = frame
+        self._period[row] = period
+        self._game_time[row] = np.nan if game_time is None else game_time
+        self._timestamp[row] = timestamp
+        self._xy[row, ents] = xy
+        self._detected[row, ents] = detected
+        if imputed is not None:
+            self._imputed[row, ents] = imputed
+        if ball is not None:
+            self.has_ball = True
+            self._ball[row] = ball
+            self._ball_detected[row] = ball_detected
+        self._extras[row] = extras
+        self._n_ent = n_ent
+        self._n = row + 1
+
+    # --- Lectura ---
+    def record(self, idx: int, enrich: bool = True) -> dict:
+        """
+        Reconstruye el frame idx con la forma del JSONL original (lo que se publica).
+        Si enrich=True añade team_id/team_name/player_name desde el Roster. Lo que se publica va
+        con enrich=False: los metadatos viajan una sola vez en la tabla del Roster.
+        """
+        payload = {
+            'frame': int(self._frame[idx]),
+            'timestamp': self._timestamp[idx],
+            'period': int(self._period[idx]),
+        }
+        if self._extras[idx] is not None:
+            payload.update(json.loads(self._extras[idx]))
+        if self.has_ball:
+            x, y, z = (None if np.isnan(v) else round(float(v), 3) for v in self._ball[idx])
+            payload['ball_data'] = {'x': x, 'y': y, 'z': z, 'is_detected': _flag_value(self._ball_detected[idx])}
+
+        xy = self._xy[idx, :self._n_ent]
+        present = np.flatnonzero(~np.isnan(xy[:, 0]))
+        coords = xy[present].astype(np.float64).round(3).tolist()
+        dets = self._detected[idx, present].tolist()
+        imputed = self._imputed[idx, present].tolist()
+        players = []
+        for ent, (x, y), det, imp in zip(present.tolist(), coords, dets, imputed):
+            p = {'x': x, 'y': y, 'player_id': self.roster.player_ids[ent]}
+            if det >= 0:
+                p['is_detected'] = bool(det)
+            if imp:
+                p['imputed'] = True
+            if enrich:
+                p.update(self.roster.player_meta(ent))
+            players.append(p)
+        payload['player_data'] = players
+        return payload
+
+
+def _flags(values) -> np.ndarray:
+    """True/False/None -> 1/0/-1 (int8)."""
+    arr = np.array(values, dtype=object)
+    return np.where(arr == True, 1, np.where(arr == False, 0, -1)).astype(np.int8)  # noqa: E712
+
+
+def _flag_value(flag):
+    return None if flag < 0 else bool(flag)
+
+
+def iter_jsonl_chunks(path: str, chunk_size: int = 5000, first_chunk_size: int = None):
+    """
+    Generador que lee un JSONL por bloques de chunk_size registros (memoria acotada durante la
+    carga). first_chunk_size permite un primer bloque más pequeño para arrancar antes.
+    """
+    chunk = []
+    limit = first_chunk_size or chunk_size
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            chunk.append(json.loads(line))
+            if len(chunk) >= limit:
+                yield chunk
+                chunk = []
+                limit = chunk_size
+    if chunk:
+        yield chunk
+
+
+def load_tracking(path: str, roster: Roster = None, chunk_size: int = 5000) -> FrameStore:
+    """Carga un tracking JSONL completo en un FrameStore, bloque a bloque."""
+    store = FrameStore(roster)
+    for chunk in iter_jsonl_chunks(path, chunk_size):
+        store.append(chunk)
+    return store
@@ -0,0 +1,209 @@
+# TACTIX_LIVE/utils/line_index.py
+"""
+Acceso aleatorio a archivos de líneas (JSONL de tracking, CSV de eventing) sin cargarlos:
+
+- LineIndex: offsets en bytes de inicio/fin de cada línea no vacía (y, para JSONL, el número
+  de 'frame' de cada línea). Se construye una vez con NumPy sobre el archivo mapeado en
+  memoria y se guarda junto a él (<archivo>.idx.npz); se reconstruye solo si cambian
+  tamaño o mtime.
+- JsonlReader / CsvPager: leen rangos de filas con mmap (el SO solo trae las páginas
+  tocadas), así que abrir un archivo de varios GB cuesta lo mismo que uno pequeño.
+"""
+import io
+import json
+import mmap
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from TACTIX_LIVE.utils.match_loader import sniff_delimiter
+
+INDEX_SUFFIX = ".idx.npz"
+INDEX_VERSION = 1
+SCAN_BLOCK = 64 << 20  # Bytes por bloque al buscar saltos de línea
+_FRAME_RE = re.compile(rb'"frame"\s*:\s*(-?\d+)')
+# Tabla byte -> es espacio (los mismos que bytes.strip())
+_WHITESPACE = np.zeros(256, dtype=bool)
+_WHITESPACE[list(b" \t\n\r\x0b\x0c")] = True
+
+
+def _open_map(path: str):
+    """(archivo, mmap) de solo lectura; mmap None si el archivo está vacío."""
+    f = open(path, 'rb')
+    if os.fstat(f.fileno()).st_size == 0:
+        return f, None
+    return f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class LineIndex:
+    """
+    starts/ends: posición de inicio y fin (sin el salto de línea) de cada línea con contenido.
+    frames: número de frame de cada línea JSONL (-1 si no tiene), para saltar por frame.
+    """
+
+    def __init__(self, starts, ends, frames=None, size: int = 0, mtime_ns: int = 0):
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        self.frames = np.asarray(frames if frames is not None else np.full(len(self.starts), -1), dtype=np.int64)
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self._frame_order = None
+
+    def __len__(self):
+        return len(self.starts)
+
+    @classmethod
+    def build(cls, path: str, frames: bool = False) -> "LineIndex":
+        st = os.stat(path)
+        f, mm = _open_map(path)
+        data = None
+        try:
+            if mm is None:
+                return cls([], [], None, st.st_size, st.st_mtime_ns)
+            data = np.frombuffer(mm, dtype=np.uint8)
+            newlines = np.concatenate([np.flatnonzero(data[pos:pos + SCAN_BLOCK] == 10) + pos
+                                       for pos in range(0, len(data), SCAN_BLOCK)])
+            starts = np.concatenate(([0], newlines + 1))
+            ends = np.concatenate((newlines, [len(data)]))
+            # Quitar '\r' final (CRLF) y líneas vacías o solo con espacios
+            crlf = np.flatnonzero(ends > starts)
+            crlf = crlf[data[ends[crlf] - 1] == 13]
+            ends[crlf] -= 1
+            keep = ends > starts
+            # Solo puede ser una línea en blanco si empieza y acaba en espacio (casi nunca en
+            # JSONL/CSV): esas se comprueban una a una; las cortas con strip() y el resto con NumPy
+            candidates = np.flatnonzero(keep)
+            candidates = candidates[_WHITESPACE[data[starts[candidates]]] & _WHITESPACE[data[ends[candidates] - 1]]]
+            for i in candidates:
+                if ends[i] - starts[i] <= 64:
+                    keep[i] = bool(mm[starts[i]:ends[i]].strip())
+                else:
+                    keep[i] = not _WHITESPACE[data[starts[i]:ends[i]]].all()
+            starts, ends = starts[keep], ends[keep]
+
+            line_frames = None
+            if frames:
+                # Primer "frame": N de cada línea (regex en C sobre el mmap, sin parsear JSON)
+                found = [(m.start(), int(m.group(1))) for m in _FRAME_RE.finditer(mm)]
+                line_frames = np.full(len(starts), -1, dtype=np.int64)
+                if found:
+                    pos, values = np.array(found, dtype=np.int64).T
+                    rows = np.searchsorted(starts, pos, side='right') - 1
+                    rows, first = np.unique(rows, return_index=True)
+                    line_frames[rows] = values[first]
+            return cls(starts, ends, line_frames, st.st_size, st.st_mtime_ns)
+        finally:
+            del data  # La vista NumPy debe soltarse antes de cerrar el mmap
+            if mm is not None:
+                mm.close()
+            f.close()
+
+    def save(self, index_path: str):
+        tmp = index_path + ".tmp"
+        with open(tmp, 'wb') as f:
+            np.savez(f, version=INDEX_VERSION, starts=self.starts, ends=self.ends, frames=self.frames,
+                     size=self.size, mtime_ns=self.mtime_ns)
+        os.replace(tmp, index_path)
+
+    @classmethod
+    def load(cls, index_path: str) -> "LineIndex":
+        with np.load(index_path, allow_pickle=False) as arrays:
+            if int(arrays['version']) != INDEX_VERSION:
+                raise ValueError("Versión de índice distinta")
+            return cls(arrays['starts'], arrays['ends'], arrays['frames'], int(arrays['size']),
+                       int(arrays['mtime_ns']))
+
+    @classmethod
+    def for_file(cls, path: str, frames: bool = False, persist: bool = True) -> "LineIndex":
+        """Índice guardado junto al archivo si sigue siendo válido; si no, se construye (y se guarda)."""
+        index_path = path + INDEX_SUFFIX
+        st = os.stat(path)
+        try:
+            index = cls.load(index_path)
+            has_frames = not frames or not len(index) or (index.frames >= 0).any()
+            if (index.size, index.mtime_ns) == (st.st_size, st.st_mtime_ns) and has_frames:
+                return index
+        except (OSError, ValueError, KeyError):
+            pass
+        index = cls.build(path, frames)
+        if persist:
+            try:
+                index.save(index_path)
+            except OSError:
+                pass  # Carpeta de solo lectura: índice solo en memoria
+        return index
+
+    def row_of_frame(self, frame: int) -> int | None:
+        """Primera fila (en orden de archivo) con ese frame o, si no existe, la del siguiente frame."""
+        if self._frame_order is None:
+            valid = np.flatnonzero(self.frames >= 0)
+            self._frame_order = valid[np.argsort(self.frames[valid], kind='stable')]
+        sorted_frames = self.frames[self._frame_order]
+        pos = int(np.searchsorted(sorted_frames, frame, side='left'))
+        return int(self._frame_order[pos]) if pos < len(sorted_frames) else None
+
+
+class _MappedLines:
+    def __init__(self, path: str, index: LineIndex):
+        self.path = path
+        self.index = index
+        self._file, self._mm = _open_map(path)
+
+    def __len__(self):
+        return len(self.index)
+
+    def line(self, row: int) -> bytes:
+        return self._mm[self.index.starts[row]:self.index.ends[row]]
+
+    def lines(self, start: int, stop: int) -> list:
+        start, stop = max(0, start), min(stop, len(self.index))
+        return [self._mm[a:b] for a, b in zip(self.index.starts[start:stop].tolist(),
+                                              self.index.ends[start:stop].tolist())]
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class JsonlReader(_MappedLines):
+    """Registros de un JSONL por rango de filas o a partir de un número de frame."""
+
+    def __init__(self, path: str, persist: bool = True):
+        super().__init__(path, LineIndex.for_file(path, frames=True, persist=persist))
+
+    def records(self, start: int, stop: int) -> list:
+        return [json.loads(line) for line in self.lines(start, stop)]
+
+    def row_of_frame(self, frame: int) -> int | None:
+        return self.index.row_of_frame(frame)
+
+
+class CsvPager(_MappedLines):
+    """
+    Páginas de un CSV (fila 0 = primera fila de datos) leídas con pandas sobre la cabecera +
+    las líneas pedidas. Supone una fila por línea (sin saltos de línea dentro de comillas).
+    """
+
+    def __init__(self, path: str, sep: str = None, persist: bool = True):
+        super().__init__(path, LineIndex.for_file(path, persist=persist))
+        self.header = self.line(0) if len(self.index) else b""
+        self.sep = sep or sniff_delimiter(b"\n".join(self.lines(0, 20)).decode('utf-8', errors='replace'))
+
+    def __len__(self):
+        return max(0, len(self.index) - 1)
+
+    def page(self, start: int, stop: int) -> pd.DataFrame:
+        rows = self.lines(start + 1, stop + 1)
+        buf = io.BytesIO(b"\n".join([self.header] + rows))
+        df = pd.read_csv(buf, sep=self.sep)
+        df.index = range(max(0, start), max(0, start) + len(df))
+        return df
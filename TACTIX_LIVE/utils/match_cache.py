@@ -0,0 +1,138 @@
+# TACTIX_LIVE/utils/match_cache.py
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from TACTIX_LIVE.utils.frame_store import FrameStore, Roster
+
+# Subir cuando cambie el formato o el preprocesado guardado (invalida todas las cachés)
+CACHE_VERSION = 3
+
+
+def file_digest(path: str, block_size: int = 1 << 20) -> str:
+    """Hash BLAKE2b del contenido completo del archivo."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def fingerprint(path: str, digest: bool = True) -> dict:
+    """Huella de un archivo fuente: tamaño, mtime y (opcional) hash del contenido."""
+    if not os.path.exists(path):
+        return {'size': -1, 'mtime_ns': 0, 'digest': ''}
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'digest': file_digest(path) if digest else None}
+
+
+class MatchCache:
+    """
+    Caché persistente del partido ya limpio, con tiempos convertidos y enriquecido:
+    FrameStore en NPZ (sin pickle), eventos en Parquet y roster en JSON.
+
+    Clave: huella (tamaño, mtime, hash) de los archivos fuente y opciones del preprocesado
+    (una caché guardada con otras opciones no es válida). Si tamaño y mtime coinciden
+    con el manifest no se vuelve a leer la fuente; si cambian se recalcula el hash y solo se
+    reconstruye cuando el contenido es distinto.
+    """
+
+    def __init__(self, cache_dir: str = None):
+        self.cache_dir = cache_dir
+
+    def _entry_dir(self, sources: dict) -> str:
+        base = self.cache_dir or os.path.join(os.path.dirname(os.path.abspath(sources['tracking'])), ".cache")
+        key = hashlib.blake2b(
+            json.dumps({k: os.path.abspath(v) for k, v in sorted(sources.items())}).encode(), digest_size=8)
+        return os.path.join(base, key.hexdigest())
+
+    def _read_manifest(self, entry: str) -> dict | None:
+        try:
+            with open(os.path.join(entry, "manifest.json"), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self, entry: str, manifest: dict):
+        tmp = os.path.join(entry, "manifest.json.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp, os.path.join(entry, "manifest.json"))
+
+    def is_valid(self, sources: dict, options: dict = None) -> bool:
+        entry = self._entry_dir(sources)
+        manifest = self._read_manifest(entry)
+        if not manifest or manifest.get('version') != CACHE_VERSION:
+            return False
+        if options is not None and manifest.get('options') != options:
+            return False  # None = no comprobar las opciones del preprocesado
+
+        stored = manifest.get('sources', {})
+        changed = False
+        for name, path in sources.items():
+            old = stored.get(name)
+            if old is None:
+                return False
+            current = fingerprint(path, digest=False)
+            if (current['size'], current['mtime_ns']) == (old['size'], old['mtime_ns']):
+                continue
+            # Mismo tamaño pero mtime distinto (p.ej. 'touch' o copia): decide el hash
+            if current['size'] != old['size'] or fingerprint(path)['digest'] != old['digest']:
+                return False
+            stored[name] = {**old, 'mtime_ns': current['mtime_ns']}
+            changed = True
+
+        if changed:
+            self._write_manifest(entry, manifest)
+        return True
+
+    def load(self, sources: dict, options: dict = None):
+        """(Roster, FrameStore, eventos) si la caché es válida; None en otro caso."""
+        if not self.is_valid(sources, options):
+            return None
+        entry = self._entry_dir(sources)
+        try:
+            with open(os.path.join(entry, "roster.json"), 'r', encoding='utf-8') as f:
+                roster = Roster.from_dict(json.load(f))
+            with np.load(os.path.join(entry, "frames.npz"), allow_pickle=False) as arrays:
+                frames = FrameStore.from_arrays(arrays, roster)
+            events = pd.read_parquet(os.path.join(entry, "events.parquet"))
+        except (OSError, ValueError, KeyError):
+            return None
+        return roster, frames, events
+
+    @staticmethod
+    def fingerprints(sources: dict, digest: bool = True) -> dict:
+        """Huellas de las fuentes (sin hash con digest=False, para tomarlas antes de leer)."""
+        return {name: fingerprint(path, digest) for name, path in sources.items()}
+
+    def save(self, sources: dict, roster: Roster, frames: FrameStore, events: pd.DataFrame,
+             prints: dict = None, options: dict = None) -> bool:
+        """
+        Guarda el partido preprocesado. El manifest se escribe el último (punto de commit).
+        prints: huellas (tamaño/mtime) tomadas antes de la carga; si una fuente cambió mientras
+        se leía no se guarda nada, para no asociar datos viejos al archivo nuevo.
+        options: opciones del preprocesado con las que se generaron los frames.
+        """
+        current = self.fingerprints(sources)
+        if prints and any((current[k]['size'], current[k]['mtime_ns']) != (prints[k]['size'], prints[k]['mtime_ns'])
+                          for k in sources):
+            return False
+
+        entry = self._entry_dir(sources)
+        os.makedirs(entry, exist_ok=True)
+        manifest_path = os.path.join(entry, "manifest.json")
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+
+        with open(os.path.join(entry, "roster.json"), 'w', encoding='utf-8') as f:
+            json.dump(roster.to_dict(), f, default=str)
+        with open(os.path.join(entry, "frames.npz"), 'wb') as f:
+            np.savez(f, **frames.to_arrays())
+        events.to_parquet(os.path.join(entry, "events.parquet"), index=False)
+
+        self._write_manifest(entry, {'version': CACHE_VERSION, 'sources': current, 'options': options or {}})
+        return True
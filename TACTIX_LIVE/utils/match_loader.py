@@ -0,0 +1,159 @@
+# TACTIX_LIVE/utils/match_loader.py
+import csv
+import os
+
+import numpy as np
+import pandas as pd
+
+from TACTIX_LIVE.utils.frame_store import Roster, load_tracking
+from TACTIX_LIVE.utils.preprocess import DEFAULTS, clean_tracking
+from TACTIX_LIVE.utils.time_utils import times_to_seconds
+
+# Columnas candidatas del eventing (por orden de preferencia)
+EVENT_TIME_COLUMNS = ['game_time_seconds', 'timestamp', 'time', 'Time', 'period_time', 'minuto']
+EVENT_PERIOD_COLUMNS = ['period', 'period_id', 'half']
+# Columnas de texto con pocos valores distintos: se leen como categorías
+EVENT_CATEGORY_COLUMNS = ['type_name', 'type', 'event_type', 'subtype', 'sub_type_name', 'outcome', 'result',
+                          'body_part', 'team_name', 'player_name']
+# Tipos explícitos de las columnas numéricas conocidas (el resto, inferido por pyarrow)
+EVENT_SCHEMA = {
+    'event_id': 'Int64', 'period': 'Int64', 'period_id': 'Int64', 'half': 'Int64',
+    'player_id': 'Int64', 'team_id': 'Int64', 'game_time_seconds': 'float64',
+    'x': 'float64', 'y': 'float64', 'end_x': 'float64', 'end_y': 'float64',
+}
+EVENT_DELIMITERS = ",;\t|"
+SNIFF_BYTES = 64 << 10  # Muestra para detectar el separador
+
+# Rutas por defecto dentro de la carpeta de datos de un partido
+TRACKING_FILE = "tracking_file.jsonl"
+EVENTING_FILE = "eventing_file.csv"
+IDS_FILE = "ids_tracking.json"
+
+
+def match_sources(data_dir: str = "data") -> dict:
+    """Rutas de los tres archivos de un partido."""
+    return {
+        'tracking': os.path.join(data_dir, TRACKING_FILE),
+        'eventing': os.path.join(data_dir, EVENTING_FILE),
+        'ids': os.path.join(data_dir, IDS_FILE),
+    }
+
+
+def load_roster(ids_file: str) -> Roster:
+    """Roster desde ids_tracking.json (vacío si el archivo no existe)."""
+    return Roster.from_ids_file(ids_file) if os.path.exists(ids_file) else Roster()
+
+
+def sniff_delimiter(sample: str) -> str:
+    """
+    Separador de un CSV a partir de una muestra (cabecera + primeras filas): csv.Sniffer
+    restringido a los separadores habituales y, si no decide, el más frecuente en la cabecera.
+    """
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=EVENT_DELIMITERS).delimiter
+    except csv.Error:
+        header = sample.split("\n", 1)[0]
+        return max(EVENT_DELIMITERS, key=header.count)
+
+
+def _read_sample(path: str) -> str:
+    """Primeras líneas completas del archivo (como mucho SNIFF_BYTES)."""
+    with open(path, 'rb') as f:
+        raw = f.read(SNIFF_BYTES)
+    if len(raw) == SNIFF_BYTES and b"\n" in raw:
+        raw = raw[:raw.rindex(b"\n")]
+    return raw.decode('utf-8-sig', errors='replace')
+
+
+def _apply_schema(e_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Tipos explícitos de EVENT_SCHEMA para las columnas presentes. Los enteros son nullable
+    (Int64): un id vacío sigue siendo entero y sale como null en el JSON, no como 100.0/NaN.
+    Si un proveedor usa ids no numéricos, la columna se queda con el tipo inferido.
+    """
+    for col, dtype in EVENT_SCHEMA.items():
+        if col in e_df.columns and e_df[col].dtype != dtype:
+            try:
+                e_df[col] = e_df[col].astype(dtype)
+            except (TypeError, ValueError):
+                pass
+    return e_df
+
+
+def load_eventing(ev_file: str) -> pd.DataFrame:
+    """
+    Lee el CSV de eventing y añade 'game_time' (segundos) y 'period' normalizado.
+    Devuelve los eventos ordenados por (periodo, tiempo). ValueError si no hay columna de tiempo.
+
+    El separador se detecta una vez sobre una muestra y el parseo lo hace el lector multihilo
+    de pyarrow, con los tiempos como texto (los convierte times_to_seconds), los tipos de
+    evento como categorías y el resto según EVENT_SCHEMA.
+    """
+    sample = _read_sample(ev_file)
+    sep = sniff_delimiter(sample)
+    header = next(csv.reader([sample.split("\n", 1)[0].rstrip("\r")], delimiter=sep), [])
+    dtype = {c: 'string' for c in header if c in EVENT_TIME_COLUMNS and EVENT_SCHEMA.get(c) is None}
+    dtype.update({c: 'category' for c in header if c in EVENT_CATEGORY_COLUMNS})
+
+    e_df = _apply_schema(pd.read_csv(ev_file, sep=sep, engine='pyarrow', dtype=dtype))
+    t_col = next((c for c in EVENT_TIME_COLUMNS if c in e_df.columns), None)
+    p_col = next((c for c in EVENT_PERIOD_COLUMNS if c in e_df.columns), None)
+    if t_col is None:
+        raise ValueError(f"No se detectó columna de tiempo en Eventing. Columnas: {list(e_df.columns)}")
+
+    e_df['game_time'] = times_to_seconds(e_df[t_col])
+    e_df = e_df.dropna(subset=['game_time'])
+
+    # Normalizar columna periodo
+    if p_col:
+        e_df['period'] = pd.to_numeric(e_df[p_col], errors='coerce').fillna(1).to_numpy(dtype=np.int64)
+    else:
+        e_df['period'] = 1  # Default
+
+    # 🟢 CLAVE: Ordenar Eventos por (Periodo, Tiempo)
+    return e_df.sort_values(by=['period', 'game_time'], kind='stable').reset_index(drop=True)
+
+
+def add_event_times(events: list) -> list:
+    """
+    Lado consumidor: los productores publican los eventos sin 'game_time' (solo el registro
+    original). Lo añade (y normaliza 'period') a los que no lo traen, con las mismas columnas
+    candidatas y la misma conversión que load_eventing. Modifica los dicts; sin tiempo -> None.
+    """
+    missing = [e for e in events if e.get('game_time') is None]
+    if not missing:
+        return events
+    values = [next((e[c] for c in EVENT_TIME_COLUMNS if e.get(c) is not None), None) for e in missing]
+    times = times_to_seconds(pd.Series(values, dtype=object))
+    periods = pd.to_numeric(pd.Series([next((e[c] for c in EVENT_PERIOD_COLUMNS if e.get(c) is not None), None)
+                                       for e in missing], dtype=object), errors='coerce').fillna(1)
+    for event, t, period in zip(missing, times, periods.to_numpy(dtype=np.int64)):
+        event['game_time'] = None if np.isnan(t) else float(t)
+        event['period'] = int(period)
+    return events
+
+
+def load_match(sources: dict, cache=None, preprocess: dict = None):
+    """
+    Carga completa de un partido -> (Roster, FrameStore, DataFrame de eventos).
+    preprocess: opciones de preprocess.py (por defecto DEFAULTS); el tracking se limpia salvo
+    con enabled=False. Si se pasa un MatchCache, se usa la versión preprocesada cuando sigue
+    siendo válida para las mismas fuentes y opciones.
+    """
+    options = {**DEFAULTS, **(preprocess or {})}
+    prints = None
+    if cache is not None:
+        cached = cache.load(sources, options)
+        if cached is not None:
+            return cached
+        prints = cache.fingerprints(sources, digest=False)
+
+    roster = load_roster(sources['ids'])
+    events = load_eventing(sources['eventing'])
+    frames = load_tracking(sources['tracking'], roster)
+    if options['enabled']:
+        frames, _ = clean_tracking(frames, options['max_null_run'], options['max_gap'])
+
+    if cache is not None:
+        cache.save(sources, roster, frames, events, prints, options)
+    return roster, frames, events
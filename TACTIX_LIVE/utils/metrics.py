@@ -0,0 +1,236 @@
+# TACTIX_LIVE/utils/metrics.py
+"""
+Métricas de publicación con memoria fija, para el dashboard y para soak tests:
+
+- LatencyHistogram: histograma de latencias con buckets logarítmicos fijos (~19 % de
+  ancho), percentiles p50/p95/p99 y máximo sin guardar las muestras.
+- RateMeter: mensajes por segundo en una ventana circular de segundos.
+- StreamMetrics: contadores de un stream (enviados, confirmados, fallidos, descartados,
+  backpressure) + histograma + throughput.
+- render_prometheus / MetricsServer: exposición en formato de texto de Prometheus por HTTP
+  local (GET /metrics). Los percentiles en el tiempo se calculan con histogram_quantile()
+  sobre los buckets acumulados.
+"""
+import bisect
+import http.server
+import math
+import threading
+import time
+
+import numpy as np
+
+# Límites superiores de los buckets (ms): 0.01 ms .. ~100 s con razón 2^(1/4)
+LATENCY_BOUNDS_MS = tuple(float(f"{0.01 * 2 ** (i / 4):.4g}") for i in range(93))
+
+
+class LatencyHistogram:
+    """Histograma acumulado de latencias en ms (último bucket = desbordamiento, +Inf)."""
+
+    def __init__(self, bounds=LATENCY_BOUNDS_MS):
+        self.bounds = tuple(bounds)
+        self.reset()
+
+    def reset(self):
+        self.counts = np.zeros(len(self.bounds) + 1, dtype=np.int64)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """Percentil q (0-100) interpolando dentro del bucket; exacto en el máximo."""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        cum = np.cumsum(self.counts)
+        i = int(np.searchsorted(cum, rank, side='left'))
+        if i >= len(self.bounds):
+            return self.max
+        lower = self.bounds[i - 1] if i > 0 else 0.0
+        below = cum[i - 1] if i > 0 else 0
+        frac = (rank - below) / self.counts[i] if self.counts[i] else 1.0
+        return float(min(lower + frac * (self.bounds[i] - lower), self.max))
+
+    def summary(self) -> dict:
+        p50, p95, p99 = (self.percentile(q) for q in (50, 95, 99))
+        return {'count': self.count, 'mean_ms': self.mean, 'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99,
+                'max_ms': self.max}
+
+
+class RateMeter:
+    """Eventos por segundo: un contador por segundo en una ventana circular de 'window' segundos."""
+
+    def __init__(self, window: int = 120, clock=time.time):
+        self.window = window
+        self.clock = clock
+        self._counts = np.zeros(window, dtype=np.int64)
+        self._stamps = np.full(window, -1, dtype=np.int64)
+        self._first = None  # Primer segundo con datos (la media no cuenta segundos anteriores)
+
+    def add(self, n: int = 1, now: float = None):
+        sec = int(self.clock() if now is None else now)
+        if self._first is None:
+            self._first = sec
+        slot = sec % self.window
+        if self._stamps[slot] != sec:
+            self._stamps[slot] = sec
+            self._counts[slot] = 0
+        self._counts[slot] += n
+
+    def series(self, seconds: int = 60, now: float = None) -> np.ndarray:
+        """Mensajes de cada uno de los últimos 'seconds' segundos completos (el más antiguo primero)."""
+        sec = int(self.clock() if now is None else now)
+        wanted = np.arange(sec - min(seconds, self.window - 1), sec)
+        slots = wanted % self.window
+        return np.where(self._stamps[slots] == wanted, self._counts[slots], 0)
+
+    def rate(self, seconds: int = 10, now: float = None) -> float:
+        """Media de mensajes por segundo en los últimos 'seconds' segundos completos."""
+        if self._first is None:
+            return 0.0
+        sec = int(self.clock() if now is None else now)
+        series = self.series(max(1, min(seconds, sec - self._first)), now)
+        return float(series.mean()) if len(series) else 0.0
+
+
+class StreamMetrics:
+    """
+    Métricas de un stream. sent = publicados, acked = confirmados por el broker (con su latencia
+    en el histograma y en el throughput), failed = rechazados por el broker, dropped = nunca
+    publicados (sin hueco de backpressure a tiempo), blocked_ms = tiempo esperando hueco.
+    """
+
+    def __init__(self):
+        self.sent = 0
+        self.acked = 0
+        self.failed = 0
+        self.dropped = 0
+        self.blocked_ms = 0.0
+        self.latency = LatencyHistogram()
+        self.throughput = RateMeter()
+
+    def ack(self, latency_ms: float):
+        self.acked += 1
+        self.latency.observe(latency_ms)
+        self.throughput.add()
+
+    def summary(self) -> dict:
+        return {**self.latency.summary(), 'sent': self.sent, 'acked': self.acked, 'failed': self.failed,
+                'dropped': self.dropped, 'blocked_ms': self.blocked_ms, 'rate': self.throughput.rate()}
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+def _number(value) -> str:
+    if isinstance(value, float) and math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(int(value))
+
+
+def render_prometheus(streams: dict, gauges: dict = None, prefix: str = "tactix", labels: dict = None,
+                      help_texts: dict = None) -> str:
+    """
+    Formato de texto de Prometheus (v0.0.4).
+    streams: {nombre: StreamMetrics} -> contadores e histograma de latencia (en segundos) con
+    la etiqueta stream=nombre. gauges: {nombre: (ayuda, valor)} para profundidades de cola,
+    retraso del reloj, etc. labels: etiquetas comunes (p.ej. match_id). help_texts: {familia:
+    ayuda} para quien reutiliza StreamMetrics con otro significado (p.ej. el consumidor).
+    """
+    labels = labels or {}
+    help_texts = help_texts or {}
+    lines = []
+
+    def family(name, kind, help_text, samples):
+        lines.append(f"# HELP {prefix}_{name} {help_texts.get(name, help_text)}")
+        lines.append(f"# TYPE {prefix}_{name} {kind}")
+        for suffix, extra, value in samples:
+            lines.append(f"{prefix}_{name}{suffix}{_labels({**labels, **extra})} {_number(value)}")
+
+    counters = [
+        ('messages_sent_total', 'sent', "Mensajes publicados"),
+        ('messages_acked_total', 'acked', "Mensajes confirmados por el broker"),
+        ('messages_failed_total', 'failed', "Publicaciones rechazadas por el broker"),
+        ('messages_dropped_total', 'dropped', "Mensajes descartados sin publicar (backpressure)"),
+    ]
+    for name, attr, help_text in counters:
+        family(name, 'counter', help_text, [("", {'stream': s}, getattr(m, attr)) for s, m in streams.items()])
+    family('backpressure_seconds_total', 'counter', "Tiempo esperando hueco de publicación",
+           [("", {'stream': s}, m.blocked_ms / 1000) for s, m in streams.items()])
+    family('throughput_messages_per_second', 'gauge', "Confirmaciones por segundo (media de 10 s)",
+           [("", {'stream': s}, m.throughput.rate()) for s, m in streams.items()])
+
+    samples = []
+    for s, m in streams.items():
+        h = m.latency
+        cum = np.cumsum(h.counts).tolist()
+        for bound, c in zip(h.bounds, cum):
+            samples.append(("_bucket", {'stream': s, 'le': f"{bound / 1000:.6g}"}, c))
+        samples.append(("_bucket", {'stream': s, 'le': "+Inf"}, cum[-1]))
+        samples.append(("_sum", {'stream': s}, h.sum / 1000))
+        samples.append(("_count", {'stream': s}, h.count))
+    family('ack_latency_seconds', 'histogram', "Latencia envío -> ack del broker", samples)
+
+    for name, (help_text, value) in (gauges or {}).items():
+        family(name, 'gauge', help_text, [("", {}, value)])
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """
+    Endpoint HTTP local: GET /metrics devuelve collect() (texto Prometheus). Hilo daemon propio,
+    no toca el hilo del stream. address 'host:port' (puerto 0 = uno libre, ver .address).
+    """
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self, collect, address: str = "127.0.0.1:9108"):
+        host, _, port = address.rpartition(":")
+        self.collect = collect
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = server.collect().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", server.CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = http.server.ThreadingHTTPServer((host or "127.0.0.1", int(port)), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"{host}:{port}"
+
+    def start(self) -> "MetricsServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -0,0 +1,169 @@
+# TACTIX_LIVE/utils/preprocess.py
+"""
+Preprocesado del tracking en la carga (antes de serializar y planificar los frames):
+
+- Rachas de frames sin tiempo (previa al saque inicial, descanso): se conservan los primeros
+  max_null_run frames de cada racha y se descarta el resto. El simulador deja de dormir
+  FRAME_DURATION por cada frame vacío.
+- Frames duplicados (mismo número de frame que el anterior): se descartan.
+- Reinicios de periodo (cambio de periodo o tiempo que retrocede): se cuentan y actúan de
+  frontera, no se interpola a través de ellos.
+- Huecos cortos de un jugador (<= max_gap frames seguidos sin posición dentro del mismo
+  tramo continuo): interpolación lineal en el tiempo, vectorizada sobre (frames x entidades),
+  con la marca 'imputed' en el FrameStore.
+"""
+import numpy as np
+
+from TACTIX_LIVE.utils.frame_store import FrameStore, Roster
+
+DEFAULTS = {'enabled': True, 'max_null_run': 25, 'max_gap': 10}
+
+
+def preprocess_options(config: dict = None) -> dict:
+    """Opciones efectivas: DEFAULTS actualizados con la sección 'preprocess' de la config."""
+    return {**DEFAULTS, **(config or {}).get('preprocess', {})}
+
+
+def segment_ids(periods, game_times) -> np.ndarray:
+    """
+    Tramo continuo de cada fila: cambia con el periodo, cuando el tiempo retrocede y alrededor
+    de cada fila sin tiempo (que queda sola en su tramo).
+    """
+    periods = np.asarray(periods)
+    game_times = np.asarray(game_times, dtype=np.float64)
+    null = np.isnan(game_times)
+    boundary = np.zeros(len(periods), dtype=bool)
+    if len(periods) > 1:
+        with np.errstate(invalid='ignore'):
+            back = game_times[1:] < game_times[:-1]
+        boundary[1:] = null[1:] | null[:-1] | (periods[1:] != periods[:-1]) | back
+    return np.cumsum(boundary)
+
+
+def interpolate_gaps(xy, game_times, segments, max_gap: int):
+    """
+    Rellena huecos de hasta max_gap filas por entidad (xy: frames x entidades x 2, NaN = ausente)
+    cuando las dos posiciones observadas que los delimitan están en el mismo tramo.
+    Devuelve (xy rellenado, máscara de posiciones imputadas).
+    """
+    xy = np.array(xy, dtype=np.float32)
+    n = len(xy)
+    present = ~np.isnan(xy[..., 0])
+    idx = np.arange(n)[:, None]
+    prev = np.maximum.accumulate(np.where(present, idx, -1), axis=0)
+    nxt = np.minimum.accumulate(np.where(present, idx, n)[::-1], axis=0)[::-1]
+
+    fill = ~present & (prev >= 0) & (nxt < n) & (nxt - prev - 1 <= max_gap)
+    rows, ents = np.nonzero(fill)
+    p, q = prev[rows, ents], nxt[rows, ents]
+    keep = segments[p] == segments[q]
+    rows, ents, p, q = rows[keep], ents[keep], p[keep], q[keep]
+
+    # Fracción por tiempo de partido (por filas si los extremos comparten tiempo)
+    t = np.asarray(game_times, dtype=np.float64)
+    span = t[q] - t[p]
+    frac = np.where(span > 0, (t[rows] - t[p]) / np.where(span > 0, span, 1.0), (rows - p) / (q - p))
+    xy[rows, ents] = xy[p, ents] + frac[:, None].astype(np.float32) * (xy[q, ents] - xy[p, ents])
+
+    imputed = np.zeros(present.shape, dtype=bool)
+    imputed[rows, ents] = True
+    return xy, imputed
+
+
+class TrackingCleaner:
+    """
+    Preprocesado incremental: se alimenta con un FrameStore en crecimiento (feed) y va
+    añadiendo a 'out' las filas ya limpias. Para interpolar necesita ver max_gap filas por
+    delante, así que retiene las últimas hasta el siguiente bloque o hasta feed(final=True).
+    """
+
+    def __init__(self, roster: Roster = None, max_null_run: int = DEFAULTS['max_null_run'],
+                 max_gap: int = DEFAULTS['max_gap']):
+        self.out = FrameStore(roster)
+        self.max_null_run = max(0, int(max_null_run))
+        self.max_gap = max(0, int(max_gap))
+        self.report = {'null_runs': 0, 'longest_null_run': 0, 'null_dropped': 0,
+                       'duplicates': 0, 'period_resets': 0, 'imputed': 0}
+        self._next = 0          # Siguiente fila de la fuente por clasificar
+        self._null_run = 0      # Longitud de la racha sin tiempo abierta al final del bloque anterior
+        self._prev_frame = None
+        self._prev_key = None   # (periodo, tiempo) de la última fila con tiempo
+        self._pending = np.zeros(0, dtype=np.intp)
+        self._context = np.zeros(0, dtype=np.intp)
+
+    def _select(self, src: FrameStore, stop: int) -> np.ndarray:
+        """Filas [self._next, stop) que se conservan (compactación de nulos y duplicados)."""
+        rows = np.arange(self._next, stop)
+        n = len(rows)
+        times = src.game_time[rows].astype(np.float64)
+        periods = src.period[rows]
+        null = np.isnan(times)
+
+        # Posición de cada fila nula dentro de su racha (continuando la del bloque anterior)
+        pos = np.arange(n)
+        last_valid = np.maximum.accumulate(np.where(~null, pos, -1))
+        run_pos = np.where(last_valid >= 0, pos - last_valid - 1, pos + self._null_run)
+        keep = ~null | (run_pos < self.max_null_run)
+        run_len = np.where(null, run_pos + 1, 0)
+        self.report['null_runs'] += int((null & (run_pos == 0)).sum())
+        self.report['longest_null_run'] = max(self.report['longest_null_run'], int(run_len.max()))
+        self.report['null_dropped'] += int((~keep).sum())
+        self._null_run = int(run_len[-1])
+
+        frames = src.frame[rows]
+        prev = np.concatenate(([self._prev_frame if self._prev_frame is not None else -1], frames[:-1]))
+        dup = (frames >= 0) & (frames == prev)
+        self.report['duplicates'] += int(dup.sum())
+        self._prev_frame = int(frames[-1])
+
+        # Reinicios de periodo entre filas con tiempo consecutivas
+        valid = np.flatnonzero(~null)
+        if len(valid):
+            vp, vt = periods[valid], times[valid]
+            pp = np.concatenate(([self._prev_key[0] if self._prev_key else vp[0]], vp[:-1]))
+            pt = np.concatenate(([self._prev_key[1] if self._prev_key else vt[0]], vt[:-1]))
+            self.report['period_resets'] += int(((vp != pp) | (vt < pt)).sum())
+            self._prev_key = (int(vp[-1]), float(vt[-1]))
+
+        self._next = stop
+        return rows[keep & ~dup]
+
+    def feed(self, src: FrameStore, stop: int = None, final: bool = False) -> int:
+        """Procesa las filas nuevas de src hasta stop y devuelve cuántas se añadieron a 'out'."""
+        stop = len(src) if stop is None else stop
+        if stop > self._next:
+            self._pending = np.concatenate([self._pending, self._select(src, stop)])
+
+        n_emit = len(self._pending) if final else max(0, len(self._pending) - self.max_gap)
+        if n_emit == 0:
+            return 0
+
+        window = np.concatenate([self._context, self._pending])
+        times = src.game_time[window]
+        xy, imputed = interpolate_gaps(src.xy[window], times, segment_ids(src.period[window], times), self.max_gap)
+        emit = slice(len(self._context), len(self._context) + n_emit)
+        imputed_rows = imputed[emit]
+        detected = np.where(imputed_rows, 0, src.detected[window[emit]]).astype(np.int8)
+        self.out.append_rows(src, window[emit], xy=xy[emit], detected=detected,
+                             imputed=imputed_rows | src.imputed[window[emit]])
+        self.report['imputed'] += int(imputed_rows.sum())
+
+        # Contexto: anclas observadas a la izquierda para los huecos del siguiente bloque
+        self._context = window[:emit.stop][-(self.max_gap + 1):]
+        self._pending = self._pending[n_emit:]
+        return n_emit
+
+
+def clean_tracking(store: FrameStore, max_null_run: int = DEFAULTS['max_null_run'],
+                   max_gap: int = DEFAULTS['max_gap']):
+    """Preprocesado de un FrameStore completo -> (FrameStore limpio, informe)."""
+    cleaner = TrackingCleaner(store.roster, max_null_run, max_gap)
+    cleaner.feed(store, final=True)
+    return cleaner.out, cleaner.report
+
+
+def format_report(report: dict) -> str:
+    """Resumen de una línea para los logs."""
+    return (f"{report['null_dropped']} frames sin tiempo descartados ({report['null_runs']} rachas, "
+            f"máx. {report['longest_null_run']}), {report['duplicates']} duplicados, "
+            f"{report['period_resets']} reinicios de periodo, {report['imputed']} posiciones imputadas")
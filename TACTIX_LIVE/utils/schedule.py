@@ -0,0 +1,49 @@
+# TACTIX_LIVE/utils/schedule.py
+import numpy as np
+
+FRAME_DURATION = 0.04  # 25 fps
+MAX_GAP = 5.0          # Saltos de tiempo mayores (o negativos) cuentan como un frame
+EVENT_TOLERANCE = 0.05  # Un evento sale con el frame si su tiempo <= tiempo del frame + tolerancia
+
+
+def build_schedule(periods, game_times, ev_periods, ev_times, prev_time: float = 0.0, prev_events: int = 0):
+    """
+    Plan de despacho de un bloque de frames (vectorizado), con las reglas del stream loop:
+
+    - step[i]: segundos de partido que avanza el reloj antes del frame i. FRAME_DURATION si el
+      frame no tiene tiempo o si el salto respecto al último tiempo válido es negativo o > MAX_GAP.
+    - event_end[i]: eventos (ordenados por periodo y tiempo) enviados al llegar al frame i. Son
+      los de periodos anteriores y los del mismo periodo con tiempo <= t + EVENT_TOLERANCE.
+      El puntero solo avanza (máximo acumulado) y los frames sin tiempo no envían eventos.
+
+    prev_time / prev_events: estado al final del bloque anterior (último tiempo válido y
+    event_end), para construir el plan por bloques durante la carga progresiva.
+    Devuelve (step, event_end, last_time, last_events).
+    """
+    periods = np.asarray(periods, dtype=np.int64)
+    game_times = np.asarray(game_times, dtype=np.float64)
+    ev_periods = np.asarray(ev_periods, dtype=np.int64)
+    ev_times = np.asarray(ev_times, dtype=np.float64)
+    valid = ~np.isnan(game_times)
+
+    # Último tiempo válido antes de cada frame (forward-fill desplazado una posición)
+    filled = np.where(valid, game_times, np.nan)
+    last_idx = np.maximum.accumulate(np.where(valid, np.arange(len(filled)), -1))
+    prev = np.empty(len(filled), dtype=np.float64)
+    if len(filled):
+        prev[0] = prev_time
+        prev[1:] = np.where(last_idx[:-1] >= 0, filled[np.maximum(last_idx[:-1], 0)], prev_time)
+    delta = game_times - prev
+    step = np.where(valid & (delta >= 0) & (delta <= MAX_GAP), delta, FRAME_DURATION)
+
+    # Corte de eventos por frame: todos los de periodos anteriores + búsqueda binaria en el suyo
+    cutoff = np.zeros(len(filled), dtype=np.int64)
+    for period in np.unique(periods[valid]):
+        rows = np.flatnonzero(valid & (periods == period))
+        lo, hi = np.searchsorted(ev_periods, [period, period + 1])
+        cutoff[rows] = lo + np.searchsorted(ev_times[lo:hi], game_times[rows] + EVENT_TOLERANCE, side='right')
+    event_end = np.maximum.accumulate(np.maximum(cutoff, prev_events)) if len(cutoff) else cutoff
+
+    last_time = float(filled[last_idx[-1]]) if len(filled) and last_idx[-1] >= 0 else prev_time
+    last_events = int(event_end[-1]) if len(event_end) else prev_events
+    return step, event_end, last_time, last_events
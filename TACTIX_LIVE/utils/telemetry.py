@@ -0,0 +1,92 @@
+# TACTIX_LIVE/utils/telemetry.py
+import numpy as np
+
+
+def _fill_value(dtype: np.dtype):
+    if dtype.kind == 'f':
+        return np.nan
+    if dtype.kind in 'iu':
+        return 0
+    return None
+
+
+class RingBuffer:
+    """
+    Buffer circular de capacidad fija, preasignado como un array estructurado de NumPy (un
+    campo por columna): escribir una entrada es una sola asignación, sin dicts por entrada.
+
+    - Un solo escritor (o escritores serializados por quien llama): append() escribe la fila
+      en su hueco y después publica el contador 'written'. Sin locks ni pop(0)/insert(0):
+      coste O(1) por entrada.
+    - Lectores (la UI): snapshot() copia el array sin bloquear al escritor y descarta las
+      filas que se hayan podido sobrescribir durante la copia (como un seqlock), así que el
+      resultado siempre es consistente.
+    - update() corrige un campo de una entrada ya escrita (p.ej. la latencia al llegar el ack)
+      solo si la entrada sigue en el buffer. Es best-effort: sirve para monitorización.
+    """
+
+    def __init__(self, capacity: int, columns: dict):
+        self.capacity = max(1, int(capacity))
+        # Un hueco de reserva: la entrada que se esté escribiendo durante un snapshot no pisa
+        # ninguna de las 'capacity' visibles
+        self._slots = self.capacity + 1
+        dtype = np.dtype([(name, dtype) for name, dtype in columns.items()])
+        self._fill = tuple(_fill_value(dtype[name]) for name in dtype.names)
+        self._rows = np.empty(self._slots, dtype=dtype)
+        self._rows[:] = self._fill
+        self._seq = np.full(self._slots, -1, dtype=np.int64)
+        self.written = 0  # Total de entradas escritas desde el último clear()
+
+    def __len__(self):
+        return min(self.written, self.capacity)
+
+    @property
+    def columns(self) -> list:
+        return list(self._rows.dtype.names)
+
+    def clear(self):
+        self.written = 0
+        self._seq[:] = -1
+
+    def append(self, *values) -> int:
+        """
+        Añade una entrada con los valores en el orden de las columnas (las que falten al final
+        quedan en NaN / 0 / None) y devuelve su número de secuencia.
+        """
+        seq = self.written
+        slot = seq % self._slots
+        if len(values) < len(self._fill):
+            values = values + self._fill[len(values):]
+        self._rows[slot] = values
+        self._seq[slot] = seq
+        self.written = seq + 1
+        return seq
+
+    def update(self, seq: int, name: str, value) -> bool:
+        slot = seq % self._slots
+        if self._seq[slot] != seq:
+            return False  # Ya sobrescrita por una entrada más nueva
+        self._rows[name][slot] = value
+        return True
+
+    def snapshot(self, last: int = None, newest_first: bool = True) -> dict:
+        """
+        Copia consistente de las últimas 'last' entradas (todas por defecto) -> {columna: array},
+        lista para pd.DataFrame o para pintar directamente. Las más recientes primero.
+        """
+        before = self.written
+        rows = self._rows.copy()
+        after = self.written
+        # Válidas: escritas antes de copiar y no pisadas durante la copia (la 'after' puede ir a medias)
+        lo = max(0, before - self.capacity, after + 1 - self._slots)
+        if last is not None:
+            lo = max(lo, before - last)
+        seqs = np.arange(lo, before)
+        if newest_first:
+            seqs = seqs[::-1]
+        rows = rows[seqs % self._slots]
+        return {name: rows[name] for name in rows.dtype.names}
+
+    def values(self, name: str, last: int = None, newest_first: bool = True) -> list:
+        """Una sola columna de snapshot() como lista (p.ej. las líneas de un log de texto)."""
+        return self.snapshot(last, newest_first)[name].tolist()
@@ -0,0 +1,67 @@
+# TACTIX_LIVE/utils/time_index.py
+import numpy as np
+
+from TACTIX_LIVE.utils.time_utils import time_to_seconds
+
+# Peso del periodo en la clave compuesta (mayor que cualquier game_time en segundos)
+_PERIOD_WEIGHT = 1e6
+
+
+def time_key(period, game_time) -> np.ndarray:
+    """
+    Clave ordenable (periodo, tiempo) en un solo float64: periodo * 1e6 + segundos.
+    El tiempo se limita a +-5e5 s para que -inf/inf signifiquen inicio/fin del periodo.
+    """
+    limit = _PERIOD_WEIGHT / 2
+    game_time = np.clip(np.asarray(game_time, dtype=np.float64), -limit, limit)
+    return np.asarray(period, dtype=np.float64) * _PERIOD_WEIGHT + game_time
+
+
+def parse_game_time(value) -> float:
+    """Segundos desde un número o un texto 'MM:SS' / 'HH:MM:SS' (p.ej. '63:10' -> 3790.0)."""
+    seconds = time_to_seconds(value)
+    if seconds is None:
+        raise ValueError(f"Tiempo no válido: {value!r}")
+    return seconds
+
+
+class TimeIndex:
+    """
+    Índice (periodo, game_time) -> fila, con búsqueda binaria.
+
+    Las filas no tienen por qué estar ordenadas (el tracking respeta el orden del archivo):
+    se guardan las claves ordenadas y la fila de cada una. Las filas sin tiempo (NaN) no se
+    indexan. lookup() devuelve la primera fila con clave >= (periodo, tiempo) o None si el
+    instante pedido es posterior al último indexado.
+    """
+
+    def __init__(self, periods, game_times):
+        keys = time_key(periods, game_times)
+        rows = np.flatnonzero(~np.isnan(keys))
+        order = np.argsort(keys[rows], kind='stable')
+        self.rows = rows[order]
+        self.keys = keys[self.rows]
+        self.times = np.asarray(game_times, dtype=np.float64)[self.rows]
+        self.size = len(keys)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def lookup(self, period: int, game_time: float) -> int | None:
+        pos = int(np.searchsorted(self.keys, time_key(period, game_time), side='left'))
+        return int(self.rows[pos]) if pos < len(self.rows) else None
+
+    def count_before(self, period: int, game_time: float) -> int:
+        """Nº de claves estrictamente anteriores (para streams ya ordenados = su posición)."""
+        return int(np.searchsorted(self.keys, time_key(period, game_time), side='left'))
+
+    def periods(self) -> list:
+        """Periodos con al menos una fila indexada."""
+        return np.unique(self.keys // _PERIOD_WEIGHT).astype(int).tolist()
+
+    def bounds(self, period: int):
+        """(primer, último) game_time indexado de un periodo, o None si no tiene filas."""
+        lo, hi = np.searchsorted(self.keys, time_key([period, period], [-np.inf, np.inf]), side='left')
+        if lo >= hi:
+            return None
+        return float(self.times[lo]), float(self.times[hi - 1])
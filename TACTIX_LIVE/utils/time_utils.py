@@ -0,0 +1,136 @@
+# TACTIX_LIVE/utils/time_utils.py
+import numpy as np
+import pandas as pd
+
+
+def time_to_seconds(time_val) -> float | None:
+    """
+    Convierte un único valor de tiempo a segundos (envoltorio escalar de times_to_seconds).
+    """
+    result = times_to_seconds([time_val])[0]
+    return None if np.isnan(result) else float(result)
+
+
+def times_to_seconds(values) -> np.ndarray:
+    """
+    Convierte una columna completa de tiempos a segundos (float64, NaN si no es válido).
+
+    Formatos soportados (los mismos que los loaders fila a fila):
+    "YYYY-MM-DD HH:MM:SS.fff", "HH:MM:SS.ss", "MM:SS.ss" y números (o strings numéricos).
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values, dtype=getattr(values, "dtype", object))
+
+    # Columnas ya tipadas por pandas (p.ej. read_json convierte 'timestamp' en fechas)
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return (series - series.dt.normalize()).dt.total_seconds().to_numpy(dtype=np.float64, na_value=np.nan)
+    if pd.api.types.is_timedelta64_dtype(series.dtype):
+        return series.dt.total_seconds().to_numpy(dtype=np.float64, na_value=np.nan)
+
+    # Camino rápido: la columna ya es numérica
+    if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+        return series.to_numpy(dtype=np.float64, na_value=np.nan)
+
+    result = np.full(len(series), np.nan, dtype=np.float64)
+    if len(series) == 0:
+        return result
+
+    # 1. Bloque dominante: strings de la misma longitud (el caso típico del tracking)
+    chars = series.to_numpy(dtype=str)
+    lengths = np.char.str_len(chars)
+    block = lengths == np.bincount(lengths).argmax()
+    fixed = _parse_fixed_width(chars[block])
+    if fixed is not None:
+        result[block] = fixed
+        rest = ~block
+    else:
+        rest = np.ones(len(series), dtype=bool)
+
+    # 2. Resto de valores (nulos, formatos mezclados, números sueltos)
+    if rest.any():
+        result[rest] = _parse_general(series[rest].reset_index(drop=True))
+    return result
+
+
+def _combine(fields: list) -> np.ndarray:
+    """Suma ponderada de los campos [HH], [MM], SS según cuántos haya."""
+    weights = (1.0,) if len(fields) == 1 else (60.0, 1.0) if len(fields) == 2 else (3600.0, 60.0, 1.0)
+    total = np.zeros(len(fields[0]), dtype=np.float64)
+    for w, f in zip(weights, fields):
+        total += w * f
+    return total
+
+
+def _parse_fixed_width(chars: np.ndarray) -> np.ndarray | None:
+    """
+    Parsea strings de ancho fijo con los separadores (' ' de la fecha y ':') en las mismas
+    posiciones para todas las filas. Devuelve None si la columna no cumple el patrón.
+    """
+    width = chars.dtype.itemsize // 4
+    if len(chars) == 0 or width == 0 or width > 32:
+        return None
+    grid = chars.view("U1").reshape(len(chars), width)
+
+    # La fecha (si existe) termina en el último espacio de la fila plantilla
+    spaces = np.flatnonzero(grid[0] == " ")
+    start = spaces[-1] + 1 if len(spaces) else 0
+    if start and not (grid[:, start - 1] == " ").all():
+        return None
+
+    body = grid[:, start:]
+    colons = np.flatnonzero(body[0] == ":")
+    if len(colons) > 2 or (body == ":").sum() != len(chars) * len(colons) or (body == " ").any():
+        return None
+    if len(colons) and not (body[:, colons] == ":").all():
+        return None
+
+    bounds = [-1, *colons.tolist(), body.shape[1]]
+    fields = []
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        value = _digits_to_float(body[:, a + 1:b])
+        if value is None:
+            return None
+        fields.append(value)
+    return _combine(fields)
+
+
+def _digits_to_float(cols: np.ndarray) -> np.ndarray | None:
+    """
+    Convierte una matriz de caracteres (filas x ancho) con dígitos y, como mucho, un punto
+    decimal en la misma columna para todas las filas. Aritmética entera exacta: mantisa / 10^k.
+    """
+    if cols.shape[1] == 0:
+        return None
+    codes = np.ascontiguousarray(cols).view(np.uint32).astype(np.int64) - ord("0")
+    dots = np.flatnonzero(codes[0] == ord(".") - ord("0"))
+    if len(dots) > 1 or (len(dots) and not (codes[:, dots[0]] == ord(".") - ord("0")).all()):
+        return None
+    digits = np.delete(codes, dots) if codes.ndim == 1 else np.delete(codes, dots, axis=1)
+    if digits.shape[1] == 0 or digits.shape[1] > 15 or digits.min() < 0 or digits.max() > 9:
+        return None
+    mantissa = digits @ (10 ** np.arange(digits.shape[1] - 1, -1, -1, dtype=np.int64))
+    n_frac = cols.shape[1] - 1 - dots[0] if len(dots) else 0
+    return mantissa.astype(np.float64) / 10.0 ** n_frac
+
+
+def _parse_general(series: pd.Series) -> np.ndarray:
+    """Camino general: números directos y split por ':' sobre el resto de strings."""
+    result = pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    pending = np.isnan(result)
+    if not pending.any() or pd.api.types.infer_dtype(series[pending], skipna=True) not in ("string", "mixed"):
+        return result
+
+    text = series[pending].reset_index(drop=True).str.strip().str.rsplit(" ", n=1).str[-1].dropna()
+    if text.empty:
+        return result
+    parts = text.str.split(":", expand=True)
+    n_parts = text.str.count(":").to_numpy() + 1
+    fields = [pd.to_numeric(parts[c], errors="coerce").to_numpy(dtype=np.float64) for c in parts.columns]
+
+    seconds = np.full(len(text), np.nan, dtype=np.float64)
+    for n in (1, 2, 3):
+        mask = n_parts == n
+        if n <= len(fields) and mask.any():
+            seconds[mask] = _combine([f[mask] for f in fields[:n]])
+
+    result[np.flatnonzero(pending)[text.index.to_numpy()]] = seconds
+    return result
@@ -0,0 +1,447 @@
+# TACTIX_LIVE/utils/transports.py
+"""
+Capa de transporte intercambiable para publicar tracking y eventing.
+
+Todos los sinks exponen la misma interfaz que pubsub_v1.PublisherClient (topic_path, publish
+devolviendo un future) para que el simulador y publisher.py no dependan del backend:
+
+- PubSubSink: Google Cloud Pub/Sub (el comportamiento original).
+- MemorySink: colas en proceso, para tests y benchmarks sin red.
+- SocketSink + SocketBroker: broker local por TCP ("host:puerto") o socket Unix (ruta).
+- FileSink: archivo append-only con tramas, reproducible con read_frames().
+
+Se elige con la sección 'transport' de la configuración (ver create_sink).
+"""
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+from concurrent.futures import Future
+
+# Trama de los transportes locales: tipo, len(topic), len(atributos), len(payload)
+FRAME_HEADER = struct.Struct("!BHHI")
+KIND_PUBLISH = 1
+KIND_SUBSCRIBE = 2
+
+
+def pack_frame(kind: int, topic: str, data: bytes = b"", attrs: dict = None) -> bytes:
+    topic_b = topic.encode("utf-8")
+    attrs_b = json.dumps(attrs, separators=(",", ":")).encode("utf-8") if attrs else b""
+    return FRAME_HEADER.pack(kind, len(topic_b), len(attrs_b), len(data)) + topic_b + attrs_b + data
+
+
+def _unpack_body(header: bytes, body: bytes):
+    kind, n_topic, n_attrs, _ = FRAME_HEADER.unpack(header)
+    topic = body[:n_topic].decode("utf-8")
+    attrs = json.loads(body[n_topic:n_topic + n_attrs]) if n_attrs else {}
+    return kind, topic, attrs, body[n_topic + n_attrs:]
+
+
+def _body_size(header: bytes) -> int:
+    _, n_topic, n_attrs, n_data = FRAME_HEADER.unpack(header)
+    return n_topic + n_attrs + n_data
+
+
+def read_frame(stream):
+    """Lee una trama de un objeto tipo archivo -> (tipo, topic, atributos, datos) o None al final."""
+    header = stream.read(FRAME_HEADER.size)
+    if len(header) < FRAME_HEADER.size:
+        return None
+    body = stream.read(_body_size(header))
+    return _unpack_body(header, body)
+
+
+def read_frames(path: str):
+    """Itera (topic, datos, atributos) de un archivo escrito por FileSink."""
+    with open(path, "rb") as f:
+        while (frame := read_frame(f)) is not None:
+            _, topic, attrs, data = frame
+            yield topic, data, attrs
+
+
+def _done(result=None, error: Exception = None) -> Future:
+    future = Future()
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+    return future
+
+
+def parse_address(address: str):
+    """'host:puerto' -> (AF_INET, (host, puerto)); cualquier otra cosa es la ruta de un socket Unix."""
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit():
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    return socket.AF_UNIX, address
+
+
+class BaseSink:
+    """Interfaz común. publish() no bloquea y devuelve un Future que se resuelve al confirmar."""
+
+    name = "base"
+
+    def topic_path(self, project_id: str, topic: str) -> str:
+        return topic
+
+    def publish(self, topic: str, data: bytes, **attrs) -> Future:
+        raise NotImplementedError
+
+    def depth(self) -> int:
+        """Mensajes retenidos en el propio sink (cola local); 0 si no se puede medir."""
+        return 0
+
+    def close(self):
+        pass
+
+
+class PubSubSink(BaseSink):
+    """Google Cloud Pub/Sub. El future es el del cliente: se resuelve con el ack del broker."""
+
+    name = "pubsub"
+
+    def __init__(self, batch: dict = None, credentials=None):
+        # Import diferido: el resto de transportes funcionan sin las librerías de GCP
+        import google.auth
+        from google.cloud import pubsub_v1
+
+        if credentials is None:
+            credentials, _ = google.auth.default()
+        batch = batch or {}
+        settings = pubsub_v1.types.BatchSettings(
+            max_messages=batch.get('max_messages', 100),
+            max_bytes=batch.get('max_bytes', 1024 * 1024),
+            max_latency=batch.get('max_latency', 0.01),
+        )
+        self.client = pubsub_v1.PublisherClient(settings, credentials=credentials)
+
+    def topic_path(self, project_id: str, topic: str) -> str:
+        return self.client.topic_path(project_id, topic)
+
+    def publish(self, topic: str, data: bytes, **attrs) -> Future:
+        return self.client.publish(topic, data, **attrs)
+
+    def close(self):
+        self.client.stop()
+
+
+class MemorySink(BaseSink):
+    """
+    Una cola por topic dentro del proceso. Con maxsize > 0 y la cola llena, el future falla
+    con queue.Full (el mensaje no se encola) en lugar de bloquear al simulador.
+    """
+
+    name = "memory"
+
+    def __init__(self, maxsize: int = 0):
+        self.maxsize = maxsize
+        self._queues = {}
+        self._lock = threading.Lock()
+
+    def queue(self, topic: str) -> queue.Queue:
+        """Cola de un topic (se crea al primer uso, también desde el consumidor)."""
+        with self._lock:
+            if topic not in self._queues:
+                self._queues[topic] = queue.Queue(self.maxsize)
+            return self._queues[topic]
+
+    def publish(self, topic: str, data: bytes, **attrs) -> Future:
+        try:
+            self.queue(topic).put_nowait((data, attrs))
+        except queue.Full as e:
+            return _done(error=e)
+        return _done(topic)
+
+    def get(self, topic: str, timeout: float = None):
+        """(datos, atributos) del siguiente mensaje; queue.Empty si vence el timeout."""
+        return self.queue(topic).get(timeout=timeout)
+
+    def depth(self) -> int:
+        with self._lock:
+            queues = list(self._queues.values())
+        return sum(q.qsize() for q in queues)
+
+
+class FileSink(BaseSink):
+    """
+    Archivo append-only con una trama por mensaje (mismo formato que el broker por socket).
+    El future se resuelve al escribir en el buffer; close() vuelca a disco.
+    """
+
+    name = "file"
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._file = open(path, "ab")
+        self._lock = threading.Lock()
+
+    def publish(self, topic: str, data: bytes, **attrs) -> Future:
+        frame = pack_frame(KIND_PUBLISH, topic, data, attrs)
+        try:
+            with self._lock:
+                self._file.write(frame)
+        except (OSError, ValueError) as e:
+            return _done(error=e)
+        return _done(topic)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class SocketSink(BaseSink):
+    """
+    Publicador hacia un SocketBroker local. Un hilo escritor vacía la cola de salida; el future
+    se resuelve cuando la trama se entrega al socket (no hay ack de extremo a extremo).
+    """
+
+    name = "socket"
+
+    def __init__(self, address: str, timeout: float = 5.0):
+        family, addr = parse_address(address)
+        self._sock = socket.socket(family, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        self._sock.connect(addr)
+        if family == socket.AF_INET:
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._pending = queue.Queue()
+        self._error = None
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def publish(self, topic: str, data: bytes, **attrs) -> Future:
+        future = Future()
+        if self._error is not None:
+            future.set_exception(self._error)
+            return future
+        self._pending.put((pack_frame(KIND_PUBLISH, topic, data, attrs), future))
+        return future
+
+    def depth(self) -> int:
+        return self._pending.qsize()
+
+    def _write_loop(self):
+        while (item := self._pending.get()) is not None:
+            frames, futures = [item[0]], [item[1]]
+            # Agrupar lo que ya esté en cola en una sola escritura
+            while len(frames) < 256:
+                try:
+                    nxt = self._pending.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    self._pending.put(None)
+                    break
+                frames.append(nxt[0])
+                futures.append(nxt[1])
+            try:
+                if self._error is not None:
+                    raise self._error
+                self._sock.sendall(b"".join(frames))
+            except OSError as e:
+                self._error = e
+                for f in futures:
+                    f.set_exception(e)
+                continue
+            for f in futures:
+                f.set_result(None)
+
+    def close(self):
+        self._pending.put(None)
+        self._writer.join(timeout=5.0)
+        self._sock.close()
+
+
+class SocketSubscriber:
+    """Consumidor de un SocketBroker: se suscribe a uno o varios topics y recibe sus tramas."""
+
+    def __init__(self, address: str, topics, timeout: float = None):
+        family, addr = parse_address(address)
+        self._sock = socket.socket(family, socket.SOCK_STREAM)
+        self._sock.connect(addr)
+        self._sock.settimeout(timeout)
+        self._stream = self._sock.makefile("rb")
+        for topic in ([topics] if isinstance(topics, str) else topics):
+            self._sock.sendall(pack_frame(KIND_SUBSCRIBE, topic))
+
+    def recv(self):
+        """(topic, datos, atributos) del siguiente mensaje; None si el broker cerró la conexión."""
+        frame = read_frame(self._stream)
+        if frame is None:
+            return None
+        _, topic, attrs, data = frame
+        return topic, data, attrs
+
+    def close(self):
+        self._stream.close()
+        self._sock.close()
+
+
+class _BrokerHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        broker = self.server.broker
+        stream = self.request.makefile("rb")
+        try:
+            while True:
+                header = stream.read(FRAME_HEADER.size)
+                if len(header) < FRAME_HEADER.size:
+                    return
+                body = stream.read(_body_size(header))
+                kind, topic, _, _ = _unpack_body(header, body)
+                if kind == KIND_SUBSCRIBE:
+                    broker.subscribe(topic, self.request)
+                elif kind == KIND_PUBLISH:
+                    broker.fan_out(topic, header + body)
+        except OSError:
+            return
+        finally:
+            broker.unsubscribe(self.request)
+            stream.close()
+
+
+class _SubscriberQueue:
+    """
+    Salida de un suscriptor del broker: cola acotada de tramas y un único hilo escritor, así las
+    tramas de varios publicadores no se intercalan en el socket y un suscriptor lento no bloquea
+    los hilos de los publicadores (con la cola llena, put devuelve False y el broker lo desconecta).
+    """
+
+    def __init__(self, broker, conn, maxsize: int):
+        self.broker = broker
+        self.conn = conn
+        self._queue = queue.Queue(maxsize)
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def put(self, frame: bytes) -> bool:
+        try:
+            self._queue.put_nowait(frame)
+        except queue.Full:
+            return False
+        return True
+
+    def _write_loop(self):
+        while (frame := self._queue.get()) is not None:
+            try:
+                self.conn.sendall(frame)
+            except OSError:
+                self.broker.unsubscribe(self.conn)
+                return
+
+    def close(self):
+        """Para el escritor y corta el socket (desbloquea un sendall y la lectura del handler)."""
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        try:
+            self.conn.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class SocketBroker:
+    """
+    Broker local mínimo (fan-out por topic) sobre TCP o socket Unix, sin persistencia.
+    Un hilo por conexión y un hilo escritor por suscriptor con una cola de 'max_queue' tramas;
+    los suscriptores caídos o lentos (cola llena) se desconectan.
+    Uso: python -m TACTIX_LIVE.utils.transports 127.0.0.1:7070
+    """
+
+    def __init__(self, address: str, max_queue: int = 10000):
+        family, addr = parse_address(address)
+        if family == socket.AF_UNIX:
+            if os.path.exists(addr):
+                os.remove(addr)
+            server_cls = socketserver.ThreadingUnixStreamServer
+        else:
+            server_cls = socketserver.ThreadingTCPServer
+        server_cls.allow_reuse_address = True
+        server_cls.daemon_threads = True
+        self._server = server_cls(addr, _BrokerHandler)
+        self._server.broker = self
+        self.max_queue = max_queue
+        self._subscribers = {}  # topic -> conexiones suscritas
+        self._queues = {}       # conexión -> _SubscriberQueue
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def address(self) -> str:
+        addr = self._server.server_address
+        return f"{addr[0]}:{addr[1]}" if isinstance(addr, tuple) else addr
+
+    def subscribe(self, topic: str, conn):
+        with self._lock:
+            if conn not in self._queues:
+                self._queues[conn] = _SubscriberQueue(self, conn, self.max_queue)
+            self._subscribers.setdefault(topic, set()).add(conn)
+
+    def unsubscribe(self, conn):
+        with self._lock:
+            for conns in self._subscribers.values():
+                conns.discard(conn)
+            out = self._queues.pop(conn, None)
+        if out is not None:
+            out.close()
+
+    def fan_out(self, topic: str, frame: bytes):
+        """Encola la trama para cada suscriptor del topic (no bloquea); los que no dan abasto se desconectan."""
+        with self._lock:
+            queues = [self._queues[conn] for conn in self._subscribers.get(topic, ()) if conn in self._queues]
+        for out in queues:
+            if not out.put(frame):
+                self.unsubscribe(out.conn)
+
+    def start(self):
+        """Atiende conexiones en un hilo de fondo y devuelve el broker."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+        with self._lock:
+            conns = list(self._queues)
+        for conn in conns:
+            self.unsubscribe(conn)
+
+
+def create_sink(config: dict) -> BaseSink:
+    """
+    Sink según config['transport'] (por defecto Pub/Sub, como antes):
+      {"type": "pubsub"}                               -> usa config['pubsub']['batch']
+      {"type": "memory", "maxsize": 0}
+      {"type": "socket", "address": "127.0.0.1:7070"}  (o la ruta de un socket Unix)
+      {"type": "file", "path": "data/stream.bin"}
+    """
+    transport = config.get('transport', {})
+    kind = transport.get('type', 'pubsub')
+    if kind == 'pubsub':
+        return PubSubSink(config.get('pubsub', {}).get('batch'))
+    if kind == 'memory':
+        return MemorySink(transport.get('maxsize', 0))
+    if kind == 'socket':
+        return SocketSink(transport.get('address', '127.0.0.1:7070'))
+    if kind == 'file':
+        return FileSink(transport.get('path', os.path.join('data', 'stream.bin')))
+    raise ValueError(f"Transporte desconocido: '{kind}' (pubsub, memory, socket, file)")
+
+
+if __name__ == "__main__":
+    import sys
+
+    broker = SocketBroker(sys.argv[1] if len(sys.argv) > 1 else "127.0.0.1:7070")
+    print(f"📡 Broker local escuchando en {broker.address}")
+    try:
+        broker.serve_forever()
+    except KeyboardInterrupt:
+        broker.close()
@@ -0,0 +1,385 @@
+# TACTIX_LIVE/utils/wire_format.py
+"""
+Formato binario compacto de los frames de tracking (little-endian, versión 3).
+
+    cabecera  HEADER_DTYPE (23 bytes): magic b"TX", versión, tipo, flags, secuencia (fila del
+              FrameStore), frame, periodo, game_time en ms (INT32_MIN si es nulo), nº de
+              jugadores (keyframe) o de entidades (delta), len(timestamp), len(extras)
+    timestamp texto original (UTF-8)
+    extras    resto de claves del frame en JSON compacto (possession, ...)
+    balón     3 x int16 en cm (solo si flags & FLAG_BALL)
+
+Keyframe (KIND_FRAME), frame completo:
+    jugadores n x PLAYER_DTYPE (7 bytes): índice de entidad del Roster, x/y en cm, is_detected
+              (-1 = no informado, 0/1, 2 = posición imputada por el preprocesado)
+
+Delta (KIND_DELTA), cambios respecto al frame anterior (secuencia - 1):
+    5 bitmaps de E bits: presente, absoluto, is_detected informado, is_detected True, imputado
+    absolutos  int16 x/y de los presentes marcados (apariciones o saltos > 127 cm)
+    deltas     int8 dx/dy del resto de presentes
+    extras vacíos + FLAG_SAME_EXTRAS = iguales a los del frame anterior
+
+Las coordenadas se cuantizan a centímetros (int16: +-327 m) y los jugadores viajan como
+índices enteros del Roster; nombres y equipos se publican aparte (ver roster_message y
+read_roster), igual que en el modo JSON, cuyos frames tampoco repiten los metadatos.
+Los deltas se calculan sobre valores ya cuantizados, así que no acumulan error. Un frame con un
+timestamp de más de 255 bytes o unos extras de más de 65535 no cabe (no se trunca): encode_frames
+devuelve None en su lugar, el publicador lo envía en JSON (json_frame) y el siguiente va como keyframe.
+Los frames se codifican por bloques con NumPy durante la carga: el loop solo envía bytes.
+"""
+import json
+
+import numpy as np
+
+from TACTIX_LIVE.utils.frame_store import FrameStore, Roster
+
+MAGIC = b"TX"
+VERSION = 3
+KIND_FRAME = 0
+KIND_DELTA = 1
+
+FLAG_BALL = 0x01
+# Bits 1-2: is_detected del balón (0 = no informado, 1 = False, 2 = True)
+BALL_DETECTED_SHIFT = 1
+FLAG_SAME_EXTRAS = 0x08
+
+SCALE = 100.0  # cm
+MISSING = np.iinfo(np.int16).min
+IMPUTED = 2  # Valor de 'detected' en el cable para posiciones interpoladas
+NULL_TIME = np.iinfo(np.int32).min
+
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S2'), ('version', 'u1'), ('kind', 'u1'), ('flags', 'u1'), ('seq', '<u4'), ('frame', '<i4'),
+    ('period', 'u1'), ('game_time_ms', '<i4'), ('n_players', '<u2'), ('ts_len', 'u1'), ('extras_len', '<u2'),
+])
+PLAYER_DTYPE = np.dtype([('idx', '<u2'), ('x', '<i2'), ('y', '<i2'), ('detected', 'i1')])
+BALL_DTYPE = np.dtype([('x', '<i2'), ('y', '<i2'), ('z', '<i2')])
+DELTA_MAX = np.iinfo(np.int8).max
+
+
+def is_binary(data: bytes) -> bool:
+    """True si el mensaje es un frame binario (los mensajes JSON empiezan por '{')."""
+    return data[:2] == MAGIC
+
+
+def quantize(values: np.ndarray) -> np.ndarray:
+    """Metros (float, NaN = ausente) -> cm en int16 con saturación; NaN -> MISSING."""
+    q = np.round(np.nan_to_num(values, nan=0.0) * SCALE)
+    q = np.clip(q, MISSING + 1, np.iinfo(np.int16).max).astype(np.int16)
+    return np.where(np.isnan(values), MISSING, q).astype(np.int16)
+
+
+def dequantize(values: np.ndarray) -> list:
+    """Inversa de quantize -> lista de float (None para MISSING)."""
+    return [None if v == MISSING else v / SCALE for v in values.tolist()]
+
+
+TS_MAX = np.iinfo(np.uint8).max
+EXTRAS_MAX = np.iinfo(np.uint16).max
+
+
+def _text_bytes(values) -> list:
+    return [b"" if v is None else str(v).encode("utf-8") for v in values]
+
+
+def _slices(buf: bytes, sizes) -> list:
+    """Parte un buffer contiguo en trozos consecutivos de los tamaños dados."""
+    offsets = np.concatenate(([0], np.cumsum(sizes))).tolist()
+    return [buf[a:b] for a, b in zip(offsets[:-1], offsets[1:])]
+
+
+def _keyframe_sections(q: np.ndarray, present: np.ndarray, det: np.ndarray) -> list:
+    rows, ents = np.nonzero(present)  # orden fila a fila: jugadores de cada frame contiguos
+    players = np.empty(len(rows), dtype=PLAYER_DTYPE)
+    players['idx'] = ents
+    players['x'] = q[rows, ents, 0]
+    players['y'] = q[rows, ents, 1]
+    players['detected'] = det[rows, ents]
+    return _slices(players.tobytes(), present.sum(axis=1) * PLAYER_DTYPE.itemsize)
+
+
+def _delta_sections(q_prev, q, present_prev, present, det) -> list:
+    d = q.astype(np.int32) - q_prev.astype(np.int32)
+    small = present & present_prev & (np.abs(d) <= DELTA_MAX).all(axis=2)
+    absolute = present & ~small
+
+    bitmaps = np.hstack([np.packbits(m, axis=1, bitorder='little')
+                         for m in (present, absolute, det >= 0, det == 1, det == IMPUTED)])
+    rows, ents = np.nonzero(absolute)
+    abs_bytes = _slices(q[rows, ents].tobytes(), absolute.sum(axis=1) * 4)
+    rows, ents = np.nonzero(small)
+    small_bytes = _slices(d[rows, ents].astype(np.int8).tobytes(), small.sum(axis=1) * 2)
+    return [b"".join((bm.tobytes(), a, s)) for bm, a, s in zip(bitmaps, abs_bytes, small_bytes)]
+
+
+def encode_frames(store: FrameStore, start: int = 0, stop: int = None, keyframe_interval: int = 0) -> list:
+    """
+    Codifica los frames [start, stop) del FrameStore -> lista de bytes (uno por frame).
+    keyframe_interval=N > 0: keyframe en las filas múltiplo de N y deltas entre medias (la base
+    del primer delta es la fila start - 1, así que se puede codificar por bloques).
+    Los frames cuyos textos no caben en la cabecera salen como None (se envían en JSON, sin
+    truncar) y el frame siguiente del bloque se codifica como keyframe.
+    """
+    stop = len(store) if stop is None else stop
+    n = stop - start
+    if n <= 0:
+        return []
+
+    # Fila anterior al bloque (o una vacía al inicio) como base de los deltas
+    if start > 0:
+        xy, det = store.xy[start - 1:stop], store.detected[start - 1:stop]
+        det = np.where(store.imputed[start - 1:stop], IMPUTED, det).astype(np.int8)
+        prev_extras = store.extras[start - 1:stop - 1]
+    else:
+        n_ent = store.xy.shape[1]
+        xy = np.concatenate([np.full((1, n_ent, 2), np.nan, dtype=np.float32), store.xy[:stop]])
+        det = np.concatenate([np.full((1, n_ent), -1, dtype=np.int8),
+                              np.where(store.imputed[:stop], IMPUTED, store.detected[:stop]).astype(np.int8)])
+        prev_extras = np.concatenate([[None], store.extras[:stop - 1]])
+    q = quantize(xy)
+    present = ~np.isnan(xy[..., 0])
+
+    timestamps = _text_bytes(store.timestamp[start:stop])
+    extras_values = store.extras[start:stop]
+    extras_text = _text_bytes(extras_values)
+    oversized = np.array([len(t) > TS_MAX or len(e) > EXTRAS_MAX for t, e in zip(timestamps, extras_text)],
+                         dtype=bool)
+
+    seq = np.arange(start, stop)
+    is_key = seq % keyframe_interval == 0 if keyframe_interval > 0 else np.ones(n, dtype=bool)
+    is_key[1:] |= oversized[:-1]  # El consumidor no tiene la base binaria del frame enviado en JSON
+    key, delta = np.flatnonzero(is_key), np.flatnonzero(~is_key)
+    sections = [b""] * n
+    for i, b in zip(key, _keyframe_sections(q[1:][key], present[1:][key], det[1:][key])):
+        sections[i] = b
+    if len(delta):
+        for i, b in zip(delta, _delta_sections(q[:-1][delta], q[1:][delta], present[:-1][delta],
+                                               present[1:][delta], det[1:][delta])):
+            sections[i] = b
+
+    same_extras = ~is_key & np.array([e is not None and e == p for e, p in zip(extras_values, prev_extras)],
+                                     dtype=bool)
+    extras = [b"" if same or big else e for same, big, e in zip(same_extras, oversized, extras_text)]
+    timestamps = [b"" if big else t for big, t in zip(oversized, timestamps)]
+
+    header = np.zeros(n, dtype=HEADER_DTYPE)
+    header['magic'] = MAGIC
+    header['version'] = VERSION
+    header['kind'] = np.where(is_key, KIND_FRAME, KIND_DELTA)
+    header['seq'] = seq
+    header['frame'] = store.frame[start:stop]
+    header['period'] = np.clip(store.period[start:stop], 0, 255)
+    game_time = store.game_time[start:stop]
+    header['game_time_ms'] = np.where(np.isnan(game_time), NULL_TIME,
+                                      np.round(np.nan_to_num(game_time) * 1000)).astype(np.int32)
+    header['n_players'] = np.where(is_key, present[1:].sum(axis=1), present.shape[1])
+    header['ts_len'] = [len(t) for t in timestamps]
+    header['extras_len'] = [len(e) for e in extras]
+    flags = np.where(same_extras, FLAG_SAME_EXTRAS, 0)
+
+    if store.has_ball:
+        ball = np.empty(n, dtype=BALL_DTYPE)
+        qb = quantize(store.ball[start:stop])
+        ball['x'], ball['y'], ball['z'] = qb[:, 0], qb[:, 1], qb[:, 2]
+        flags |= FLAG_BALL | ((store.ball_detected[start:stop] + 1) << BALL_DETECTED_SHIFT)
+        ball_bytes = _slices(ball.tobytes(), np.full(n, BALL_DTYPE.itemsize))
+    else:
+        ball_bytes = [b""] * n
+    header['flags'] = flags
+
+    headers = _slices(header.tobytes(), np.full(n, HEADER_DTYPE.itemsize))
+    return [None if big else b"".join(parts)
+            for big, parts in zip(oversized, zip(headers, timestamps, extras, ball_bytes, sections))]
+
+
+def _read_header(data: bytes):
+    header = np.frombuffer(data, dtype=HEADER_DTYPE, count=1)[0]
+    if header['magic'] != MAGIC or header['version'] != VERSION:
+        raise ValueError(f"Mensaje no es un frame binario TX v{VERSION}")
+    return header
+
+
+def _decode_common(header, data: bytes, prev_extras: bytes = None):
+    """Campos comunes a keyframes y deltas -> (payload sin jugadores, extras en bytes, posición)."""
+    pos = HEADER_DTYPE.itemsize
+    timestamp = data[pos:pos + header['ts_len']].decode("utf-8") or None
+    pos += int(header['ts_len'])
+    extras = data[pos:pos + header['extras_len']]
+    pos += int(header['extras_len'])
+    flags = int(header['flags'])
+    if flags & FLAG_SAME_EXTRAS:
+        extras = prev_extras or b""
+
+    game_time_ms = int(header['game_time_ms'])
+    payload = {
+        'frame': int(header['frame']),
+        'timestamp': timestamp,
+        'period': int(header['period']),
+        'game_time': None if game_time_ms == NULL_TIME else game_time_ms / 1000,
+    }
+    if extras:
+        payload.update(json.loads(extras))
+
+    if flags & FLAG_BALL:
+        x, y, z = dequantize(np.frombuffer(data, dtype=np.int16, count=3, offset=pos))
+        det = (flags >> BALL_DETECTED_SHIFT) & 0x03
+        payload['ball_data'] = {'x': x, 'y': y, 'z': z, 'is_detected': None if det == 0 else det == 2}
+        pos += BALL_DTYPE.itemsize
+    return payload, extras, pos
+
+
+def _player_list(ents, qx, qy, dets, roster: Roster = None) -> list:
+    out = []
+    for idx, x, y, det in zip(ents.tolist(), dequantize(qx), dequantize(qy), dets.tolist()):
+        p = {'x': x, 'y': y, 'player_id': roster.player_ids[idx] if roster is not None else idx}
+        if det == IMPUTED:
+            p['is_detected'] = False
+            p['imputed'] = True
+        elif det >= 0:
+            p['is_detected'] = bool(det)
+        if roster is not None:
+            p.update(roster.player_meta(idx))
+        out.append(p)
+    return out
+
+
+def decode_frame(data: bytes, roster: Roster = None) -> dict:
+    """
+    Keyframe binario -> dict con la forma del JSONL original (coordenadas redondeadas a cm).
+    Con roster se resuelven player_id y metadatos; sin él, 'player_id' es el índice de entidad.
+    Los deltas necesitan el frame anterior: usar StreamDecoder.
+    """
+    header = _read_header(data)
+    if header['kind'] != KIND_FRAME:
+        raise ValueError("Frame delta: se decodifica con StreamDecoder")
+    payload, _, pos = _decode_common(header, data)
+    players = np.frombuffer(data, dtype=PLAYER_DTYPE, count=int(header['n_players']), offset=pos)
+    payload['player_data'] = _player_list(players['idx'], players['x'], players['y'], players['detected'], roster)
+    return payload
+
+
+class StreamDecoder:
+    """
+    Decodificador con estado para el stream keyframe + delta (también acepta solo keyframes).
+
+    Un suscriptor que se une tarde, o que pierde o recibe desordenado un mensaje (Pub/Sub no
+    garantiza orden), descarta deltas hasta el siguiente keyframe: decode() devuelve None y
+    se cuenta en 'dropped'. La resincronización tarda como mucho un intervalo de keyframe.
+    """
+
+    def __init__(self, roster: Roster = None):
+        self.roster = roster
+        self.dropped = 0
+        self._seq = None
+        self._extras = None
+        self._q = np.zeros((0, 2), dtype=np.int16)
+        self._present = np.zeros(0, dtype=bool)
+        self._det = np.zeros(0, dtype=np.int8)
+
+    def _resize(self, n_ent: int):
+        if n_ent > len(self._present):
+            grow = n_ent - len(self._present)
+            self._q = np.vstack([self._q, np.full((grow, 2), MISSING, dtype=np.int16)])
+            self._present = np.concatenate([self._present, np.zeros(grow, dtype=bool)])
+            self._det = np.concatenate([self._det, np.full(grow, -1, dtype=np.int8)])
+
+    def _advance(self, data: bytes):
+        """
+        Aplica un mensaje al estado (posiciones cuantizadas de todas las entidades).
+        Devuelve (payload sin jugadores, extras en bytes) o None si es un delta sin base.
+        """
+        header = _read_header(data)
+        seq = int(header['seq'])
+
+        if header['kind'] == KIND_FRAME:
+            payload, extras, pos = _decode_common(header, data)
+            players = np.frombuffer(data, dtype=PLAYER_DTYPE, count=int(header['n_players']), offset=pos)
+            idx = players['idx'].astype(np.intp)
+            self._resize(int(idx.max()) + 1 if len(idx) else 0)
+            self._present[:] = False
+            self._present[idx] = True
+            self._q[idx, 0], self._q[idx, 1] = players['x'], players['y']
+            self._det[idx] = players['detected']
+        else:
+            if self._seq is None or seq != self._seq + 1:
+                self._seq = None  # Falta la base: esperar al siguiente keyframe
+                self.dropped += 1
+                return None
+            payload, extras, pos = _decode_common(header, data, self._extras)
+            n_ent = int(header['n_players'])
+            self._resize(n_ent)
+            n_bytes = (n_ent + 7) // 8
+            bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8, count=5 * n_bytes, offset=pos).reshape(5, -1),
+                                 axis=1, bitorder='little')[:, :n_ent].astype(bool)
+            present, absolute, reported, det_true, imputed = bits
+            pos += 5 * n_bytes
+            small = present & ~absolute
+            n_abs, n_small = int(absolute.sum()), int(small.sum())
+
+            q = self._q[:n_ent]
+            q[absolute] = np.frombuffer(data, dtype='<i2', count=2 * n_abs, offset=pos).reshape(-1, 2)
+            pos += 4 * n_abs
+            q[small] += np.frombuffer(data, dtype=np.int8, count=2 * n_small, offset=pos).reshape(-1, 2)
+            self._present[:] = False
+            self._present[:n_ent] = present
+            self._det[:n_ent] = np.where(imputed, IMPUTED, np.where(reported, det_true, -1))
+
+        self._seq = seq
+        self._extras = extras
+        return payload, extras
+
+    def decode(self, data: bytes) -> dict | None:
+        advanced = self._advance(data)
+        if advanced is None:
+            return None
+        payload, _ = advanced
+        ents = np.flatnonzero(self._present)
+        payload['player_data'] = _player_list(ents, self._q[ents, 0], self._q[ents, 1], self._det[ents], self.roster)
+        return payload
+
+    def decode_into(self, data: bytes, store: FrameStore) -> bool:
+        """
+        Camino columnar para consumidores: añade el frame como una fila de 'store' (cuyo Roster
+        debe ser el de la tabla publicada) sin construir dicts por jugador. False si se descarta.
+        """
+        advanced = self._advance(data)
+        if advanced is None:
+            return False
+        payload, extras = advanced
+        ents = np.flatnonzero(self._present)
+        det = self._det[ents]
+        ball = payload.get('ball_data')
+        store.append_frame(
+            payload['frame'], payload['period'], payload['game_time'], payload['timestamp'], ents,
+            self._q[ents].astype(np.float32) / np.float32(SCALE), np.where(det == IMPUTED, 0, det), det == IMPUTED,
+            None if ball is None else (ball['x'], ball['y'], ball['z']),
+            -1 if ball is None or ball['is_detected'] is None else int(ball['is_detected']),
+            extras.decode("utf-8") if extras else None,
+        )
+        return True
+
+
+def json_frame(store: FrameStore, idx: int) -> bytes:
+    """
+    Frame idx del store en JSON (el payload original, sin metadatos de jugador). Se serializa
+    al enviar: a diferencia del binario, el JSON de un partido entero no cabe en memoria.
+    """
+    return json.dumps(store.record(idx, enrich=False), default=str).encode("utf-8")
+
+
+def roster_message(roster: Roster) -> bytes:
+    """Tabla de jugadores/equipos (JSON) que los consumidores necesitan para resolver los índices."""
+    return json.dumps({'type': 'roster', 'version': VERSION, **roster.to_dict()}, default=str).encode("utf-8")
+
+
+def read_roster(data: bytes) -> Roster | None:
+    """Inversa de roster_message; None si el mensaje es un frame u otro tipo de JSON."""
+    if is_binary(data) or not data.lstrip().startswith(b"{"):
+        return None
+    try:
+        message = json.loads(data)
+    except ValueError:
+        return None
+    if not isinstance(message, dict) or message.get('type') != 'roster':
+        return None
+    return Roster.from_dict(message)
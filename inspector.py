@@ -1,8 +1,17 @@
-# inspector.py (V1.1 - Range View)
+# inspector.py (V1.2 - Range View indexado)
 import streamlit as st
 import pandas as pd
 import json
 import os
+import sys
+
+project_root = os.path.abspath(os.path.dirname(__file__))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from TACTIX_LIVE.utils.line_index import CsvPager, JsonlReader  # noqa: E402
+
+MAX_RANGE = 1000
 
 # Configuración de la página
 st.set_page_config(
@@ -28,8 +37,8 @@ st.markdown("""
 
 # --- BARRA LATERAL: SELECCIÓN DE ARCHIVO ---
 with st.sidebar:
-    st.title("🔍 Inspector V1.1")
-    st.caption("Exploración por Rangos")
+    st.title("🔍 Inspector V1.2")
+    st.caption("Exploración por Rangos (índice de offsets + mmap)")
 
     data_folder = "data"
     if not os.path.exists(data_folder):
@@ -46,60 +55,77 @@ with st.sidebar:
     file_path = os.path.join(data_folder, selected_file)
 
     st.divider()
-    st.info(f"📂 Cargando: {selected_file}")
+    st.info(f"📂 {selected_file} · {os.path.getsize(file_path) / 1e6:,.1f} MB")
 
 # --- LÓGICA PRINCIPAL ---
 
+
+@st.cache_resource(max_entries=8)
+def open_reader(path, mtime_ns):
+    """
+    Lector indexado por archivo (y versión: mtime). El índice de offsets se guarda junto al
+    archivo, así que reabrirlo o cambiar de archivo no vuelve a leerlo entero.
+    """
+    return JsonlReader(path) if path.endswith('.jsonl') else CsvPager(path)
+
+
+def range_controls(total, key):
+    """Controles Desde/Hasta (máx. MAX_RANGE filas) -> (inicio, fin)."""
+    c1, c2, c3 = st.columns([1, 1, 2])
+    with c1:
+        start_idx = st.number_input("Desde (Índice)", min_value=0, max_value=max(total - 1, 0),
+                                    key=f"{key}_start")
+    with c2:
+        # Por defecto mostramos 10 registros
+        end_idx = st.number_input(
+            "Hasta (Índice - No incluido)",
+            min_value=min(start_idx + 1, total),
+            max_value=total,
+            value=min(start_idx + 10, total))
+    range_size = end_idx - start_idx
+    with c3:
+        st.write("###")  # Espaciador
+        if range_size > MAX_RANGE:
+            st.error(f"⚠️ El rango seleccionado ({range_size} objetos) supera el límite de {MAX_RANGE}.")
+            st.stop()
+        else:
+            st.info(f"Visualizando **{range_size}** objetos")
+    return start_idx, end_idx
+
+
 st.header(f"Analizando: `{selected_file}`")
 
 try:
     # === MODO JSONL (TRACKING) ===
     if selected_file.endswith('.jsonl'):
+        with st.spinner("Indexando archivo (solo la primera vez)..."):
+            reader = open_reader(file_path, os.stat(file_path).st_mtime_ns)
 
-        @st.cache_data
-        def load_jsonl(path):
-            data = []
-            with open(path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.strip():
-                        data.append(json.loads(line))
-            return data
-
-        with st.spinner("Cargando archivo completo en memoria..."):
-            records = load_jsonl(file_path)
-
-        total_records = len(records)
-        st.success(f"✅ Archivo cargado. Total Objetos: **{total_records:,}**")
+        total_records = len(reader)
+        st.success(f"✅ Archivo indexado. Total Objetos: **{total_records:,}**")
 
         st.divider()
 
-        # --- CONTROLES DE RANGO ---
-        c1, c2, c3 = st.columns([1, 1, 2])
-
-        with c1:
-            start_idx = st.number_input("Desde (Índice)", min_value=0, max_value=total_records - 1, value=0)
-
-        with c2:
-            # Por defecto mostramos 10 registros
-            default_end = min(start_idx + 10, total_records)
-            end_idx = st.number_input(
-                "Hasta (Índice - No incluido)",
-                min_value=start_idx + 1,
-                max_value=total_records,
-                value=default_end)
-
-        range_size = end_idx - start_idx
-
-        with c3:
+        # --- SALTO POR FRAME ---
+        key = f"jsonl_{selected_file}"
+        j1, j2 = st.columns([1, 3])
+        with j1:
+            target_frame = st.number_input("Ir a frame", min_value=0, value=0, step=1)
+        with j2:
             st.write("###")  # Espaciador
-            if range_size > 1000:
-                st.error(f"⚠️ El rango seleccionado ({range_size} objetos) supera el límite de 1000.")
-                st.stop()
-            else:
-                st.info(f"Visualizando **{range_size}** objetos")
+            if st.button("⏩ Ir"):
+                row = reader.row_of_frame(int(target_frame))
+                if row is None:
+                    st.warning("No hay frames a partir de ese número.")
+                else:
+                    st.session_state[f"{key}_start"] = row
+                    st.rerun()
+
+        # --- CONTROLES DE RANGO ---
+        start_idx, end_idx = range_controls(total_records, key)
 
-        # --- VISUALIZACIÓN ---
-        subset = records[start_idx:end_idx]
+        # --- VISUALIZACIÓN (solo se leen y parsean las líneas del rango) ---
+        subset = reader.records(start_idx, end_idx)
 
         tab1, tab2 = st.tabs(["📄 Vista JSON (Árbol)", "📊 Vista Tabla (Resumen)"])
 
@@ -111,26 +137,19 @@ try:
             st.caption("Vista aplanada de primer nivel para detectar patrones.")
             # Convertimos a DF para ver tabla fácil
             df_preview = pd.json_normalize(subset, max_level=0)
+            df_preview.index = range(start_idx, start_idx + len(df_preview))
             st.dataframe(df_preview, use_container_width=True)
 
     # === MODO CSV (EVENTING) ===
     elif selected_file.endswith('.csv'):
-        df = pd.read_csv(file_path)
-        st.write(f"Dimensiones: {df.shape[0]} filas x {df.shape[1]} columnas")
-
-        # Filtro de rango para CSV también
-        c1, c2 = st.columns(2)
-        with c1:
-            start_row = st.number_input("Fila Inicial", 0, len(df) - 1, 0)
-        with c2:
-            end_row = st.number_input("Fila Final", start_row + 1, len(df), min(start_row + 100, len(df)))
+        pager = open_reader(file_path, os.stat(file_path).st_mtime_ns)
+        page = pager.page(0, 1)
+        st.write(f"Dimensiones: {len(pager)} filas x {page.shape[1]} columnas (separador `{pager.sep}`)")
 
-        if end_row - start_row > 1000:
-            st.warning("Mostrando solo los primeros 1000 del rango seleccionado por rendimiento.")
-            end_row = start_row + 1000
+        start_row, end_row = range_controls(len(pager), f"csv_{selected_file}")
 
         st.subheader("Vista de Tabla")
-        st.dataframe(df.iloc[start_row:end_row], use_container_width=True)
+        st.dataframe(pager.page(start_row, end_row), use_container_width=True)
 
     # === MODO JSON (IDS) ===
     elif selected_file.endswith('.json'):
@@ -2,9 +2,11 @@
 # ⚠️ IMPORTANTE: Este script DEBE estar en la raíz de tu proyecto.
 
 import pandas as pd
+import numpy as np
+import heapq
+import itertools
 import json
 import time
-from google.cloud import pubsub_v1
 import os
 import sys
 
@@ -17,6 +19,11 @@ if project_root not in sys.path:
 
 try:
     from TACTIX_LIVE.utils.config_loader import load_config
+    from TACTIX_LIVE.utils.match_loader import load_match
+    from TACTIX_LIVE.utils.match_cache import MatchCache
+    from TACTIX_LIVE.utils.preprocess import preprocess_options
+    from TACTIX_LIVE.utils.transports import create_sink
+    from TACTIX_LIVE.utils.wire_format import roster_message
 except ImportError as e:
     print(f"❌ ERROR CRÍTICO: {e}")
     print("Verifica que TACTIX_LIVE/utils/config_loader.py exista.")
@@ -27,64 +34,6 @@ except ImportError as e:
 # =========================================================================
 
 
-def time_to_seconds(time_val) -> float | None:
-    """
-    Convierte cualquier formato de tiempo (HH:MM:SS.ss, MM:SS.ss o float) a segundos.
-    """
-    if pd.isna(time_val) or time_val == "" or time_val is None:
-        return None
-
-    # Si ya es número, retornarlo
-    if isinstance(time_val, (int, float)):
-        return float(time_val)
-
-    try:
-        time_str = str(time_val).strip()
-        parts = time_str.split(':')
-
-        if len(parts) == 3:   # HH:MM:SS.ss
-            h, m, s = map(float, parts)
-            return h * 3600 + m * 60 + s
-        elif len(parts) == 2:  # MM:SS.ss
-            m, s = map(float, parts)
-            return m * 60 + s
-        else:
-            return float(time_str)  # Intento final si es un string numérico
-    except Exception:
-        return None
-
-
-def load_ids_map(file_path: str) -> dict:
-    """Carga ids_tracking.json con codificación UTF-8."""
-    print(f"   -> Cargando mapa de IDs: {file_path}")
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        player_map = {}
-        # Adaptado para la estructura típica de tracking providers (Opta, SkillCorner, etc.)
-        # Si el JSON es un objeto directo de equipos o una lista
-        iterator = data.values() if isinstance(data, dict) else data
-
-        for team_data in iterator:
-            # Manejo flexible de claves por si varían
-            team_id = team_data.get('team_id') or team_data.get('id')
-            team_name = team_data.get('team_name') or team_data.get('name')
-
-            for player in team_data.get('players', []):
-                p_id = player.get('player_id') or player.get('id')
-                if p_id:
-                    player_map[p_id] = {
-                        'team_id': team_id,
-                        'team_name': team_name,
-                        'player_name': player.get('player_name') or player.get('name') or player.get('nickname')
-                    }
-        return player_map
-    except Exception as e:
-        print(f"   ⚠️ Advertencia: No se pudo cargar mapa de IDs ({e}). Se enviarán IDs crudos.")
-        return {}
-
-
 def publish_message(publisher, topic_path, data, data_type):
     try:
         message_json = json.dumps(data, default=str)
@@ -114,14 +63,15 @@ TRACKING_FILE = "data/tracking_file.jsonl"
 EVENTING_FILE = "data/eventing_file.csv"
 IDS_FILE = "data/ids_tracking.json"
 
-print("🔌 Conectando a Google Cloud Pub/Sub...")
+TRANSPORT = CONFIG.get('transport', {}).get('type', 'pubsub')
+print(f"🔌 Conectando transporte '{TRANSPORT}'...")
 try:
-    publisher = pubsub_v1.PublisherClient()
+    publisher = create_sink(CONFIG)
     path_track = publisher.topic_path(PROJECT_ID, TOPIC_TRACKING)
     path_event = publisher.topic_path(PROJECT_ID, TOPIC_EVENTING)
     print(f"✅ Conexión exitosa. Velocidad simulación: {SPEED_MULTIPLIER}x")
 except Exception as e:
-    print(f"❌ Error de Credenciales GCP: {e}")
+    print(f"❌ Error de conexión ({TRANSPORT}): {e}")
     sys.exit(1)
 
 # =========================================================================
@@ -131,112 +81,92 @@ except Exception as e:
 
 def load_data():
     print("\n📂 Cargando Datasets...")
+    sources = {'tracking': TRACKING_FILE, 'eventing': EVENTING_FILE, 'ids': IDS_FILE}
 
-    # --- 1. IDs ---
-    id_map = load_ids_map(IDS_FILE)
-
-    # --- 2. TRACKING (JSONL) ---
+    # --- 1. IDs + TRACKING (JSONL) + EVENTING (CSV), desde la caché si las fuentes no cambiaron ---
+    start = time.time()
     try:
-        print(f"   -> Leyendo Tracking: {TRACKING_FILE}")
-        # Leemos en chunks si fuera muy grande, pero 89k cabe en memoria
-        track_df = pd.read_json(TRACKING_FILE, lines=True)
-    except ValueError as e:
-        print(f"❌ Error leyendo JSONL. Verifica el formato: {e}")
-        sys.exit(1)
-
-    # Limpieza Tracking
-    if 'timestamp' in track_df.columns:
-        track_df['game_time'] = track_df['timestamp'].apply(time_to_seconds)
-    else:
-        print("❌ Error: No se encontró columna 'timestamp' en Tracking.")
+        roster, frames, ev_df = load_match(sources, cache=MatchCache(), preprocess=preprocess_options(CONFIG))
+    except (OSError, ValueError) as e:
+        print(f"❌ Error leyendo datos del partido: {e}")
         sys.exit(1)
+    print(f"   -> Partido cargado en {time.time() - start:.2f}s "
+          f"({len(frames)} frames, {len(roster)} jugadores, {len(ev_df)} eventos)")
 
-    # Filtrar basura (registros vacíos o tiempos nulos)
-    initial_len = len(track_df)
+    # --- 2. Limpieza Tracking: filtrar tiempos nulos (índices de fila en el FrameStore) ---
+    track_df = pd.DataFrame({'row': np.arange(len(frames)), 'game_time': frames.game_time})
     track_df = track_df.dropna(subset=['game_time'])
-    # Opcional: Filtrar si player_data está vacío o es nulo
-    # track_df = track_df[track_df['player_data'].map(lambda d: len(d) > 0 if isinstance(d, list) else False)]
-
-    print(f"      Limpieza Tracking: {initial_len} -> {len(track_df)} registros válidos.")
-
-    # Enriquecer con IDs (Optimizado)
-    def enrich(players):
-        if not isinstance(players, list):
-            return []
-        for p in players:
-            pid = p.get('player_id')
-            if pid in id_map:
-                p.update(id_map[pid])  # Añade nombre y equipo al objeto del jugador
-        return players
-
-    track_df['player_data'] = track_df['player_data'].apply(enrich)
-
-    # --- 3. EVENTING (CSV) ---
-    try:
-        print(f"   -> Leyendo Eventing: {EVENTING_FILE}")
-        # sep=None permite detectar ; o , automáticamente
-        ev_df = pd.read_csv(EVENTING_FILE, sep=None, engine='python')
-    except Exception as e:
-        print(f"❌ Error leyendo CSV Eventing: {e}")
-        sys.exit(1)
-
-    # Auto-detección de columna de tiempo para Eventing
-    possible_cols = ['timestamp', 'time', 'Time', 'period_time', 'game_time_seconds', 'minuto']
-    time_col = next((c for c in possible_cols if c in ev_df.columns), None)
-
-    if time_col:
-        print(f"      Columna de tiempo detectada: '{time_col}'")
-        ev_df['game_time'] = ev_df[time_col].apply(time_to_seconds)
-        ev_df = ev_df.dropna(subset=['game_time'])
-    else:
-        print(f"❌ Error: No se detectó columna de tiempo en Eventing. Columnas: {list(ev_df.columns)}")
-        sys.exit(1)
+    print(f"      Limpieza Tracking: {len(frames)} -> {len(track_df)} registros válidos.")
 
     # Ordenar ambos por tiempo
-    track_df = track_df.sort_values('game_time')
-    ev_df = ev_df.sort_values('game_time')
+    track_df = track_df.sort_values('game_time', kind='stable')
+    ev_df = ev_df.sort_values('game_time', kind='stable')
 
-    return track_df, ev_df
+    return frames, track_df, ev_df
 
 # =========================================================================
 # 4. SIMULACIÓN
 # =========================================================================
 
 
-def simulate(track_df, ev_df):
+def iter_records(df, dtype):
+    """
+    Registros de un DataFrame ya ordenado por game_time, uno a uno y sin materializar la lista:
+    (game_time, tipo, registro) con tipos Python nativos, igual que to_dict('records').
+    """
+    columns = list(df.columns)
+    # tolist() da escalares nativos también en columnas Int64/category; los nulos de esas
+    # columnas (pd.NA) pasan a None, como en to_dict('records')
+    values = [df[c].astype(object).where(df[c].notna(), None).tolist()
+              if isinstance(df[c].dtype, pd.api.extensions.ExtensionDtype) else df[c].tolist() for c in columns]
+    for row in zip(*values):
+        record = dict(zip(columns, row))
+        yield record['game_time'], dtype, record
+
+
+def merge_streams(*streams):
+    """
+    Mezcla perezosa (k-way merge con heap) de streams ya ordenados por game_time.
+    Memoria constante y primer mensaje inmediato. Con tiempos iguales sale antes el stream
+    que va primero en los argumentos (mismo criterio que el sort estable anterior).
+    Admite más streams (feeds adicionales) con el mismo formato que iter_records.
+    """
+    return heapq.merge(*streams, key=lambda item: item[0])
+
+
+def simulate(frames, track_df, ev_df):
     print("\n==============================================")
     print("      ▶️ INICIANDO PARTIDO ⚽ (Simulado)      ")
     print("==============================================")
 
-    # Unificar streams
-    t_list = track_df.assign(type='tracking').to_dict('records')
-    e_list = ev_df.assign(type='eventing').to_dict('records')
+    # Tabla de jugadores una sola vez: los frames solo llevan player_id
+    publisher.publish(path_track, roster_message(frames.roster), data_type='roster')
 
-    # Fusionar y ordenar por tiempo absoluto de juego
-    full_stream = sorted(t_list + e_list, key=lambda x: x['game_time'])
+    # Unificar streams (ambos DataFrames ya vienen ordenados por tiempo desde load_data)
+    full_stream = merge_streams(iter_records(track_df, 'tracking'), iter_records(ev_df, 'eventing'))
 
-    if not full_stream:
+    first = next(full_stream, None)
+    if first is None:
         print("❌ No hay datos para simular.")
         return
 
-    start_game_time = full_stream[0]['game_time']
+    start_game_time = first[0]
     last_game_time = start_game_time
 
     # Estadísticas simples
     count_t, count_e = 0, 0
 
     try:
-        for record in full_stream:
-            current_time = record['game_time']
-            dtype = record.pop('type')  # Extraer tipo y limpiar registro
-
+        for current_time, dtype, record in itertools.chain([first], full_stream):
             # Calcular espera (Delta de tiempo real / velocidad)
             wait = (current_time - last_game_time) / SPEED_MULTIPLIER
 
             if wait > 0:
                 time.sleep(wait)
 
-            # Publicar
+            # Publicar (el frame se reconstruye desde el FrameStore solo al enviarlo)
+            if dtype == 'tracking':
+                record = {**frames.record(record['row'], enrich=False), 'game_time': current_time}
             topic = path_track if dtype == 'tracking' else path_event
             publish_message(publisher, topic, record, dtype)
 
@@ -257,10 +187,12 @@ def simulate(track_df, ev_df):
 
     except KeyboardInterrupt:
         print("\n🛑 Simulación detenida manualmente.")
+    finally:
+        publisher.close()
 
     print(f"\n\n🏁 Fin de la transmisión. Total Tracking: {count_t}, Eventos: {count_e}")
 
 
 if __name__ == "__main__":
-    t_df, e_df = load_data()
-    simulate(t_df, e_df)
+    frames, t_df, e_df = load_data()
+    simulate(frames, t_df, e_df)
@@ -2,6 +2,7 @@
 import streamlit as st
 import pandas as pd
 import time
+import math
 import sys
 import os
 from datetime import timedelta
@@ -24,6 +25,16 @@ def format_time(seconds):
     return f"{td.seconds//60:02d}:{td.seconds%60:02d}"
 
 
+SPEEDS = [1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 20.0, 50.0, 100.0, 250.0, 500.0, math.inf]
+
+
+def nearest_speed(speed):
+    """Opción del selector más cercana a la velocidad actual del engine."""
+    if math.isinf(speed):
+        return SPEEDS[-1]
+    return min(SPEEDS[:-1], key=lambda v: abs(v - speed))
+
+
 def get_latency_html(ms):
     if ms < 50:
         return f'<span class="latency-ok">{ms} ms</span>'
@@ -66,24 +77,29 @@ st.markdown("""
 
 
 # 3. STATE (Self-Healing)
-def create_engine():
+def create_engine(old=None):
+    # El motor anterior suelta el puerto de métricas y el transporte antes de crear el nuevo
+    if old is not None and hasattr(old, 'close'):
+        old.close()
     return SimulationEngine(env="dev")
 
 
 if 'engine' not in st.session_state:
     st.session_state.engine = create_engine()
-elif not hasattr(st.session_state.engine, 'sent_tracking_log'):
-    st.session_state.engine = create_engine()
+elif not hasattr(st.session_state.engine, 'collect_metrics'):
+    st.session_state.engine = create_engine(st.session_state.engine)
 
 engine = st.session_state.engine
 
 # 4. SIDEBAR
 with st.sidebar:
     st.header("Configuración")
-    st.info(f"Proyecto: `{engine.project_id}`")
+    st.info(f"Proyecto: `{engine.project_id}` · Transporte: `{engine.transport}` · Formato: `{engine.wire_format}`")
+    st.caption(f"Batch: {engine.batch_max_messages} msgs · {engine.batch_max_bytes // 1024} KB · "
+               f"{engine.batch_max_latency * 1000:.0f} ms | En vuelo: {engine.in_flight}/{engine.max_outstanding}")
     st.divider()
     if st.button("♻️ Hard Reset"):
-        st.session_state.engine = create_engine()
+        st.session_state.engine = create_engine(engine)
         st.rerun()
 
 # 5. HEADER
@@ -102,6 +118,8 @@ with c2:
 st.divider()
 
 # 6. SCOREBOARD
+if engine.loading:
+    st.caption(f"⏳ Cargando tracking en segundo plano... {len(engine.frames):,} frames listos")
 if engine.current_time < 0:
     st.info(f"📡 Calibrando Cámaras... Frames Nulos Enviados: {engine.total_tracking}")
 else:
@@ -133,31 +151,75 @@ with btn3:
         engine.stop_stream()
         st.rerun()
 with btn4:
-    new_speed = st.slider("Speed", 1.0, 10.0, engine.speed_multiplier, 0.5)
+    # Velocidades por encima de 10x y modo sin esperas (máximo throughput)
+    new_speed = st.select_slider("Speed", options=SPEEDS, value=nearest_speed(engine.speed_multiplier),
+                                 format_func=lambda v: "MAX" if math.isinf(v) else f"{v:g}x")
     if new_speed != engine.speed_multiplier:
         engine.set_speed(new_speed)
 
+# Seek: saltar a un instante del partido (periodo + minuto del reloj de partido)
+sk1, sk2, sk3 = st.columns([1, 2, 1])
+index = engine.time_index if len(engine.frames) else None
+periods = (index.periods() if index is not None else []) or [1, 2]
+with sk1:
+    seek_period = st.selectbox("Periodo", periods, index=periods.index(engine.current_period)
+                               if engine.current_period in periods else 0)
+with sk2:
+    bounds = index.bounds(seek_period) if index is not None else None
+    available = f"Disponible: {format_time(bounds[0])} - {format_time(bounds[1])}" if bounds else None
+    seek_time = st.text_input("Minuto (MM:SS)", value=format_time(bounds[0]) if bounds else "00:00", help=available)
+with sk3:
+    st.write("")
+    if st.button("⏩ Ir"):
+        try:
+            found = engine.seek(seek_period, seek_time)
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            if found:
+                st.rerun()
+            st.warning("Ese instante no existe en el partido.")
+
 # 8. MONITOR DE RESUMEN (TABLA + LOGS)
 st.subheader("📊 Resumen de Transmisión")
 
 col_summ, col_logs = st.columns([1, 1])
 
 with col_summ:
-    t_count = max(1, engine.metrics['tracking']['count'])
-    e_count = max(1, engine.metrics['eventing']['count'])
-    lat_t = engine.metrics['tracking']['total_latency'] / t_count
-    lat_e = engine.metrics['eventing']['total_latency'] / e_count
+    summaries = [engine.metrics['tracking'].summary(), engine.metrics['eventing'].summary()]
 
+    # Latencia = envío -> confirmación del broker (ack), no solo el encolado local
     data = {
         "Fuente": ["Tracking", "Eventing"],
-        "Volumen": [engine.metrics['tracking']['count'], engine.metrics['eventing']['count']],
-        "Latencia (ms)": [f"{lat_t:.2f}", f"{lat_e:.2f}"]
+        "Volumen": [s['acked'] for s in summaries],
+        "msg/s": [f"{s['rate']:.0f}" for s in summaries],
+        "p50 (ms)": [f"{s['p50_ms']:.2f}" for s in summaries],
+        "p95 (ms)": [f"{s['p95_ms']:.2f}" for s in summaries],
+        "p99 (ms)": [f"{s['p99_ms']:.2f}" for s in summaries],
+        "Máx (ms)": [f"{s['max_ms']:.1f}" for s in summaries],
+        "Fallidos": [s['failed'] for s in summaries],
+        "Descartados": [s['dropped'] for s in summaries],
+        "Backpressure (ms)": [f"{s['blocked_ms']:.0f}" for s in summaries],
     }
     st.dataframe(pd.DataFrame(data), hide_index=True, use_container_width=True)
 
+    # Throughput de confirmaciones por segundo (último minuto)
+    st.line_chart(pd.DataFrame({name.capitalize(): engine.metrics[name].throughput.series(60)
+                                for name in ('tracking', 'eventing')}), height=140)
+    depth = engine.publisher.depth() if hasattr(engine.publisher, 'depth') else 0
+    st.caption(f"📦 Colas · en vuelo {engine.in_flight} · frames preparados "
+               f"{max(0, len(engine._schedule) - engine.track_idx)} · transporte {depth}"
+               + (f" · Prometheus: http://{engine.metrics_server.address}/metrics" if engine.metrics_server else ""))
+
+    clock = engine.clock.stats.summary()
+    st.caption(
+        f"⏱️ Reloj maestro · retraso medio {clock['mean_ms']:.2f} ms · jitter {clock['jitter_ms']:.2f} ms · "
+        f"p99 {clock['p99_ms']:.2f} ms · máx {clock['max_ms']:.1f} ms · "
+        f"fuera de presupuesto (>40 ms): {clock['late_frames']} · resyncs: {engine.clock.resyncs}")
+
 with col_logs:
     st.write("📜 **Log de Operaciones**")
-    st.text_area("", "\n".join(engine.simple_logs), height=120, disabled=True)
+    st.text_area("", "\n".join(engine.simple_logs.values('line')), height=120, disabled=True)
 
 st.divider()
 
@@ -167,20 +229,21 @@ st.subheader("📝 Auditoría en Vivo")
 tab_track, tab_event = st.tabs(["📡 Tracking Stream (Frames)", "⚽ Eventing Stream (Plays)"])
 
 with tab_track:
-    if engine.sent_tracking_log:
-        df_track = pd.DataFrame(engine.sent_tracking_log).iloc[::-1]
+    if len(engine.sent_tracking_log):
+        # Snapshot columnar (más recientes primero) sin bloquear al hilo del stream
+        df_track = pd.DataFrame(engine.sent_tracking_log.snapshot())
         st.dataframe(df_track, use_container_width=True, height=300)
     else:
         st.info("Esperando inicio de transmisión...")
 
 with tab_event:
-    if engine.sent_eventing_log:
-        df_event = pd.DataFrame(engine.sent_eventing_log).iloc[::-1]
+    if len(engine.sent_eventing_log):
+        df_event = pd.DataFrame(engine.sent_eventing_log.snapshot())
         st.dataframe(df_event, use_container_width=True)
     else:
         st.info("Esperando eventos de juego...")
 
 # Auto-refresh
-if engine.running:
+if engine.running or engine.loading:
     time.sleep(1)
     st.rerun()
@@ -1,12 +1,12 @@
 # simulator/engine.py (Versión 5.3 - Sincronización por Periodo)
 import pandas as pd
+import numpy as np
 import json
 import time
 import threading
+import functools
 import os
 import sys
-from google.cloud import pubsub_v1
-import google.auth
 from datetime import datetime
 
 # 1. SETUP PATH
@@ -20,8 +20,32 @@ try:
 except ImportError:
     def load_config(env): return {}
 
+from TACTIX_LIVE.utils.time_utils import time_to_seconds  # noqa: E402
+from TACTIX_LIVE.utils.frame_store import FrameStore, Roster, iter_jsonl_chunks  # noqa: E402
+from TACTIX_LIVE.utils.match_loader import match_sources, load_roster, load_eventing  # noqa: E402
+from TACTIX_LIVE.utils.match_cache import MatchCache  # noqa: E402
+from TACTIX_LIVE.utils.metrics import MetricsServer, StreamMetrics, render_prometheus  # noqa: E402
+from TACTIX_LIVE.utils.preprocess import TrackingCleaner, format_report, preprocess_options  # noqa: E402
+from TACTIX_LIVE.utils.clock import MasterClock  # noqa: E402
+from TACTIX_LIVE.utils.time_index import TimeIndex, parse_game_time  # noqa: E402
+from TACTIX_LIVE.utils.schedule import build_schedule  # noqa: E402
+from TACTIX_LIVE.utils.telemetry import RingBuffer  # noqa: E402
+from TACTIX_LIVE.utils.transports import create_sink  # noqa: E402
+from TACTIX_LIVE.utils.wire_format import encode_frames, json_frame, roster_message  # noqa: E402
+
 
 class SimulationEngine:
+    FIRST_CHUNK = 250   # Frames del primer bloque (arranque rápido del stream)
+    LOAD_CHUNK = 5000   # Frames por bloque en el resto de la carga
+    PUBLISH_TIMEOUT = 5.0  # Máxima espera por hueco de publicación antes de contar un fallo
+
+    # Telemetría para la UI: buffers circulares de capacidad fija (snapshot sin locks)
+    LOG_LINES = 50
+    TRACKING_LOG_SIZE = 2000
+    EVENTING_LOG_SIZE = 2000
+    TRACKING_LOG_COLUMNS = {'Frame': np.int64, 'Time': object, 'Period': np.int16, 'Latencia': np.float32}
+    EVENTING_LOG_COLUMNS = {'Period': object, 'Evento': object, 'Time': object, 'Latencia': np.float32}
+
     def __init__(self, env="dev"):
         self.env = env
         self.config = load_config(env)
@@ -29,188 +53,380 @@ class SimulationEngine:
         self.topic_tracking = self.config.get('pubsub', {}).get('topic_tracking', '')
         self.topic_eventing = self.config.get('pubsub', {}).get('topic_eventing', '')
 
+        # Batching del cliente Pub/Sub y límite de mensajes en vuelo (backpressure)
+        batch_cfg = self.config.get('pubsub', {}).get('batch', {})
+        self.batch_max_messages = batch_cfg.get('max_messages', 100)
+        self.batch_max_bytes = batch_cfg.get('max_bytes', 1024 * 1024)
+        self.batch_max_latency = batch_cfg.get('max_latency', 0.01)
+        self.max_outstanding = self.config.get('pubsub', {}).get('max_outstanding', 1000)
+        self._outstanding = threading.BoundedSemaphore(self.max_outstanding)
+        self._metrics_lock = threading.Lock()
+        self.in_flight = 0  # Mensajes publicados pendientes de confirmación
+
         self.speed_multiplier = 1.0
+        self.clock = MasterClock(self.speed_multiplier)
         self.running = False
         self.current_time = -1.0
         self.current_period = 0  # Nuevo estado para UI
 
-        # Listas Maestras
-        self.tracking_stream = []
+        # Tracking columnar (FrameStore) + cola de eventos
+        self.frames = FrameStore()
         self.eventing_stream = []
 
-        self.ids_map = {}
+        # Formato de los frames: 'json' = payload original (se serializa al enviar), 'binary' =
+        # wire_format y 'delta' = wire_format con un keyframe cada keyframe_interval frames y
+        # deltas entre medias (estos dos, compactos, se serializan una vez en la carga)
+        self.wire_format = self.config.get('wire_format', 'json')
+        if self.wire_format not in ('json', 'binary', 'delta'):
+            raise ValueError(f"wire_format desconocido: '{self.wire_format}' (json, binary, delta)")
+        self.keyframe_interval = self.config.get('keyframe_interval', 25) if self.wire_format == 'delta' else 0
+        # Republicación del Roster cada roster_interval frames (0 = solo al iniciar y con send_alignment)
+        # para los consumidores que se conectan a mitad; en delta, justo antes de cada keyframe
+        self.roster_interval = self.config.get('roster_interval', self.keyframe_interval or 250)
+        self._wire = []
+        self.json_fallback = 0  # Frames enviados en JSON por no caber en el formato binario
+
+        self.roster = Roster()
         self._thread = None
+
+        # Plan de despacho precalculado en la carga: (step, event_end, game_time, periodo) por frame
+        self._schedule = []
+        self._schedule_state = (0.0, 0)
+
+        # Posición del stream (sobrevive a stop/start) e índices (periodo, tiempo) para seek
+        self.track_idx = 0
+        self.event_idx = 0
+        self._seek_request = None
+        self._time_index = None
+        self._event_index = None
+
+        # Carga progresiva (hilo lector + aviso de frames nuevos al stream)
+        self.loading = False
+        self._load_ok = False
+        self._loader = None
+        self._load_done = threading.Event()
+        self._frames_ready = threading.Condition()
+
+        # Caché persistente del partido preprocesado (se invalida sola si cambian las fuentes)
+        self.cache = MatchCache() if self.config.get('cache', {}).get('enabled', True) else None
+        # Preprocesado del tracking en la carga (compactación de nulos, duplicados, huecos cortos)
+        self.preprocess = preprocess_options(self.config)
         self.total_game_time = 1
 
-        # Logs
-        self.simple_logs = []
-        self.sent_tracking_log = []
-        self.sent_eventing_log = []
+        # Logs: la latencia de cada envío se rellena al confirmar el broker (NaN = pendiente, -1 = fallo)
+        self.simple_logs = RingBuffer(self.LOG_LINES, {'line': object})
+        self._log_lock = threading.Lock()  # _log se llama desde varios hilos (carga, stream, UI)
+        self.sent_tracking_log = RingBuffer(self.TRACKING_LOG_SIZE, self.TRACKING_LOG_COLUMNS)
+        self.sent_eventing_log = RingBuffer(self.EVENTING_LOG_SIZE, self.EVENTING_LOG_COLUMNS)
         self.total_tracking = 0
         self.total_events = 0
-        self.metrics = {'tracking': {'count': 0, 'total_latency': 0.0}, 'eventing': {'count': 0, 'total_latency': 0.0}}
+        self.metrics = self._new_metrics()
 
         self.errors = 0
         self.latency_ms = 0
         self.last_log = ""
 
         self.publisher = None
-        self._connect_gcp()
+        self.transport = self.config.get('transport', {}).get('type', 'pubsub')
+        self._connect()
+
+        # Endpoint Prometheus local (opcional): config['metrics'] = {"enabled": true, "address": "127.0.0.1:9108"}
+        self.metrics_server = None
+        metrics_cfg = self.config.get('metrics', {})
+        if metrics_cfg.get('enabled', False):
+            try:
+                self.metrics_server = MetricsServer(self.collect_metrics,
+                                                    metrics_cfg.get('address', '127.0.0.1:9108')).start()
+                self._log(f"📈 Métricas en http://{self.metrics_server.address}/metrics")
+            except OSError as e:
+                self._log(f"⚠️ Endpoint de métricas no disponible: {e}")
+
+    @staticmethod
+    def _new_metrics():
+        """
+        StreamMetrics por stream: enviados, confirmados (histograma de latencia real de ack y
+        throughput por segundo), fallidos, descartados por backpressure y tiempo bloqueado.
+        """
+        return {name: StreamMetrics() for name in ('tracking', 'eventing')}
+
+    def collect_metrics(self) -> str:
+        """Métricas en formato de texto de Prometheus (las sirve MetricsServer en /metrics)."""
+        clock = self.clock.stats.summary()
+        depth = self.publisher.depth() if hasattr(self.publisher, 'depth') else 0
+        gauges = {
+            'in_flight_messages': ("Mensajes publicados pendientes de ack", self.in_flight),
+            'frames_buffered': ("Frames preparados pendientes de enviar", max(0, len(self._schedule) - self.track_idx)),
+            'sink_queue_depth': ("Mensajes en la cola local del transporte", depth),
+            'clock_lateness_p99_seconds': ("p99 del retraso del reloj maestro (ventana reciente)",
+                                           clock['p99_ms'] / 1000),
+            'clock_late_frames': ("Frames fuera de presupuesto desde el inicio del stream", clock['late_frames']),
+            'clock_resyncs': ("Re-anclajes del reloj maestro", self.clock.resyncs),
+            'stream_running': ("1 si el stream está emitiendo", int(self.running)),
+        }
+        with self._metrics_lock:
+            return render_prometheus(self.metrics, gauges)
 
     def _log(self, message):
         ts = datetime.now().strftime("%H:%M:%S")
-        self.simple_logs.insert(0, f"[{ts}] {message}")
-        if len(self.simple_logs) > 50:
-            self.simple_logs.pop()
+        with self._log_lock:
+            self.simple_logs.append(f"[{ts}] {message}")
 
-    def _connect_gcp(self):
+    def _connect(self):
+        """Sink de publicación según config['transport'] (Pub/Sub por defecto)."""
         try:
-            creds, _ = google.auth.default()
-            self.publisher = pubsub_v1.PublisherClient(credentials=creds)
+            self.publisher = create_sink(self.config)
+            self.transport = self.publisher.name
             self.path_track = self.publisher.topic_path(self.project_id, self.topic_tracking)
             self.path_event = self.publisher.topic_path(self.project_id, self.topic_eventing)
-            self.status_message = "Conectado a GCP 🟢"
+            if self.transport == 'pubsub':
+                self.status_message = "Conectado a GCP 🟢"
+            else:
+                self.status_message = f"Transporte: {self.transport} 🟢"
         except Exception as e:
-            self.status_message = f"Error GCP: {str(e)} 🔴"
-            self.errors += 1
+            self.status_message = f"Error transporte ({self.transport}): {str(e)} 🔴"
+            self._count_error()
 
     @staticmethod
     def _time_to_seconds(time_val):
         """
         Limpia fechas (2025-11-20) y convierte HH:MM:SS o MM:SS a segundos.
+        (Versión escalar; la carga usa times_to_seconds sobre la columna completa).
         """
-        if pd.isna(time_val) or time_val is None:
-            return None
-
-        # Si ya es número
-        if isinstance(time_val, (int, float)):
-            return float(time_val)
-
-        # Si es string
-        time_str = str(time_val).strip()
-
-        # 1. ELIMINAR FECHA SI EXISTE (ej: "2025-11-20 00:00:50.000")
-        if " " in time_str:
-            time_str = time_str.split(" ")[-1]  # Tomar la parte de la hora
-
-        try:
-            parts = time_str.split(':')
-            if len(parts) == 3:  # HH:MM:SS.ss
-                return float(parts[0]) * 3600 + float(parts[1]) * 60 + float(parts[2])
-            elif len(parts) == 2:  # MM:SS.ss
-                return float(parts[0]) * 60 + float(parts[1])
-            else:
-                return float(time_str)
-        except BaseException:
-            return None
+        return time_to_seconds(time_val)
 
     def load_data(self):
+        """Carga completa (bloqueante). Si ya hay una carga en curso, espera a que termine."""
+        if not self.loading:
+            self._start_loading()
+        self._load_done.wait()
+        return self._load_ok
+
+    def _start_loading(self):
+        """Lanza la carga progresiva en segundo plano; el stream puede arrancar con el primer bloque."""
+        self.frames = FrameStore()
+        self.eventing_stream = []
+        self._wire = []
+        self.json_fallback = 0
+        self._schedule = []
+        self._schedule_state = (0.0, 0)
+        self._time_index = None
+        self._event_index = None
+        self._seek_request = None
+        self.track_idx = 0
+        self.event_idx = 0
+        self.sent_tracking_log.clear()
+        self.sent_eventing_log.clear()
+        with self._metrics_lock:
+            self.total_tracking = 0
+            self.total_events = 0
+            self.metrics = self._new_metrics()
+
+        self.loading = True
+        self._load_ok = False
+        self._load_done.clear()
+        self._loader = threading.Thread(target=self._load_worker, daemon=True)
+        self._loader.start()
+
+    def _load_worker(self):
         self.status_message = "Cargando datos..."
         self._log("Cargando (Sincronización por Periodo)...")
-
-        self.tracking_stream = []
-        self.eventing_stream = []
-        self.sent_tracking_log = []
-        self.sent_eventing_log = []
-        self.total_tracking = 0
-        self.total_events = 0
-        self.metrics = {'tracking': {'count': 0, 'total_latency': 0.0}, 'eventing': {'count': 0, 'total_latency': 0.0}}
+        t0 = time.monotonic()
 
         try:
-            track_file = "data/tracking_file.jsonl"
-            ev_file = "data/eventing_file.csv"
-            ids_file = "data/ids_tracking.json"
-
-            # 1. IDs
-            if os.path.exists(ids_file):
-                with open(ids_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    iterator = data.values() if isinstance(data, dict) else data
-                    for team in iterator:
-                        if not isinstance(team, dict):
-                            continue
-                        t_id, t_name = team.get('team_id') or team.get('id'), team.get('team_name') or team.get('name')
-                        for p in team.get('players', []):
-                            pid = p.get('player_id') or p.get('id')
-                            if pid:
-                                self.ids_map[pid] = {
-                                    'team_id': t_id, 'team_name': t_name, 'player_name': p.get('player_name')}
-
-            # 2. TRACKING (MASTER)
-            t_df = pd.read_json(track_file, lines=True, dtype=False)
-
-            # Asegurar que timestamp sea string para limpiarlo
-            t_df['timestamp'] = t_df['timestamp'].astype(str)
-            t_df['game_time'] = t_df['timestamp'].apply(self._time_to_seconds)
-
-            # Rellenar periodo si falta (asumimos 1 si es null, para no romper orden)
-            if 'period' not in t_df.columns:
-                t_df['period'] = 1
-            t_df['period'] = t_df['period'].fillna(1).astype(int)
-
-            # Enriquecer
-            def enrich(players):
-                if not isinstance(players, list):
-                    return []
-                for p in players:
-                    pid = p.get('player_id')
-                    if pid in self.ids_map:
-                        p.update(self.ids_map[pid])
-                return players
-            t_df['player_data'] = t_df['player_data'].apply(enrich)
-
-            # NO ORDENAMOS EL TRACKING (Respetamos la secuencia visual del archivo JSONL)
-            self.tracking_stream = t_df.to_dict('records')
+            sources = match_sources("data")
 
-            # Tiempo total (suma aproximada)
-            max_t = t_df['game_time'].max()
-            if pd.notna(max_t):
-                self.total_game_time = max_t
-
-            # 3. EVENTING (QUEUE)
-            e_df = pd.read_csv(ev_file, sep=None, engine='python')
-            t_col = next((c for c in ['game_time_seconds', 'timestamp', 'time'] if c in e_df.columns), None)
-            p_col = next((c for c in ['period', 'period_id', 'half'] if c in e_df.columns), None)
-
-            if t_col:
-                e_df[t_col] = e_df[t_col].astype(str)
-                e_df['game_time'] = e_df[t_col].apply(self._time_to_seconds)
-                e_df = e_df.dropna(subset=['game_time'])
-
-                # Normalizar columna periodo
-                if p_col:
-                    e_df['period'] = e_df[p_col].fillna(1).astype(int)
-                else:
-                    e_df['period'] = 1  # Default
-
-                # 🟢 CLAVE: Ordenar Eventos por (Periodo, Tiempo)
-                e_df = e_df.sort_values(by=['period', 'game_time'])
+            # 0. CACHÉ: partido ya limpio y enriquecido -> carga en milisegundos
+            cached = self.cache.load(sources, self.preprocess) if self.cache else None
+            if cached is not None:
+                self.roster, self.frames, e_df = cached
                 self.eventing_stream = e_df.to_dict('records')
+                if not np.isnan(self.frames.game_time).all():
+                    self.total_game_time = float(np.nanmax(self.frames.game_time))
+                self._log(f"Partido cargado desde caché en {(time.monotonic() - t0) * 1000:.0f} ms")
+                # Serialización por bloques: el stream arranca con el primero
+                for start in range(0, len(self.frames), self.LOAD_CHUNK):
+                    self._prepare_range(start, min(start + self.LOAD_CHUNK, len(self.frames)))
+            else:
+                self._load_sources(sources, t0)
 
-            self.status_message = f"Listo. Track: {len(self.tracking_stream)} | Event: {len(self.eventing_stream)}"
-            self._log("Carga sincronizada completada.")
-            return True
+            self._load_ok = True
+            self.status_message = f"Listo. Track: {len(self.frames)} | Event: {len(self.eventing_stream)}"
+            self._log(f"Carga sincronizada completada ({time.monotonic() - t0:.1f} s).")
 
         except Exception as e:
             self.status_message = f"Error Carga: {str(e)}"
             self._log(f"❌ Error fatal: {e}")
-            self.errors += 1
-            return False
+            self._count_error()
+
+        finally:
+            self.loading = False
+            self._load_done.set()
+            with self._frames_ready:
+                self._frames_ready.notify_all()
+
+    def _load_sources(self, sources, t0):
+        """Carga progresiva desde los archivos fuente y guarda el resultado en la caché."""
+        prints = self.cache.fingerprints(sources, digest=False) if self.cache else None
+
+        # 1. IDs (tabla de jugadores/equipos compartida por todos los frames)
+        self.roster = load_roster(sources['ids'])
+        raw = FrameStore(self.roster)
+        cleaner = None
+        if self.preprocess['enabled']:
+            cleaner = TrackingCleaner(self.roster, self.preprocess['max_null_run'], self.preprocess['max_gap'])
+
+        # 2. EVENTING (QUEUE) - archivo pequeño, debe estar listo antes del primer frame
+        try:
+            e_df = load_eventing(sources['eventing'])
+            self.eventing_stream = e_df.to_dict('records')
+        except ValueError as e:
+            e_df = pd.DataFrame(columns=['game_time', 'period'])
+            self._log(f"⚠️ Eventing sin tiempos: {e}")
+
+        # 3. TRACKING (MASTER) -> arrays contiguos, leído por bloques acotados
+        # NO ORDENAMOS EL TRACKING (Respetamos la secuencia visual del archivo JSONL)
+        # El periodo nulo se normaliza a 1 y el timestamp nulo queda como game_time = NaN
+        # Con preprocesado, self.frames es la salida limpia del TrackingCleaner (retiene unas pocas
+        # filas por bloque para interpolar); sin él, el propio store leído.
+        frames = cleaner.out if cleaner else raw
+        self.frames = frames
+        for chunk in iter_jsonl_chunks(sources['tracking'], self.LOAD_CHUNK, first_chunk_size=self.FIRST_CHUNK):
+            start = len(frames)
+            raw.append(chunk)
+            if cleaner:
+                cleaner.feed(raw)
+
+            # Tiempo total (suma aproximada)
+            chunk_times = frames.game_time[start:]
+            if len(chunk_times) and not np.isnan(chunk_times).all():
+                self.total_game_time = max(self.total_game_time, float(np.nanmax(chunk_times)))
+
+            self._prepare_range(start, len(frames))
+            if start == 0 and len(frames):
+                self._log(f"Primer bloque listo en {(time.monotonic() - t0) * 1000:.0f} ms")
+
+        if cleaner:
+            start = len(frames)
+            cleaner.feed(raw, final=True)
+            self._prepare_range(start, len(frames))
+            self._log(f"Preprocesado: {len(raw)} -> {len(frames)} frames. {format_report(cleaner.report)}")
+
+        if self.cache:
+            try:
+                self.cache.save(sources, self.roster, frames, e_df, prints, self.preprocess)
+            except Exception as e:
+                self._log(f"⚠️ No se pudo guardar la caché: {e}")
+
+    def _prepare_range(self, start, stop):
+        """
+        Prepara los frames [start, stop) una sola vez: bytes binarios (en JSON se serializan al
+        enviar) y plan de despacho (espera del reloj y eventos que salen antes de cada frame).
+        Después avisa al stream.
+        """
+        if self.wire_format != 'json':
+            encoded = encode_frames(self.frames, start, stop, self.keyframe_interval)
+            oversized = encoded.count(None)
+            if oversized:
+                self.json_fallback += oversized
+                self._log(f"⚠️ {oversized} frames no caben en el formato binario (textos largos): se envían en JSON")
+            self._wire.extend(encoded)
+
+        game_times = self.frames.game_time[start:stop]
+        periods = self.frames.period[start:stop]
+        steps, event_end, *state = build_schedule(
+            periods, game_times, [e['period'] for e in self.eventing_stream],
+            [e['game_time'] for e in self.eventing_stream], *self._schedule_state)
+        self._schedule_state = tuple(state)
+        self._schedule.extend(zip(steps.tolist(), event_end.tolist(),
+                                  [None if np.isnan(t) else t for t in game_times.tolist()], periods.tolist()))
+        with self._frames_ready:
+            self._frames_ready.notify_all()
+
+    def _wait_frames(self, idx):
+        """Bloquea el stream hasta que el frame idx esté listo para enviar. False si la carga terminó antes."""
+        with self._frames_ready:
+            self._frames_ready.wait_for(
+                lambda: len(self._schedule) > idx or self._load_done.is_set() or not self.running)
+        return len(self._schedule) > idx
 
     def set_speed(self, speed: float):
+        """Velocidad de reproducción (>= 1x). math.inf = máximo throughput sin esperas."""
         self.speed_multiplier = max(1.0, speed)
+        self.clock.set_speed(self.speed_multiplier)
 
     def send_alignment(self):
-        if not self.tracking_stream:
+        """Publica la tabla del Roster (alineaciones: ids, nombres y equipos de los jugadores)."""
+        if not self._load_ok:
             if not self.load_data():
                 return False
+        if not self._publish_roster():
+            self.status_message = "Error enviando alineación"
+            return False
+        self._log(f"📋 Alineación enviada ({len(self.roster)} jugadores)")
         self.status_message = "Alineación Enviada ✅"
         return True
 
+    # --- Índice temporal y seek ---
+    @property
+    def time_index(self) -> TimeIndex:
+        """Índice (periodo, game_time) -> frame; se reconstruye si han llegado más frames."""
+        if self._time_index is None or self._time_index.size != len(self.frames):
+            self._time_index = TimeIndex(self.frames.period, self.frames.game_time)
+        return self._time_index
+
+    @property
+    def event_index(self) -> TimeIndex:
+        if self._event_index is None or self._event_index.size != len(self.eventing_stream):
+            self._event_index = TimeIndex([e['period'] for e in self.eventing_stream],
+                                          [e['game_time'] for e in self.eventing_stream])
+        return self._event_index
+
+    def seek(self, period: int, when) -> bool:
+        """
+        Sitúa el stream en el primer frame con (periodo, tiempo) >= el pedido, p.ej. seek(2, "63:10").
+        Los eventos anteriores se dan por enviados. Vale en pausa o en marcha (se aplica en el
+        siguiente frame). False si el instante no existe en el partido.
+        """
+        game_time = parse_game_time(when)
+        if not self._load_ok and not self.load_data():
+            return False
+        idx = self.time_index.lookup(period, game_time)
+        if idx is None:
+            return False
+        self.seek_frame(idx)
+        return True
+
+    def seek_frame(self, idx: int):
+        """Sitúa el stream en la fila idx del tracking (orden del archivo)."""
+        idx = min(max(0, int(idx)), max(len(self.frames) - 1, 0))
+        game_time = float(self.frames.game_time[idx]) if len(self.frames) else np.nan
+        period = int(self.frames.period[idx]) if len(self.frames) else 1
+        # Frames sin tiempo (pre-partido): solo se dan por enviados los eventos de periodos anteriores
+        event_idx = self.event_index.count_before(period, -np.inf if np.isnan(game_time) else game_time)
+        self._seek_request = (idx, event_idx, game_time)
+        # Sin hilo de stream vivo se aplica ya; si no, lo aplica el loop antes del siguiente frame
+        if self._thread is None or not self._thread.is_alive():
+            self._apply_seek()
+
+    def _apply_seek(self):
+        request, self._seek_request = self._seek_request, None
+        if request is None:
+            return
+        self.track_idx, self.event_idx, game_time = request
+        if not np.isnan(game_time):
+            self.current_time = game_time
+        self.clock.reanchor()
+        self._log(f"⏩ Seek a frame {self.track_idx} (P{int(self.frames.period[self.track_idx])} "
+                  f"{'--' if np.isnan(game_time) else f'{game_time:.1f}s'})")
+
     def start_stream(self):
-        if not self.tracking_stream:
-            if not self.load_data():
-                return
+        # Carga progresiva: no esperamos al archivo completo, el loop consume según llegan bloques
+        if not self._load_ok and not self.loading:
+            self._start_loading()
+        # Reanudar desde la posición actual; si el partido terminó, empezar de nuevo
+        if self._load_ok and self._seek_request is None and self.track_idx >= len(self._schedule):
+            self.track_idx = 0
+            self.event_idx = 0
         if not self.running:
             self.running = True
             self._thread = threading.Thread(target=self._stream_loop)
@@ -219,111 +435,169 @@ class SimulationEngine:
     def stop_stream(self):
         self.running = False
         self.status_message = "Pausado ⏹️"
+        # Despierta al loop si está esperando frames de la carga progresiva
+        with self._frames_ready:
+            self._frames_ready.notify_all()
 
-    def _stream_loop(self):
-        track_idx = 0
-        event_idx = 0
-        total_track = len(self.tracking_stream)
-        total_event = len(self.eventing_stream)
-
-        last_valid_game_time = 0.0
-        current_track_period = 1
-        FRAME_DURATION = 0.04  # 25 fps
+    def close(self):
+        """
+        Para el stream y libera el endpoint de métricas y el transporte. Hay que llamarlo antes de
+        sustituir el motor (Hard Reset de la app): si no, el servidor viejo sigue con el puerto.
+        """
+        self.stop_stream()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.PUBLISH_TIMEOUT + 1)
+        if self.metrics_server is not None:
+            self.metrics_server.close()
+            self.metrics_server = None
+        if self.publisher is not None:
+            self.publisher.close()
+            self.publisher = None
 
+    def _stream_loop(self):
+        # Deadlines absolutos: el coste de publicar no se acumula como deriva
+        self.clock.reset()
         self._log("▶️ Iniciando Master Clock...")
-
-        while self.running and track_idx < total_track:
-            # 1. Leer Frame Actual
-            track_record = self.tracking_stream[track_idx]
-            current_game_time = track_record.get('game_time')
-
-            # Leer el periodo del frame (si es nulo, asumimos el último conocido o 1)
-            p_val = track_record.get('period')
-            if pd.notna(p_val):
-                current_track_period = int(p_val)
-
-            # 2. Control de Tiempo
-            is_valid_time = pd.notna(current_game_time) and current_game_time is not None
-
-            if not is_valid_time:
-                self.status_message = f"WAITING (P{current_track_period})"
-                self.current_time = -1
-                time.sleep(FRAME_DURATION / self.speed_multiplier)
+        self._publish_roster()
+
+        # El loop solo recorre el plan precalculado: esperar, enviar eventos vencidos y el frame
+        schedule = self._schedule
+        state = None
+        while self.running:
+            if self._seek_request is not None:
+                self._apply_seek()
+            track_idx = self.track_idx
+
+            # Carga progresiva: esperar a que el frame esté preparado
+            if track_idx >= len(schedule):
+                if not self._wait_frames(track_idx):
+                    break
+                schedule = self._schedule
+
+            step, event_end, game_time, period = schedule[track_idx]
+            if step > 0:
+                self.clock.tick(step)
+
+            if game_time is None:
+                if state != (False, period):
+                    state = (False, period)
+                    self.status_message = f"WAITING (P{period})"
+                    self.current_time = -1
             else:
-                self.status_message = f"LIVE P{current_track_period} 🔴"
-                self.current_time = current_game_time
-                self.current_period = current_track_period
-
-                delta = current_game_time - last_valid_game_time
-                # Si cambiamos de periodo o hay un salto grande, no esperamos el delta
-                if delta < 0 or delta > 5.0:
-                    wait = FRAME_DURATION
-                else:
-                    wait = delta
-
-                if wait > 0:
-                    time.sleep(wait / self.speed_multiplier)
-                last_valid_game_time = current_game_time
-
-                # 3. INYECCIÓN DE EVENTOS (Sincronizada por Periodo y Tiempo)
-                while event_idx < total_event:
-                    event_record = self.eventing_stream[event_idx]
-                    ev_time = event_record['game_time']
-                    ev_period = event_record['period']
-
-                    # Lógica de prioridad:
-                    # - Si el evento es de un periodo ANTERIOR, ya debió salir -> Enviarlo ya.
-                    # - Si es del MISMO periodo y su tiempo <= tiempo actual -> Enviarlo ya.
-                    should_send = False
-
-                    if ev_period < current_track_period:
-                        should_send = True
-                    elif ev_period == current_track_period and ev_time <= (current_game_time + 0.05):
-                        should_send = True
-
-                    if should_send:
-                        self._publish_event(event_record)
-                        event_idx += 1
-                    else:
-                        # El evento es futuro (mismo periodo, tiempo mayor) o de un periodo futuro
-                        break
-
-            self._publish_tracking(track_record)
-            track_idx += 1
+                if state != (True, period):
+                    state = (True, period)
+                    self.status_message = f"LIVE P{period} 🔴"
+                    self.current_period = period
+                self.current_time = game_time
+
+                # Eventos vencidos (prioridad por periodo y tolerancia ya resueltas en el plan)
+                while self.event_idx < event_end:
+                    self._publish_event(self.eventing_stream[self.event_idx])
+                    self.event_idx += 1
+
+            if self.roster_interval and track_idx and track_idx % self.roster_interval == 0:
+                self._publish_roster()
+            self._publish_tracking(track_idx)
+            self.track_idx = track_idx + 1
 
         self.running = False
         self.status_message = "Fin de Secuencia"
+        clock = self.clock.stats.summary()
+        self._log(f"⏱️ Reloj: {clock['frames']} frames, retraso medio {clock['mean_ms']:.2f} ms, "
+                  f"p99 {clock['p99_ms']:.2f} ms, máx {clock['max_ms']:.1f} ms, resyncs {self.clock.resyncs}")
         self._log("🏁 Partido finalizado.")
 
-    # --- Helpers (Iguales) ---
-    def _publish_tracking(self, record):
+    # --- Helpers de publicación ---
+    def _send(self, stream, topic, data, log_row) -> bool:
+        """
+        Publica con backpressure: como mucho max_outstanding futures sin confirmar. La latencia
+        real (envío -> ack del broker) y los fallos se registran en el callback del future.
+        log_row: entrada del log de envíos, que solo se escribe si el mensaje llega a publicarse.
+        Devuelve False si no se publicó (sin hueco en PUBLISH_TIMEOUT o error del cliente).
+        """
+        start = time.monotonic()
+        if not self._outstanding.acquire(timeout=self.PUBLISH_TIMEOUT):
+            with self._metrics_lock:
+                self.metrics[stream].dropped += 1
+                self.errors += 1
+            return False
+        sent = time.monotonic()
+        with self._metrics_lock:
+            self.metrics[stream].blocked_ms += (sent - start) * 1000
+            self.in_flight += 1
         try:
-            payload = record.copy()
-            if 'game_time' in payload:
-                del payload['game_time']
-            if 'converted_time' in payload:
-                del payload['converted_time']  # Limpieza extra
+            future = self.publisher.publish(topic, data)
+        except Exception:
+            self._release_slot()
+            with self._metrics_lock:
+                self.metrics[stream].failed += 1
+                self.errors += 1
+            return False
+        with self._metrics_lock:
+            self.metrics[stream].sent += 1
+            if stream == 'tracking':
+                self.total_tracking += 1
+            else:
+                self.total_events += 1
+        log_seq = self._sent_log(stream).append(*log_row)
+        future.add_done_callback(functools.partial(self._on_published, stream, sent, log_seq))
+        return True
 
-            data_str = json.dumps(payload, default=str).encode("utf-8")
-            start = time.time()
-            self.publisher.publish(self.path_track, data_str)
-            lat = (time.time() - start) * 1000
-
-            self.metrics['tracking']['count'] += 1
-            self.metrics['tracking']['total_latency'] += lat
-            self.total_tracking += 1
-
-            self.sent_tracking_log.append({
-                'Frame': payload.get('frame'),
-                'Time': payload.get('timestamp', 'NULL'),  # Mostrar el string original
-                'Period': payload.get('period'),
-                'Latencia': int(lat)
-            })
-            if len(self.sent_tracking_log) > 2000:
-                self.sent_tracking_log.pop(0)
+    def _count_error(self):
+        with self._metrics_lock:
+            self.errors += 1
 
+    def _release_slot(self):
+        with self._metrics_lock:
+            self.in_flight -= 1
+        self._outstanding.release()
+
+    def _on_published(self, stream, sent, log_seq, future):
+        """Callback de confirmación (hilo del cliente Pub/Sub). log_seq: entrada del log de envíos."""
+        self._release_slot()
+        lat = (time.monotonic() - sent) * 1000
+        try:
+            future.result()
         except Exception:
-            self.errors += 1
+            with self._metrics_lock:
+                self.metrics[stream].failed += 1
+                self.errors += 1
+            self._sent_log(stream).update(log_seq, 'Latencia', -1)
+            return
+        with self._metrics_lock:
+            self.metrics[stream].ack(lat)
+        self.latency_ms = int(lat)
+        self._sent_log(stream).update(log_seq, 'Latencia', int(lat))
+
+    def _sent_log(self, stream) -> RingBuffer:
+        return self.sent_tracking_log if stream == 'tracking' else self.sent_eventing_log
+
+    def _publish_roster(self):
+        """
+        Los frames no llevan nombres ni equipos (índices en binario, player_id en JSON): la tabla
+        del Roster se publica al iniciar el stream, cada roster_interval frames y con send_alignment.
+        """
+        try:
+            self.publisher.publish(self.path_track, roster_message(self.roster))
+            return True
+        except Exception:
+            self._count_error()
+            return False
+
+    def _publish_tracking(self, idx):
+        try:
+            # Binario pre-serializado en la carga; JSON serializado aquí (solo este frame en memoria)
+            # Columnas: Frame, Time (string original), Period; Latencia se rellena con el ack
+            # None: frame que no cabe en el formato binario (se envía en JSON)
+            data = self._wire[idx] if self.wire_format != 'json' else None
+            if data is None:
+                data = json_frame(self.frames, idx)
+            log_row = (self.frames.frame[idx], self.frames.timestamp[idx] or 'NULL', self.frames.period[idx])
+            return self._send('tracking', self.path_track, data, log_row)
+
+        except Exception:
+            self._count_error()
+            return False
 
     def _publish_event(self, record):
         try:
@@ -332,22 +606,13 @@ class SimulationEngine:
                 del payload['game_time']
 
             data_str = json.dumps(payload, default=str).encode("utf-8")
-            start = time.time()
-            self.publisher.publish(self.path_event, data_str)
-            lat = (time.time() - start) * 1000
-
-            self.metrics['eventing']['count'] += 1
-            self.metrics['eventing']['total_latency'] += lat
-            self.total_events += 1
-
             evt_type = payload.get('type_name') or payload.get('type') or 'Evento'
-            self.sent_eventing_log.append({
-                'Period': payload.get('period'),
-                'Evento': evt_type,
-                'Time': f"{self.current_time:.2f}",
-                'Latencia': int(lat)
-            })
+            log_row = (payload.get('period'), evt_type, f"{self.current_time:.2f}")
+            if not self._send('eventing', self.path_event, data_str, log_row):
+                return False
             self.last_log = f"⚡ P{payload.get('period')} {evt_type} @ {self.current_time:.1f}s"
+            return True
 
         except Exception:
-            self.errors += 1
+            self._count_error()
+            return False
@@ -0,0 +1,315 @@
+# simulator/multi_runner.py
+"""
+Simulación de muchos partidos a la vez en un solo proceso (tráfico realista de jornada).
+
+Un único event loop de asyncio: los partidos se cargan en paralelo en hilos (con la caché de
+cada carpeta) y un solo planificador, un heap de deadlines, decide qué partido publica su
+siguiente frame. Todos los partidos comparten el mismo sink de publicación. Cada mensaje lleva
+el atributo match_id para que los consumidores separen los partidos.
+
+Uso:
+    python simulator/multi_runner.py data/partido_1 data/partido_2:10 data/partido_3:max
+    (carpeta[:velocidad], por defecto 1x; 'max' = sin esperas)
+"""
+import argparse
+import asyncio
+import heapq
+import json
+import math
+import os
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, ".."))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from TACTIX_LIVE.utils.clock import MasterClock  # noqa: E402
+from TACTIX_LIVE.utils.config_loader import load_config  # noqa: E402
+from TACTIX_LIVE.utils.match_cache import MatchCache  # noqa: E402
+from TACTIX_LIVE.utils.match_loader import load_match, match_sources  # noqa: E402
+from TACTIX_LIVE.utils.metrics import MetricsServer, StreamMetrics, render_prometheus  # noqa: E402
+from TACTIX_LIVE.utils.preprocess import preprocess_options  # noqa: E402
+from TACTIX_LIVE.utils.schedule import build_schedule  # noqa: E402
+from TACTIX_LIVE.utils.transports import create_sink  # noqa: E402
+from TACTIX_LIVE.utils.wire_format import encode_frames, json_frame, roster_message  # noqa: E402
+
+
+class MatchSession:
+    """
+    Estado de reproducción de un partido: frames (binario ya serializado; JSON al enviar),
+    eventos serializados, plan de despacho
+    (el mismo build_schedule que SimulationEngine), posición actual y su propio MasterClock.
+    """
+
+    def __init__(self, match_id: str, data_dir: str, speed: float = 1.0):
+        self.match_id = match_id
+        self.data_dir = data_dir
+        self.speed = speed
+        self.clock = MasterClock(speed)
+        self.roster = None
+        self.frames = None
+        self.n_frames = 0
+        self.wire = None  # Solo wire_format binario/delta (None en los frames que van en JSON)
+        self.json_fallback = 0
+        self.roster_interval = 0
+        self.steps = []
+        self.event_end = []
+        self.events = []
+        self.error = None
+        self.track_idx = 0
+        self.event_idx = 0
+        self.sent = {'tracking': 0, 'eventing': 0}
+        self.acked = {'tracking': 0, 'eventing': 0}
+        self.failed = 0
+        self.total_latency = 0.0
+
+    def load(self, wire_format: str = 'json', keyframe_interval: int = 0, cache: bool = True,
+             preprocess: dict = None, roster_interval: int = 0):
+        """
+        Carga y serializa el partido completo (bloqueante: se ejecuta en un hilo del pool).
+        roster_interval > 0: due() vuelve a incluir el Roster cada roster_interval frames.
+        """
+        roster, frames, events = load_match(match_sources(self.data_dir), MatchCache() if cache else None, preprocess)
+        # El JSON de todos los frames ocuparía cientos de MB por partido: se serializa en due()
+        self.wire = None if wire_format == 'json' else encode_frames(frames, 0, len(frames), keyframe_interval)
+        self.json_fallback = self.wire.count(None) if self.wire is not None else 0
+        steps, event_end, _, _ = build_schedule(frames.period, frames.game_time, events['period'], events['game_time'])
+        self.steps, self.event_end = steps.tolist(), event_end.tolist()
+        self.events = [json.dumps({k: v for k, v in r.items() if k != 'game_time'}, default=str).encode("utf-8")
+                       for r in events.to_dict('records')]
+        self.roster = roster
+        self.roster_interval = roster_interval
+        self.frames = frames
+        self.n_frames = len(frames)
+
+    @property
+    def done(self) -> bool:
+        return self.track_idx >= self.n_frames
+
+    def next_deadline(self) -> float:
+        """Avanza el reloj del partido hasta el frame actual y devuelve su deadline (monotonic)."""
+        return self.clock.advance(self.steps[self.track_idx])
+
+    def due(self):
+        """
+        Mensajes del frame actual, en orden: (stream, bytes) de los eventos vencidos, el Roster si
+        toca republicarlo y el frame.
+        """
+        end = self.event_end[self.track_idx]
+        out = [('eventing', data) for data in self.events[self.event_idx:end]]
+        self.event_idx = max(self.event_idx, end)
+        idx = self.track_idx
+        if self.roster_interval and idx and idx % self.roster_interval == 0:
+            out.append(('roster', roster_message(self.roster)))
+        data = self.wire[idx] if self.wire is not None else None
+        out.append(('tracking', data if data is not None else json_frame(self.frames, idx)))
+        self.track_idx += 1
+        return out
+
+    def summary(self) -> dict:
+        clock = self.clock.stats.summary()
+        acked = max(1, self.acked['tracking'] + self.acked['eventing'])
+        return {
+            'match_id': self.match_id,
+            'frames': f"{self.sent['tracking']}/{self.n_frames}",
+            'events': self.sent['eventing'],
+            'failed': self.failed,
+            'json_fallback': self.json_fallback,
+            'ack_ms': round(self.total_latency / acked, 2),
+            'late_p99_ms': round(clock['p99_ms'], 2),
+            'resyncs': self.clock.resyncs,
+            'error': self.error,
+        }
+
+
+class MultiMatchRunner:
+    """
+    Planificador único para N partidos sobre un sink compartido.
+
+    - Carga concurrente: cada partido entra en el heap en cuanto termina de cargar.
+    - Heap de (deadline, partido): se espera al deadline más próximo con asyncio (sin hilos
+      por partido) y se despacha ese partido; su MasterClock registra el retraso real.
+    - Backpressure global: como mucho max_outstanding mensajes sin confirmar entre todos
+      los partidos; los acks llegan por los callbacks de los futures del sink.
+    """
+
+    YIELD_EVERY = 64  # Despachos seguidos sin ceder el loop (partidos a velocidad máxima)
+
+    def __init__(self, config: dict = None, sink=None, max_outstanding: int = None):
+        self.config = config if config is not None else {}
+        self.sink = sink if sink is not None else create_sink(self.config)
+        pubsub = self.config.get('pubsub', {})
+        self.path_track = self.sink.topic_path(self.config.get('gcp_project_id', ''), pubsub.get('topic_tracking', ''))
+        self.path_event = self.sink.topic_path(self.config.get('gcp_project_id', ''), pubsub.get('topic_eventing', ''))
+        self.wire_format = self.config.get('wire_format', 'json')
+        self.keyframe_interval = self.config.get('keyframe_interval', 25) if self.wire_format == 'delta' else 0
+        self.roster_interval = self.config.get('roster_interval', self.keyframe_interval or 250)
+        self.max_outstanding = max_outstanding or pubsub.get('max_outstanding', 1000)
+        self.sessions = []
+        self.running = False
+        # Métricas globales por stream (todos los partidos): histograma de ack, throughput, fallos
+        self.metrics = {name: StreamMetrics() for name in ('tracking', 'eventing')}
+        self.in_flight = 0
+
+    def add_match(self, data_dir: str, speed: float = 1.0, match_id: str = None) -> MatchSession:
+        session = MatchSession(match_id or os.path.basename(os.path.normpath(data_dir)), data_dir, speed)
+        self.sessions.append(session)
+        return session
+
+    def stop(self):
+        self.running = False
+
+    async def _load(self, session: MatchSession):
+        try:
+            await asyncio.to_thread(session.load, self.wire_format, self.keyframe_interval,
+                                    self.config.get('cache', {}).get('enabled', True),
+                                    preprocess_options(self.config), self.roster_interval)
+            if session.n_frames:
+                await self._publish(session, 'roster', self.path_track, roster_message(session.roster))
+            if session.n_frames:
+                heapq.heappush(self._heap, (session.next_deadline(), id(session), session))
+        except Exception as e:
+            session.error = str(e)
+        finally:
+            self._wakeup.set()
+
+    async def _publish(self, session: MatchSession, stream: str, topic: str, data: bytes):
+        await self._slots.acquire()
+        loop = asyncio.get_running_loop()
+        sent = time.monotonic()
+        try:
+            future = self.sink.publish(topic, data, match_id=session.match_id)
+        except Exception:
+            self._slots.release()
+            session.failed += 1
+            if stream in self.metrics:
+                self.metrics[stream].failed += 1
+            return
+        self.in_flight += 1
+
+        def on_done(f):
+            # Hilo del cliente: las métricas se actualizan en el hilo del loop
+            loop.call_soon_threadsafe(self._ack, session, stream, f, (time.monotonic() - sent) * 1000)
+
+        future.add_done_callback(on_done)
+        if stream in session.sent:
+            session.sent[stream] += 1
+            self.metrics[stream].sent += 1
+
+    def _ack(self, session: MatchSession, stream: str, future, latency_ms: float):
+        self._slots.release()
+        self.in_flight -= 1
+        if future.exception() is not None:
+            session.failed += 1
+            if stream in self.metrics:
+                self.metrics[stream].failed += 1
+        elif stream in session.acked:
+            session.acked[stream] += 1
+            session.total_latency += latency_ms
+            self.metrics[stream].ack(latency_ms)
+
+    async def run(self):
+        """Carga y reproduce todos los partidos añadidos hasta que terminan (o stop())."""
+        self.running = True
+        self._heap = []
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.max_outstanding)
+        loaders = [asyncio.create_task(self._load(s)) for s in self.sessions]
+
+        streak = 0
+        while self.running and (self._heap or not all(t.done() for t in loaders)):
+            if not self._heap:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+
+            deadline, _, session = self._heap[0]
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                # Un partido recién cargado puede tener un deadline anterior: despertar también con él
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                streak = 0
+                continue
+
+            heapq.heappop(self._heap)
+            session.clock.observe(deadline)
+            for stream, data in session.due():
+                await self._publish(session, stream, self.path_event if stream == 'eventing' else self.path_track, data)
+            if not session.done:
+                heapq.heappush(self._heap, (session.next_deadline(), id(session), session))
+
+            streak += 1
+            if streak >= self.YIELD_EVERY:
+                streak = 0
+                await asyncio.sleep(0)
+
+        await asyncio.gather(*loaders)
+        # Esperar los acks pendientes antes de devolver el resumen
+        for _ in range(self.max_outstanding):
+            await self._slots.acquire()
+        self.running = False
+        return self.summary()
+
+    def summary(self) -> list:
+        return [s.summary() for s in self.sessions]
+
+    def collect_metrics(self) -> str:
+        """Métricas globales en formato Prometheus (para MetricsServer)."""
+        active = sum(1 for s in self.sessions if s.n_frames and not s.done)
+        gauges = {
+            'in_flight_messages': ("Mensajes publicados pendientes de ack", self.in_flight),
+            'sink_queue_depth': ("Mensajes en la cola local del transporte", self.sink.depth()),
+            'matches_active': ("Partidos emitiendo", active),
+            'clock_lateness_p99_seconds': ("Peor p99 del retraso del reloj entre partidos",
+                                           max((s.clock.stats.summary()['p99_ms'] for s in self.sessions),
+                                               default=0.0) / 1000),
+        }
+        return render_prometheus(self.metrics, gauges)
+
+
+def _parse_match(arg: str):
+    """'carpeta[:velocidad]' -> (carpeta, velocidad). 'max' o 'inf' = sin esperas."""
+    path, sep, speed = arg.rpartition(":")
+    if not sep or os.sep in speed:
+        return arg, 1.0
+    return path, math.inf if speed.lower() in ('max', 'inf') else max(1.0, float(speed))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulación concurrente de varios partidos")
+    parser.add_argument('matches', nargs='+', help="carpeta[:velocidad] de cada partido")
+    parser.add_argument('--env', default=os.environ.get("APP_ENV", "dev"))
+    parser.add_argument('--metrics', metavar='HOST:PORT', help="endpoint Prometheus local (p.ej. 127.0.0.1:9108)")
+    args = parser.parse_args(argv)
+
+    runner = MultiMatchRunner(load_config(args.env))
+    for arg in args.matches:
+        runner.add_match(*_parse_match(arg))
+    server = MetricsServer(runner.collect_metrics, args.metrics).start() if args.metrics else None
+    if server:
+        print(f"📈 Métricas en http://{server.address}/metrics")
+
+    start = time.monotonic()
+    try:
+        summary = asyncio.run(runner.run())
+    except KeyboardInterrupt:
+        print("\n🛑 Simulación detenida manualmente.")
+        summary = runner.summary()
+    finally:
+        runner.sink.close()
+        if server:
+            server.close()
+
+    print(f"\n🏁 {len(summary)} partidos en {time.monotonic() - start:.1f}s")
+    for row in summary:
+        print("   " + " | ".join(f"{k}={v}" for k, v in row.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import math
+
+from TACTIX_LIVE.utils.clock import MasterClock
+
+
+class FakeTime:
+    """Reloj simulado: sleep avanza el tiempo; 'work' simula el coste de publicar."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_sin_deriva_con_coste_de_publicacion():
+    """El coste de publicar (10 ms por frame) no se acumula: el frame N sale en N * 40 ms"""
+    t = FakeTime()
+    clock = MasterClock(speed=1.0, spin=0.0, clock=t.clock, sleep=t.sleep)
+    start = t.now
+    for _ in range(100):
+        clock.tick(0.04)
+        t.now += 0.01  # publicación
+    assert math.isclose(t.now - 0.01 - start, 100 * 0.04)
+    assert clock.stats.max < 1e-9
+
+
+def test_velocidad_y_maximo_throughput():
+    t = FakeTime()
+    clock = MasterClock(speed=10.0, spin=0.0, clock=t.clock, sleep=t.sleep)
+    start = t.now
+    for _ in range(10):
+        clock.tick(0.04)
+    assert math.isclose(t.now - start, 0.04)
+
+    clock.set_speed(math.inf)
+    before = t.now
+    for _ in range(1000):
+        clock.tick(0.04)
+    assert t.now == before
+
+
+def test_resync_tras_bloqueo():
+    """Un bloqueo largo re-ancla el reloj en lugar de emitir una ráfaga de frames"""
+    t = FakeTime()
+    clock = MasterClock(speed=1.0, spin=0.0, max_lag=1.0, clock=t.clock, sleep=t.sleep)
+    clock.tick(0.04)
+    t.now += 5.0
+    clock.tick(0.04)
+    assert clock.resyncs == 1
+    before = t.now
+    clock.tick(0.04)
+    assert math.isclose(t.now - before, 0.04)
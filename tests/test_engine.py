@@ -0,0 +1,143 @@
+import concurrent.futures
+import json
+import math
+import socket
+import threading
+import time
+
+import simulator.engine as engine_module
+from TACTIX_LIVE.streaming.job_scheduler import JobScheduler
+from TACTIX_LIVE.streaming.streaming_worker import DEFAULT_MATCH, MemorySource, StreamingWorker
+from TACTIX_LIVE.utils.match_loader import load_eventing
+
+CONFIG = {'pubsub': {'topic_tracking': 'tracking', 'topic_eventing': 'eventing'},
+          'transport': {'type': 'memory'}, 'cache': {'enabled': False}}
+
+
+def _engine(monkeypatch, config=None):
+    monkeypatch.setattr(engine_module, "load_config", lambda env: config or CONFIG)
+    return engine_module.SimulationEngine("test")
+
+
+def test_evento_publicado_por_el_simulador_dispara_el_calculo(monkeypatch, tmp_path):
+    engine = _engine(monkeypatch)
+    sink = engine.publisher
+    path = tmp_path / "eventing_file.csv"
+    path.write_text("event_id;period;timestamp;type_name;player_id\n0;1;2025-11-20 00:00:01.000;Goal;7\n")
+    engine._publish_event(load_eventing(str(path)).to_dict('records')[0])
+    assert 'game_time' not in json.loads(sink.queue('eventing').queue[0][0])  # Se publica sin game_time
+
+    for i in range(30):
+        sink.publish('tracking', json.dumps({"frame": i, "timestamp": f"00:00:{i * 0.1:05.2f}", "period": 1,
+                                             "player_data": [{"player_id": 7, "x": 0.0, "y": 0.0}]}).encode())
+    scheduler = JobScheduler({'max_wait': 60}, job=lambda snapshot, params: {'events': snapshot['events']},
+                             executor=concurrent.futures.ThreadPoolExecutor(1))
+    worker = StreamingWorker({'batch_latency': 0.01}, scheduler=scheduler)
+    worker.start([MemorySource(sink, {'tracking': 'tracking', 'eventing': 'eventing'})])
+    end = time.monotonic() + 5
+    while DEFAULT_MATCH not in scheduler.results and time.monotonic() < end:
+        time.sleep(0.01)
+    worker.stop()
+    scheduler.close()
+
+    event = scheduler.results[DEFAULT_MATCH]['events'][0]
+    assert event['type_name'] == "Goal" and event['game_time'] == 1.0 and event['period'] == 1
+
+
+class _StuckSink:
+    """Sink cuyos futures no se resuelven nunca; con fail=True publish lanza."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.published = []
+
+    def publish(self, topic, data):
+        if self.fail:
+            raise RuntimeError("cliente caído")
+        self.published.append(data)
+        return concurrent.futures.Future()
+
+
+def test_solo_cuenta_y_registra_lo_publicado(monkeypatch):
+    config = dict(CONFIG, pubsub=dict(CONFIG['pubsub'], max_outstanding=1))
+    engine = _engine(monkeypatch, config)
+    engine.PUBLISH_TIMEOUT = 0.05
+    engine.publisher = _StuckSink()
+    event = {"event_id": 0, "period": 1, "type_name": "Pass", "game_time": 1.0}
+
+    assert engine._publish_event(event)
+    assert not engine._publish_event(event)  # El único hueco sigue ocupado: no se publica
+    assert len(engine.publisher.published) == 1 and engine.total_events == 1
+    assert len(engine.sent_eventing_log) == 1 and engine.errors == 1
+    assert engine.metrics['eventing'].dropped == 1
+
+    engine.publisher = _StuckSink(fail=True)
+    engine._outstanding.release()
+    assert not engine._publish_event(event)
+    assert engine.total_events == 1 and len(engine.sent_eventing_log) == 1 and engine.errors == 2
+    assert engine.metrics['eventing'].failed == 1 and engine.in_flight == 1
+
+
+def test_roster_periodico(monkeypatch, tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "ids_tracking.json").write_text(json.dumps(
+        {"home": {"team_id": 1, "team_name": "Local", "players": [{"player_id": 7, "player_name": "Siete"}]}}))
+    (data / "tracking_file.jsonl").write_text("".join(
+        json.dumps({"frame": i, "timestamp": f"00:00:{i * 0.04:05.2f}", "period": 1,
+                    "player_data": [{"x": float(i), "y": 0.0, "player_id": 7}]}) + "\n" for i in range(30)))
+    (data / "eventing_file.csv").write_text("period;timestamp;type_name\n1;00:00:00.50;Pass\n")
+    monkeypatch.chdir(tmp_path)
+    engine = _engine(monkeypatch, dict(CONFIG, roster_interval=10))
+    engine.set_speed(math.inf)
+    assert engine.load_data()
+    engine.start_stream()
+    engine._thread.join(5)
+
+    rosters, frames = [], 0
+    for data, _ in engine.publisher.queue('tracking').queue:
+        if json.loads(data).get('type') == 'roster':
+            rosters.append(frames)
+        else:
+            frames += 1
+    assert frames == 30 and rosters == [0, 10, 20]
+
+
+def test_stop_stream_despierta_la_espera_de_frames(monkeypatch):
+    engine = _engine(monkeypatch)
+    engine.running = True  # Stream en marcha esperando un frame que la carga aún no ha preparado
+    waiter = threading.Thread(target=engine._wait_frames, args=(0,), daemon=True)
+    waiter.start()
+    time.sleep(0.05)
+    engine.stop_stream()
+    waiter.join(1)
+    assert not waiter.is_alive()
+
+
+def test_close_libera_el_puerto_de_metricas(monkeypatch):
+    with socket.socket() as probe:  # Puerto libre para los dos motores
+        probe.bind(("127.0.0.1", 0))
+        address = f"127.0.0.1:{probe.getsockname()[1]}"
+    config = dict(CONFIG, metrics={'enabled': True, 'address': address})
+    old = _engine(monkeypatch, config)
+    assert old.metrics_server is not None
+    old.close()
+    assert old.metrics_server is None and old.publisher is None
+
+    new = _engine(monkeypatch, config)  # Hard Reset: el nuevo motor vuelve a tener el puerto
+    try:
+        assert new.metrics_server is not None and new.metrics_server.address == address
+    finally:
+        new.close()
+
+
+def test_frame_que_no_cabe_en_binario_va_en_json(monkeypatch):
+    engine = _engine(monkeypatch, dict(CONFIG, wire_format='delta'))
+    engine.frames.append([{"frame": i, "timestamp": "x" * 300 if i == 1 else f"00:00:0{i}.00", "period": 1,
+                           "player_data": [{"x": float(i), "y": 0.0, "player_id": 7}]} for i in range(3)])
+    engine._prepare_range(0, len(engine.frames))  # Antes: ValueError y la carga entera fallaba
+    assert engine.json_fallback == 1 and len(engine._schedule) == 3
+    for idx in range(3):
+        assert engine._publish_tracking(idx)
+    sent = [data for data, _ in engine.publisher.queue('tracking').queue]
+    assert json.loads(sent[1])["timestamp"] == "x" * 300 and sent[0][:2] == sent[2][:2] == b"TX"
@@ -0,0 +1,53 @@
+import json
+
+import numpy as np
+
+from TACTIX_LIVE.utils.frame_store import FrameStore, Roster, load_tracking
+
+
+def _roster():
+    roster = Roster()
+    team = roster.add_team(10, "Home FC")
+    roster.add_player(100, team, "Jugador A")
+    return roster
+
+
+def _records():
+    return [
+        {"frame": 0, "timestamp": None, "period": None, "player_data": []},
+        {"frame": 1, "timestamp": "00:00:00.10", "period": 1, "possession": {"group": "home team"},
+         "ball_data": {"x": 1.5, "y": -2.0, "z": 0.1, "is_detected": True},
+         "player_data": [{"x": 10.25, "y": -3.5, "player_id": 100, "is_detected": True},
+                         {"x": 1.0, "y": 2.0, "player_id": 999, "is_detected": False}]},
+    ]
+
+
+def test_columnas_y_roster():
+    """Los frames se guardan en arrays y los jugadores desconocidos amplían el roster"""
+    store = FrameStore(_roster())
+    store.append(_records())
+    assert len(store) == 2 and store.xy.shape == (2, 2, 2)
+    assert store.period.tolist() == [1, 1]
+    assert np.isnan(store.game_time[0]) and store.game_time[1] == 0.1
+    assert np.isnan(store.xy[0]).all()
+    assert store.roster.player_ids == [100, 999]
+
+
+def test_record_reconstruye_payload_enriquecido():
+    store = FrameStore(_roster())
+    store.append(_records())
+    rec = store.record(1)
+    assert rec["possession"] == {"group": "home team"}
+    assert rec["ball_data"] == {"x": 1.5, "y": -2.0, "z": 0.1, "is_detected": True}
+    assert rec["player_data"][0] == {"x": 10.25, "y": -3.5, "player_id": 100, "is_detected": True,
+                                     "team_id": 10, "team_name": "Home FC", "player_name": "Jugador A"}
+    assert rec["player_data"][1] == {"x": 1.0, "y": 2.0, "player_id": 999, "is_detected": False}
+
+
+def test_carga_por_bloques(tmp_path):
+    """Leer en bloques pequeños produce el mismo store que leer de una vez"""
+    path = tmp_path / "tracking.jsonl"
+    path.write_text("\n".join(json.dumps(r) for r in _records() * 3) + "\n")
+    store = load_tracking(str(path), _roster(), chunk_size=2)
+    assert len(store) == 6
+    assert store.record(5) == store.record(1)
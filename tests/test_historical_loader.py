@@ -0,0 +1,88 @@
+import json
+import os
+import shutil
+
+from TACTIX_LIVE.historical.historical_loader import convert_archive, discover_matches, read_dataset
+
+
+def _match(path, n_frames=12):
+    os.makedirs(path)
+    team = {"team_id": 10, "team_name": "Local", "players": [{"player_id": 7, "player_name": "Siete"}]}
+    with open(os.path.join(path, "ids_tracking.json"), "w", encoding="utf-8") as f:
+        json.dump({"home": team}, f)
+    with open(os.path.join(path, "eventing_file.csv"), "w", encoding="utf-8") as f:
+        f.write("event_id;period;timestamp;type_name;player_id\n0;1;00:00:00.50;Pass;7\n1;1;00:00:01.00;Goal;\n")
+    with open(os.path.join(path, "tracking_file.jsonl"), "w", encoding="utf-8") as f:
+        for i in range(n_frames):
+            players = [{"player_id": 7, "x": 1.0 * i, "y": 2.0, "is_detected": True}]
+            if i % 2:
+                players.append({"player_id": 99, "x": -1.0, "y": 0.0})  # No está en el archivo de IDs
+            f.write(json.dumps({"frame": i, "timestamp": f"00:00:{i * 0.1:05.2f}", "period": 1,
+                                "ball_data": {"x": 0.0, "y": 0.0, "z": None, "is_detected": True},
+                                "player_data": players}) + "\n")
+
+
+def test_dataset_particionado_e_incremental(tmp_path):
+    raw, out = tmp_path / "raw", str(tmp_path / "out")
+    _match(str(raw / "2023" / "Liga" / "m1"))
+    _match(str(raw / "2024-2025" / "Copa del Rey" / "m2"), n_frames=30)
+    assert [m['competition'] for m in discover_matches(str(raw))] == ["Liga", "Copa_del_Rey"]
+
+    options = {'workers': 2, 'chunk_size': 8}
+    summary = convert_archive(str(raw), out, options, log=lambda *_: None)
+    assert summary['converted'] == 4 and summary['failed'] == 0
+
+    events = read_dataset(out, 'eventing', season=2023)
+    assert events['type_name'].tolist() == ["Pass", "Goal"] and events['game_time'].tolist() == [0.5, 1.0]
+    assert events['player_id'].isna().tolist() == [False, True] and set(events['match']) == {"m1"}
+    tracking = read_dataset(out, 'tracking', competition="Copa del Rey")
+    assert len(tracking) == 30 + 15
+    assert tracking.loc[tracking['player_id'] == "7", 'team_id'].eq("10").all()
+    assert tracking.loc[tracking['player_id'] == "99", 'team_id'].isna().all()
+    frames = read_dataset(out, 'frames', columns=['frame', 'ball_z', 'match'])
+    assert len(frames) == 42 and frames['ball_z'].isna().all()
+
+    # Sin cambios no se convierte nada; con el mismo contenido y otro mtime lo decide el hash
+    os.utime(raw / "2023" / "Liga" / "m1" / "eventing_file.csv")
+    assert convert_archive(str(raw), out, options, log=lambda *_: None)['converted'] == 0
+
+    # Solo se reconvierte lo cambiado; lo borrado sale del dataset
+    shutil.rmtree(raw / "2024-2025")
+    with open(raw / "2023" / "Liga" / "m1" / "eventing_file.csv", "a", encoding="utf-8") as f:
+        f.write("2;2;00:00:03.00;Shot;7\n")
+    summary = convert_archive(str(raw), out, options, log=lambda *_: None)
+    assert (summary['converted'], summary['unchanged'], summary['removed']) == (1, 1, 2)
+    assert len(read_dataset(out, 'eventing')) == 3 and len(read_dataset(out, 'tracking')) == 12 + 6
+
+
+def test_ids_no_numericos_y_fallos_sin_temporales(tmp_path):
+    raw, out = tmp_path / "raw", str(tmp_path / "out")
+    _match(str(raw / "2023" / "Liga" / "m1"))
+    # Un árbitro con id de texto a mitad de archivo (después del primer bloque)
+    with open(raw / "2023" / "Liga" / "m1" / "tracking_file.jsonl", "a", encoding="utf-8") as f:
+        f.write(json.dumps({"frame": 12, "timestamp": "00:00:01.20", "period": 1,
+                            "player_data": [{"player_id": "ref-1", "x": 0.0, "y": 0.0}]}) + "\n")
+    _match(str(raw / "2023" / "Liga" / "m2"))
+    with open(raw / "2023" / "Liga" / "m2" / "tracking_file.jsonl", "a", encoding="utf-8") as f:
+        f.write("{roto\n")
+
+    summary = convert_archive(str(raw), out, {'workers': 1, 'chunk_size': 4}, log=lambda *_: None)
+    assert (summary['converted'], summary['failed']) == (3, 1)
+    tracking = read_dataset(out, 'tracking')  # Un solo esquema para todos los archivos
+    assert tracking['player_id'].tolist()[-1] == "ref-1" and set(tracking['match']) == {"m1"}
+    leftovers = [name for _, _, files in os.walk(out) for name in files if name.endswith(".tmp")]
+    assert leftovers == []
+
+
+def test_eventing_con_tipos_distintos_entre_partidos(tmp_path):
+    raw, out = tmp_path / "raw", str(tmp_path / "out")
+    for name, rows in (("m1", "0;1;00:00:00.50;Pass;7;\n1;1;00:00:01.00;Pass;8;\n"),
+                       ("m2", "0;1;00:00:00.50;Foul;ref-1;Yellow\n")):
+        _match(str(raw / "s1" / "c1" / name))
+        with open(raw / "s1" / "c1" / name / "eventing_file.csv", "w", encoding="utf-8") as f:
+            f.write("event_id;period;timestamp;type_name;player_id;outcome\n" + rows)
+
+    assert convert_archive(str(raw), out, {'workers': 1}, log=lambda *_: None)['failed'] == 0
+    events = read_dataset(out, 'eventing')  # Antes: int64 en m1 y texto en m2 -> ArrowInvalid
+    assert events['player_id'].tolist() == ["7", "8", "ref-1"]
+    assert events['outcome'].tolist() == [None, None, "Yellow"] and events['game_time'].tolist() == [0.5, 1.0, 0.5]
@@ -0,0 +1,154 @@
+import concurrent.futures
+import threading
+import time
+
+import numpy as np
+
+from TACTIX_LIVE.streaming.job_scheduler import JobScheduler, pitch_control_job
+from TACTIX_LIVE.utils.frame_store import FrameStore, Roster
+
+
+def _batch(roster, start, n=10):
+    """n frames a 10 fps desde el segundo 'start': equipo 0 a la izquierda, equipo 1 a la derecha."""
+    records = [{"frame": round((start + 0.1 * i) * 10), "timestamp": f"00:00:{start + 0.1 * i:05.2f}", "period": 1,
+                "ball_data": {"x": 0.0, "y": 0.0, "z": 0.0, "is_detected": True},
+                "player_data": [{"x": sign * (10.0 + 3 * k), "y": 4.0 * k - 20, "player_id": team_id * 100 + k}
+                                for team_id, sign in ((10, -1), (20, 1)) for k in range(11)]}
+               for i in range(n)]
+    store = FrameStore(roster)
+    store.append(records)
+    return store
+
+
+def _roster():
+    roster = Roster()
+    for team_id in (10, 20):
+        t = roster.add_team(team_id, f"Equipo {team_id}")
+        for k in range(11):
+            roster.add_player(team_id * 100 + k, t)
+    return roster
+
+
+class _Gate:
+    """Trabajo de prueba: guarda el snapshot y espera a que el test lo libere."""
+
+    def __init__(self):
+        self.snapshots = []
+        self.release = threading.Event()
+
+    def __call__(self, snapshot, params):
+        self.snapshots.append(snapshot)
+        self.release.wait(5)
+        return {'match_id': snapshot['match_id'], 'events': snapshot['events']}
+
+
+def test_fusion_sustitucion_y_reentregas():
+    roster, gate = _roster(), _Gate()
+    executor = concurrent.futures.ThreadPoolExecutor(1)
+    scheduler = JobScheduler({'max_workers': 1, 'max_wait': 60}, job=gate, executor=executor)
+
+    shot = {"event_id": 1, "type_name": "Shot", "game_time": 10.0}
+    goal = {"event_id": 2, "type_name": "Goal", "game_time": 10.5}
+    scheduler.observe("m", _batch(roster, 9.0), [shot, {"event_id": 0, "type_name": "Pass", "game_time": 9.5}])
+    scheduler.observe("m", None, [goal, shot])  # Gol seguido del tiro: se fusionan; el tiro reentregado se ignora
+    assert scheduler.counts['coalesced'] == 1 and scheduler.counts['duplicates'] == 1
+    assert not scheduler.running  # Falta el tracking de después del evento
+
+    scheduler.observe("m", _batch(roster, 10.0, 20), [])
+    assert scheduler.counts['submitted'] == 1
+    # Con el pool ocupado, una ráfaga deja un solo trabajo en espera (el último)
+    for i in range(20):
+        scheduler.observe("m", None, [{"event_id": 10 + i, "type_name": "Shot", "game_time": 20.0 + 5 * i}])
+    assert len(scheduler.pending) == 1 and scheduler.counts['superseded'] == 19
+
+    gate.release.set()
+    scheduler.close()
+    snapshot = gate.snapshots[0]
+    assert [e['event_id'] for e in snapshot['events']] == [1, 2]
+    assert snapshot['game_time'][0] >= 8.0 - 1e-6 and snapshot['game_time'][-1] <= 11.5 + 1e-6
+    assert snapshot['xy'].shape[1:] == (22, 2) and snapshot['team'].tolist() == [0] * 11 + [1] * 11
+    assert scheduler.results["m"]['events'][-1] is goal
+    assert scheduler.counts['cancelled'] == 1  # El que esperaba al cerrar
+
+
+def test_resultado_tardio_descartado():
+    roster, gate = _roster(), _Gate()
+    scheduler = JobScheduler({'max_workers': 1, 'max_wait': 0, 'stale_after': 5.0}, job=gate,
+                             executor=concurrent.futures.ThreadPoolExecutor(1))
+    scheduler.observe("m", _batch(roster, 1.0), [{"type_name": "Goal", "game_time": 1.5}])
+    assert scheduler.counts['submitted'] == 1
+    scheduler.observe("m", _batch(roster, 20.0), [])  # El partido sigue mientras se calcula
+    gate.release.set()
+    scheduler.close()
+    assert scheduler.counts['stale'] == 1 and "m" not in scheduler.results
+
+
+def test_pitch_control_en_el_pool_de_procesos():
+    roster = _roster()
+    done = threading.Event()
+    scheduler = JobScheduler({'max_workers': 1}, job_params={'grid': (21, 14)}, on_result=lambda r: done.set())
+    try:
+        scheduler.observe("m", _batch(roster, 0.0, 40), [{"type_name": "Goal", "game_time": 2.0}])
+        assert done.wait(60)
+    finally:
+        scheduler.close()
+    result = scheduler.results["m"]
+    assert result['event_control'].shape == (14, 21)
+    assert abs(result['game_time'][np.argmax(result['game_time'] >= 2.0)] - 2.0) < 0.3
+    # Simétrico: la mitad del campo para cada equipo
+    assert np.allclose(result['home_control'], 0.5, atol=0.02)
+    assert result['event_control'][7, 2] > 0.9 and result['event_control'][7, 18] < 0.1
+
+
+def test_trabajo_directo_sin_pool():
+    roster = _roster()
+    store = _batch(roster, 0.0, 5)
+    snapshot = {'match_id': "m", 'events': [{"game_time": 0.2}], 'game_time': store.game_time,
+                'period': store.period, 'xy': store.xy, 'ball': store.ball, 'team': roster.team_index, 'step': 2}
+    result = pitch_control_job(snapshot, {'grid': (11, 7)})
+    assert result['control'].shape == (3, 7, 11) and result['game_time'].tolist() == [0.0, 0.2, 0.4]
+    assert np.array_equal(result['event_control'], result['control'][1])
+
+
+def test_max_wait_sin_mas_batches_y_on_result_fuera_del_lock():
+    roster = _roster()
+    done, unlocked = threading.Event(), []
+
+    def on_result(result):
+        # Otro hilo tiene que poder entrar en el planificador mientras se entrega el resultado
+        probe = threading.Thread(target=lambda: unlocked.append(scheduler._lock.acquire(timeout=1)
+                                                                and scheduler._lock.release() is None))
+        probe.start()
+        probe.join()
+        done.set()
+
+    scheduler = JobScheduler({'max_wait': 0.2}, job=lambda snapshot, params: {'events': snapshot['events']},
+                             executor=concurrent.futures.ThreadPoolExecutor(1), on_result=on_result)
+    # El partido se para justo después del gol: nunca llega el tracking del final de la ventana
+    scheduler.observe("m", _batch(roster, 0.0, 20), [{"type_name": "Goal", "game_time": 1.5}])
+    assert scheduler.counts['submitted'] == 0 and len(scheduler.pending) == 1
+    assert done.wait(5)
+    scheduler.close()
+    assert scheduler.counts['submitted'] == 1 and unlocked == [True]
+
+
+def test_pool_lleno_con_espera_vencida_no_hace_bucle():
+    roster, gate = _roster(), _Gate()
+    scheduler = JobScheduler({'max_workers': 1, 'max_wait': 0.05}, job=gate,
+                             executor=concurrent.futures.ThreadPoolExecutor(1))
+    calls = []
+    dispatch = scheduler.dispatch
+    scheduler.dispatch = lambda: calls.append(1) or dispatch()
+
+    scheduler.observe("a", _batch(roster, 0.0, 40), [{"type_name": "Goal", "game_time": 1.5}])
+    scheduler.observe("b", _batch(roster, 0.0, 20), [{"type_name": "Goal", "game_time": 1.5}])
+    assert len(scheduler.running) == 1 and len(scheduler.pending) == 1
+    time.sleep(0.5)  # El trabajo de "b" vence su max_wait con el pool ocupado por "a"
+    assert len(calls) <= 5 and len(scheduler.pending) == 1
+
+    gate.release.set()  # Al terminar "a", _done despacha el de "b"
+    end = time.monotonic() + 5
+    while scheduler.counts['submitted'] < 2 and time.monotonic() < end:
+        time.sleep(0.01)
+    scheduler.close()
+    assert scheduler.counts['submitted'] == 2 and len(calls) <= 10
@@ -0,0 +1,52 @@
+import numpy as np
+
+from TACTIX_LIVE.streaming.kinematics import KinematicsTracker, compute_kinematics, physical_load
+
+
+def _carrera():
+    """Jugador 0: 3 s a 8 m/s y 3 s a 2 m/s (10 Hz), en dos periodos; jugador 1 parado."""
+    t = np.round(np.arange(120) * 0.1, 1)
+    speed = np.where((t % 6.0) < 3.0, 8.0, 2.0)
+    x = np.concatenate([np.cumsum(speed[:60]) * 0.1, 50 + np.cumsum(speed[60:]) * 0.1])
+    xy = np.zeros((120, 2, 2))
+    xy[:, 0, 0] = x
+    period = np.repeat([1, 2], 60)
+    return xy, t, period
+
+
+def test_cinematica_del_partido():
+    xy, t, period = _carrera()
+    kin = compute_kinematics(xy, t, period)
+    summary = kin['summary']
+
+    assert summary['sprints'].tolist() == [2, 0] and summary['hi_runs'].tolist() == [2, 0]
+    assert abs(summary['top_speed'][0] - 8.0) < 1e-6 and summary['top_speed'][1] == 0.0
+    # El salto de posición entre periodos no cuenta como distancia (sin suavizado, exacta)
+    raw = compute_kinematics(xy, t, period, {'smooth_window': 1})['summary']
+    assert abs(raw['distance'][0] - 2 * (8.0 * 3 + 2.0 * 3 - 0.8)) < 1e-6
+    assert abs(summary['distance'][0] - raw['distance'][0]) < 2.5
+    assert abs(kin['speed'][15, 0] - 8.0) < 1e-5 and kin['acceleration'][30, 0] < -5
+
+    # Frames sin posición: sin velocidad ni distancia en ellos
+    xy[40:45, 0] = np.nan
+    kin = compute_kinematics(xy, t, period)
+    assert np.isnan(kin['speed'][40:45, 0]).all() and (kin['step_distance'][40:45, 0] == 0).all()
+
+
+def test_tracker_en_vivo_coincide_con_el_batch():
+    xy, t, period = _carrera()
+    tracker = KinematicsTracker(2)
+    for i in range(len(t)):
+        tracker.update(xy[i], t[i], period[i])
+    batch = compute_kinematics(xy, t, period)['summary']
+
+    assert tracker.summary['sprints'].tolist() == batch['sprints'].tolist()
+    assert abs(tracker.summary['distance'][0] - batch['distance'][0]) < 3.0
+    assert abs(tracker.summary['sprint_distance'][0] - batch['sprint_distance'][0]) < 6.0
+    assert abs(tracker.speed[0] - 2.0) < 0.1
+
+
+def test_tabla_de_carga():
+    xy, t, period = _carrera()
+    table = physical_load(compute_kinematics(xy, t, period)['summary'])
+    assert list(table.index) == [0] and table['Sprints'].iloc[0] == 2
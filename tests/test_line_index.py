@@ -0,0 +1,36 @@
+import json
+import os
+
+from TACTIX_LIVE.utils.line_index import INDEX_SUFFIX, CsvPager, JsonlReader, LineIndex
+
+
+def test_jsonl_rangos_y_salto_por_frame(tmp_path):
+    path = tmp_path / "tracking.jsonl"
+    lines = [json.dumps({"frame": f, "player_data": [{"frame": 999}]}) for f in (10, 11, 13, 14)]
+    blank = "\n  \n" + " " * 8 + "\n\t" + " " * 100 + "\r\n"  # Líneas en blanco cortas y largas
+    path.write_bytes(("\r\n".join(lines[:2]) + "\r\n" + blank + "\n".join(lines[2:])).encode())
+
+    with JsonlReader(str(path)) as reader:
+        assert len(reader) == 4
+        assert [r["frame"] for r in reader.records(1, 10)] == [11, 13, 14]
+        assert [r["frame"] for r in reader.records(0, 4)] == [10, 11, 13, 14]
+        assert reader.row_of_frame(13) == 2 and reader.row_of_frame(12) == 2
+        assert reader.row_of_frame(15) is None
+
+    # El índice persistido se reutiliza mientras el archivo no cambie
+    assert os.path.exists(str(path) + INDEX_SUFFIX)
+    index = LineIndex.for_file(str(path), frames=True)
+    assert index.frames.tolist() == [10, 11, 13, 14]
+    with open(path, "ab") as f:
+        f.write(b'\n{"frame": 20}\n')
+    assert LineIndex.for_file(str(path), frames=True).frames.tolist() == [10, 11, 13, 14, 20]
+
+
+def test_csv_por_paginas(tmp_path):
+    path = tmp_path / "eventing.csv"
+    path.write_text("period;timestamp;type_name\n" + "".join(f"1;00:00:{i:02d}.00;Pass\n" for i in range(25)))
+    with CsvPager(str(path)) as pager:
+        assert len(pager) == 25 and pager.sep == ";"
+        page = pager.page(20, 30)
+        assert page.index.tolist() == [20, 21, 22, 23, 24]
+        assert page["timestamp"].iloc[-1] == "00:00:24.00"
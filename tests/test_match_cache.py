@@ -0,0 +1,33 @@
+import json
+
+from TACTIX_LIVE.utils.match_cache import MatchCache
+from TACTIX_LIVE.utils.match_loader import load_match, match_sources
+
+
+def _write_match(folder):
+    (folder / "ids_tracking.json").write_text(json.dumps(
+        {"home": {"team_id": 1, "team_name": "Local", "players": [{"player_id": 7, "player_name": "Siete"}]}}))
+    frames = [{"frame": i, "timestamp": f"00:00:0{i}.00", "period": 1,
+               "player_data": [{"x": float(i), "y": 0.0, "player_id": 7}]} for i in range(3)]
+    (folder / "tracking_file.jsonl").write_text("\n".join(json.dumps(f) for f in frames) + "\n")
+    (folder / "eventing_file.csv").write_text("period;timestamp;type_name\n1;00:00:01.00;Pass\n")
+
+
+def test_cache_hit_y_invalidacion(tmp_path):
+    _write_match(tmp_path)
+    sources = match_sources(str(tmp_path))
+    cache = MatchCache()
+
+    roster, frames, events = load_match(sources, cache)
+    assert cache.is_valid(sources)
+
+    cached = cache.load(sources)
+    assert cached is not None
+    c_roster, c_frames, c_events = cached
+    assert c_roster.player_ids == roster.player_ids
+    assert c_frames.record(2) == frames.record(2)
+    assert c_events["game_time"].tolist() == events["game_time"].tolist()
+
+    # Cambiar el contenido de una fuente invalida la caché
+    (tmp_path / "eventing_file.csv").write_text("period;timestamp;type_name\n1;00:00:02.00;Shot\n")
+    assert cache.load(sources) is None
@@ -0,0 +1,36 @@
+import json
+
+import pytest
+
+from TACTIX_LIVE.utils.match_loader import load_eventing, sniff_delimiter
+
+
+def test_separador_detectado_en_la_muestra():
+    assert sniff_delimiter("period;timestamp;type_name\n1;00:00:01.00;Pass\n") == ";"
+    assert sniff_delimiter("period,timestamp,type_name\n1,00:00:01.00,\"Pass; corto\"\n") == ","
+    assert sniff_delimiter("period\ttimestamp\n") == "\t"
+
+
+def test_eventing_tipado_y_ordenado(tmp_path):
+    path = tmp_path / "eventing_file.csv"
+    path.write_text("event_id,period,timestamp,type_name,player_id\n"
+                    "0,2,00:00:05.00,Pass,100\n"
+                    "1,,00:00:03.50,\"Shot, saved\",\n"
+                    "2,1,,Pass,101\n"
+                    "3,1,00:00:01.00,Duel,101\n")
+    events = load_eventing(str(path))
+
+    assert events["game_time"].tolist() == [1.0, 3.5, 5.0]  # Sin tiempo se descarta
+    assert events["period"].tolist() == [1, 1, 2]
+    assert events["type_name"].dtype == "category"
+    assert events["player_id"].dtype == "Int64"
+    records = events.to_dict("records")
+    assert json.loads(json.dumps(records[1], default=str))["player_id"] is None
+    assert records[1]["type_name"] == "Shot, saved" and records[0]["player_id"] == 101
+
+
+def test_eventing_sin_columna_de_tiempo(tmp_path):
+    path = tmp_path / "eventing_file.csv"
+    path.write_text("period;type_name\n1;Pass\n")
+    with pytest.raises(ValueError):
+        load_eventing(str(path))
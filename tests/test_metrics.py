@@ -0,0 +1,46 @@
+import urllib.request
+
+import numpy as np
+
+from TACTIX_LIVE.utils.metrics import LatencyHistogram, MetricsServer, RateMeter, StreamMetrics, render_prometheus
+
+
+def test_percentiles_del_histograma():
+    samples = np.random.default_rng(0).lognormal(mean=1.0, sigma=1.0, size=20000)
+    hist = LatencyHistogram()
+    for v in samples:
+        hist.observe(v)
+    for q in (50, 95, 99):
+        assert abs(hist.percentile(q) / np.percentile(samples, q) - 1) < 0.1
+    assert hist.max == samples.max() and hist.percentile(100) == samples.max()
+    assert hist.counts.sum() == len(samples)
+
+
+def test_rate_meter_por_segundo():
+    meter = RateMeter(window=10)
+    for t in (100.1, 100.5, 101.2, 103.9):
+        meter.add(now=t)
+    assert meter.series(5, now=104.0).tolist() == [0, 2, 1, 0, 1]
+    assert meter.rate(2, now=104.5) == 0.5
+    assert meter.series(3, now=120.0).tolist() == [0, 0, 0]  # Segundos antiguos ya no cuentan
+
+
+def test_endpoint_prometheus():
+    metrics = {'tracking': StreamMetrics()}
+    metrics['tracking'].sent = 3
+    for lat in (1.0, 2.0, 40.0):
+        metrics['tracking'].ack(lat)
+
+    server = MetricsServer(lambda: render_prometheus(metrics, {'in_flight_messages': ("En vuelo", 2)}),
+                           "127.0.0.1:0").start()
+    try:
+        with urllib.request.urlopen(f"http://{server.address}/metrics", timeout=5) as resp:
+            assert resp.headers['Content-Type'].startswith("text/plain; version=0.0.4")
+            body = resp.read().decode()
+    finally:
+        server.close()
+
+    assert 'tactix_messages_acked_total{stream="tracking"} 3' in body
+    assert 'tactix_ack_latency_seconds_bucket{stream="tracking",le="+Inf"} 3' in body
+    assert 'tactix_ack_latency_seconds_count{stream="tracking"} 3' in body
+    assert "tactix_in_flight_messages 2" in body
@@ -0,0 +1,46 @@
+import asyncio
+import json
+import math
+
+from simulator.multi_runner import MultiMatchRunner
+from TACTIX_LIVE.utils.transports import MemorySink
+
+
+def _write_match(folder, n_frames):
+    folder.mkdir()
+    (folder / "ids_tracking.json").write_text(json.dumps(
+        {"home": {"team_id": 1, "team_name": "Local", "players": [{"player_id": 7, "player_name": "Siete"}]}}))
+    frames = [{"frame": i, "timestamp": f"00:00:{i * 0.04:05.2f}", "period": 1,
+               "player_data": [{"x": float(i), "y": 0.0, "player_id": 7}]} for i in range(n_frames)]
+    (folder / "tracking_file.jsonl").write_text("\n".join(json.dumps(f) for f in frames) + "\n")
+    (folder / "eventing_file.csv").write_text("period;timestamp;type_name\n1;00:00:00.50;Pass\n1;00:00:01.00;Shot\n")
+
+
+def test_varios_partidos_un_sink(tmp_path):
+    _write_match(tmp_path / "a", 40)
+    _write_match(tmp_path / "b", 30)
+    config = {'pubsub': {'topic_tracking': 'tracking', 'topic_eventing': 'eventing'}, 'cache': {'enabled': False},
+              'roster_interval': 15}
+    sink = MemorySink()
+    runner = MultiMatchRunner(config, sink)
+    runner.add_match(str(tmp_path / "a"), math.inf)
+    runner.add_match(str(tmp_path / "b"), math.inf)
+    summary = asyncio.run(runner.run())
+
+    assert [row['frames'] for row in summary] == ["40/40", "30/30"]
+    assert all(row['events'] == 2 and row['failed'] == 0 for row in summary)
+    assert all(s.wire is None for s in runner.sessions)  # JSON: se serializa al enviar, no en la carga
+
+    frames = {'a': [], 'b': []}
+    rosters = {'a': [], 'b': []}
+    while not sink.queue('tracking').empty():
+        data, attrs = sink.get('tracking')
+        message = json.loads(data)
+        if message.get('type') == 'roster':
+            rosters[attrs['match_id']].append(len(frames[attrs['match_id']]))
+        else:
+            frames[attrs['match_id']].append(message['frame'])
+    assert frames == {'a': list(range(40)), 'b': list(range(30))}
+    # Tabla de jugadores al cargar y de nuevo cada 15 frames (antes del frame que toca)
+    assert rosters == {'a': [0, 15, 30], 'b': [0, 15]}
+    assert sink.queue('eventing').qsize() == 4
@@ -0,0 +1,56 @@
+import numpy as np
+
+from TACTIX_LIVE.utils.frame_store import FrameStore
+from TACTIX_LIVE.utils.preprocess import TrackingCleaner, clean_tracking
+from TACTIX_LIVE.utils.wire_format import StreamDecoder, encode_frames
+
+
+def _records():
+    # 40 frames sin tiempo antes del saque, un duplicado y un hueco de 3 frames del jugador 7
+    records = [{"frame": i, "timestamp": None, "period": 1, "player_data": []} for i in range(40)]
+    for i in range(20):
+        players = [{"x": float(i), "y": 1.0, "player_id": 8, "is_detected": True}]
+        if not 5 <= i < 8:
+            players.append({"x": 2.0 * i, "y": 0.0, "player_id": 7, "is_detected": True})
+        records.append({"frame": 40 + i, "timestamp": f"00:00:{i:02d}.00", "period": 1, "player_data": players})
+    records.insert(45, dict(records[44]))
+    return records
+
+
+def test_compactacion_e_interpolacion():
+    raw = FrameStore()
+    raw.append(_records())
+    frames, report = clean_tracking(raw, max_null_run=5, max_gap=4)
+
+    assert report['null_dropped'] == 35 and report['duplicates'] == 1 and report['imputed'] == 3
+    assert len(frames) == 5 + 20
+    ent = frames.roster.index_of(7)
+    rows = [5 + i for i in range(5, 8)]  # frames 45-47: tras los 5 nulos conservados
+    assert np.allclose(frames.xy[rows, ent, 0], [10.0, 12.0, 14.0])
+    assert frames.imputed[rows, ent].all() and frames.imputed.sum() == 3
+    assert frames.record(rows[0])['player_data'][1] == {
+        'x': 10.0, 'y': 0.0, 'player_id': 7, 'is_detected': False, 'imputed': True}
+
+    # Mismo resultado alimentando por bloques que con el store completo
+    cleaner = TrackingCleaner(raw.roster, max_null_run=5, max_gap=4)
+    for stop in range(7, len(raw), 7):
+        cleaner.feed(raw, stop)
+    cleaner.feed(raw, final=True)
+    assert np.array_equal(cleaner.out.xy, frames.xy, equal_nan=True)
+    assert cleaner.report == report
+
+    # La marca viaja en el formato delta
+    decoder = StreamDecoder(frames.roster)
+    decoded = [decoder.decode(b) for b in encode_frames(frames, 0, len(frames), keyframe_interval=25)]
+    assert decoded[rows[1]]['player_data'][1]['imputed'] is True
+
+
+def test_no_interpola_huecos_largos_ni_entre_periodos():
+    records = [{"frame": i, "timestamp": f"00:00:{i:02d}.00", "period": 1 if i < 10 else 2,
+                "player_data": [{"x": 1.0, "y": 1.0, "player_id": 7}] if i in (0, 8, 9, 11) else []}
+               for i in range(12)]
+    raw = FrameStore()
+    raw.append(records)
+    frames, report = clean_tracking(raw, max_gap=4)
+    assert report['imputed'] == 0 and report['period_resets'] == 1
+    assert np.isnan(frames.xy[1:8, 0, 0]).all() and np.isnan(frames.xy[10, 0, 0])
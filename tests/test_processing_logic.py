@@ -0,0 +1,70 @@
+import numpy as np
+
+from TACTIX_LIVE.streaming.processing_logic import FormationTracker, PitchControl, kmeans_1d, player_velocities
+
+
+def test_control_simetrico_y_cerca_de_cada_jugador():
+    model = PitchControl({'grid': (21, 14)})
+    xy = np.array([[-20.0, 0.0], [20.0, 0.0], [np.nan, np.nan]])
+    control = model.compute(xy, [0, 1, 0])
+
+    assert control.shape == (14, 21)
+    assert np.allclose(control, 1 - control[:, ::-1], atol=1e-3)  # Espejo en x: control del rival
+    assert abs(control[7, 10] - 0.5) < 1e-3  # Línea de medio campo
+    assert control[7, 6] > 0.99 and control[7, 14] < 0.01
+
+
+def test_batch_igual_que_frame_a_frame():
+    rng = np.random.default_rng(1)
+    xy = rng.uniform([-50, -30], [50, 30], size=(5, 22, 2)).astype(np.float32)
+    velocity = rng.normal(0, 2, size=(5, 22, 2)).astype(np.float32)
+    ball = rng.uniform(-30, 30, size=(5, 3)).astype(np.float32)
+    team = np.repeat([0, 1], 11)
+
+    model = PitchControl({'grid': (25, 16), 'chunk': 2})
+    batch = model.compute_batch(xy, team, velocity, ball)
+    single = [model.compute(xy[i], team, velocity[i], ball[i]) for i in range(5)]
+    assert np.allclose(batch, single, atol=1e-5)
+    assert ((batch >= 0) & (batch <= 1)).all()
+
+
+def test_velocidades_descartan_saltos():
+    prev = np.array([[[0.0, 0.0], [0.0, 0.0], [np.nan, np.nan]]])
+    xy = np.array([[[0.5, 0.0], [5.0, 0.0], [1.0, 1.0]]])
+    vel = player_velocities(xy, prev, 0.1)
+    assert vel[0].tolist() == [[5.0, 0.0], [0.0, 0.0], [0.0, 0.0]]
+
+
+def _team(lines, sign):
+    points = [(-48.0, 0.0)]
+    for depth, n in zip(np.linspace(-30, 10, len(lines)), lines):
+        points += [(depth, y) for y in np.linspace(-25, 25, n)]
+    xy = np.array(points)
+    xy[:, 0] *= sign
+    return xy
+
+
+def test_formacion_incremental():
+    rng = np.random.default_rng(0)
+    base = np.vstack([_team([4, 4, 2], 1), _team([4, 2, 3, 1], -1)])
+    tracker = FormationTracker(np.repeat([0, 1], 11))
+    for _ in range(300):
+        tracker.update(base + rng.normal(0, 1.0, base.shape))
+
+    assert tracker.formations[0]['label'] == "4-4-2" and tracker.formations[0]['goalkeeper'] == 0
+    assert tracker.formations[0]['lines'][0] == [1, 2, 3, 4]
+    assert tracker.formations[1]['label'] == "4-2-3-1" and tracker.formations[1]['goalkeeper'] == 11
+    # Con las medias ya estables no se vuelve a agrupar
+    done = tracker.reclusters
+    for _ in range(50):
+        assert not tracker.update(base + rng.normal(0, 1.0, base.shape))
+    assert tracker.reclusters == done
+
+    # Cambio de periodo: se reinicia y los equipos atacan hacia el otro lado
+    tracker.update(-base, period=2)
+    assert tracker.update(-base, period=3) and tracker.formations[0]['label'] == "4-4-2"
+
+
+def test_kmeans_1d_sin_lineas_vacias():
+    centers, labels, _ = kmeans_1d(np.array([0.0, 0.5, 10.0, 10.5, 20.0]), [0.0, 0.2, 0.4])
+    assert np.allclose(centers, [0.25, 10.25, 20.0]) and labels.tolist() == [0, 0, 1, 1, 2]
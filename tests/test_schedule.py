@@ -0,0 +1,45 @@
+import numpy as np
+
+from TACTIX_LIVE.utils.schedule import FRAME_DURATION, build_schedule
+
+
+def _reference(periods, times, ev_periods, ev_times):
+    """Reglas del stream loop original, frame a frame."""
+    steps, ends, last_valid, event_idx = [], [], 0.0, 0
+    for period, t in zip(periods, times):
+        if np.isnan(t):
+            steps.append(FRAME_DURATION)
+        else:
+            delta = t - last_valid
+            steps.append(FRAME_DURATION if delta < 0 or delta > 5.0 else delta)
+            last_valid = t
+            while event_idx < len(ev_times):
+                if ev_periods[event_idx] < period or (ev_periods[event_idx] == period
+                                                      and ev_times[event_idx] <= t + 0.05):
+                    event_idx += 1
+                else:
+                    break
+        ends.append(event_idx)
+    return steps, ends
+
+
+def test_equivale_al_loop_original_por_bloques():
+    rng = np.random.default_rng(1)
+    times = np.concatenate([[np.nan] * 5, np.arange(0, 20, 0.04), [np.nan] * 3, 2700 + np.arange(0, 20, 0.04)])
+    times[rng.choice(len(times), 20, replace=False)] = np.nan
+    periods = np.where(np.arange(len(times)) < 505, 1, 2)
+    ev_periods = np.array([1] * 6 + [2] * 4)
+    first, second = rng.uniform(0, 21, 6), 2700 + rng.uniform(0, 21, 4)
+    first[0] = 0.08 + 0.05  # justo en la tolerancia
+    ev_times = np.concatenate([np.sort(first), np.sort(second)])
+
+    expected = _reference(periods, times, ev_periods, ev_times)
+
+    steps, ends, state = [], [], (0.0, 0)
+    for start in range(0, len(times), 97):
+        step, end, *state = build_schedule(periods[start:start + 97], times[start:start + 97],
+                                           ev_periods, ev_times, *state)
+        steps += step.tolist()
+        ends += end.tolist()
+    assert np.allclose(steps, expected[0])
+    assert ends == expected[1]
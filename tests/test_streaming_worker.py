@@ -0,0 +1,128 @@
+import json
+import threading
+import time
+
+import numpy as np
+
+from TACTIX_LIVE.streaming.streaming_worker import FlowController, MemorySource, StreamingWorker
+from TACTIX_LIVE.utils.frame_store import FrameStore, Roster
+from TACTIX_LIVE.utils.transports import MemorySink
+from TACTIX_LIVE.utils.wire_format import encode_frames, roster_message
+
+
+def _match(n=40):
+    roster = Roster()
+    for team_id, sign in ((10, -1), (20, 1)):
+        t = roster.add_team(team_id, f"Equipo {team_id}")
+        for k in range(11):
+            roster.add_player(team_id * 100 + k, t)
+    records = [{"frame": i, "timestamp": f"00:00:{i * 0.1:05.2f}", "period": 1,
+                "ball_data": {"x": 0.0, "y": 0.0, "z": 0.0, "is_detected": True},
+                "player_data": [{"x": sign * (5.0 + k) + 0.1 * i, "y": 3.0 * k - 15, "player_id": team_id * 100 + k,
+                                 "is_detected": True}
+                                for team_id, sign in ((10, -1), (20, 1)) for k in range(11)]}
+               for i in range(n)]
+    store = FrameStore(roster)
+    store.append(records)
+    return roster, store, records
+
+
+def _wait(worker, sink, timeout=5.0):
+    end = time.monotonic() + timeout
+    while (sink.depth() or worker.flow.messages) and time.monotonic() < end:
+        time.sleep(0.01)
+
+
+class _SlowAnalytics:
+    """Analítica de prueba que tarda en cada micro-batch (deja mensajes pendientes al parar)."""
+    events = 0
+
+    def __init__(self, roster):
+        pass
+
+    def set_roster(self, roster):
+        pass
+
+    def process(self, frames, events):
+        time.sleep(0.02)
+
+
+def test_dos_partidos_binario_y_json():
+    roster, store, records = _match()
+    sink = MemorySink()
+    worker = StreamingWorker({'batch_size': 16, 'batch_latency': 0.01})
+    worker.start([MemorySource(sink, {'tracking': 'tracking', 'eventing': 'eventing'})])
+
+    for match_id in ("a", "b"):
+        sink.publish('tracking', roster_message(roster), match_id=match_id)
+    for data in encode_frames(store, keyframe_interval=10):
+        sink.publish('tracking', data, match_id="a")
+    for record in records:
+        sink.publish('tracking', json.dumps(record).encode(), match_id="b")
+    for i in range(3):
+        sink.publish('eventing', json.dumps({"type_name": "Pass", "game_time": i}).encode(), match_id="b")
+
+    _wait(worker, sink)
+    worker.stop()
+    summary = {s['match_id']: s for s in worker.summary()}
+    assert summary['a']['frames'] == summary['b']['frames'] == len(records)
+    assert summary['b']['events'] == 3 and summary['b']['game_time'] == 3.9
+    assert worker.flow.messages == 0 and worker.errors == 0
+    assert worker.metrics['tracking'].acked == 2 + 2 * len(records)
+    # Ambas vías (binaria por columnas y JSON) llegan a la misma analítica
+    a, b = worker.matches['a'].analytics, worker.matches['b'].analytics
+    assert a.formation.formations[0]['label'] == b.formation.formations[0]['label']
+    assert np.allclose(a.kinematics.summary['distance'], b.kinematics.summary['distance'], atol=0.05)
+
+
+def test_control_de_flujo_bloquea_y_libera():
+    flow = FlowController(max_messages=2, max_bytes=100)
+    assert flow.acquire(10) and flow.acquire(10)
+    start = time.monotonic()
+    assert not flow.acquire(10, timeout=0.05)  # Lleno: espera y se rinde
+    assert time.monotonic() - start >= 0.05
+
+    threading.Timer(0.05, flow.release, (1, 10)).start()
+    assert flow.acquire(10, timeout=2)
+    assert flow.messages == 2 and flow.bytes == 20
+    flow.close()
+    assert not flow.acquire(10, timeout=2)  # Cerrado: no espera
+
+
+def test_stop_con_drain_procesa_lo_pendiente():
+    processed = []
+
+    class Slow(_SlowAnalytics):
+        def process(self, frames, events):
+            super().process(frames, events)
+            processed.extend(events)
+
+    worker = StreamingWorker({'batch_size': 5, 'batch_latency': 0.0}, analytics_factory=Slow).start()
+    acks = []
+    for i in range(50):
+        assert worker.submit('eventing', json.dumps({"id": i}).encode(), {'match_id': "m"}, ack=lambda: acks.append(1))
+    worker.stop(drain=True)
+    assert len(processed) == len(acks) == 50 and worker.flow.messages == 0
+    assert not worker.submit('eventing', b'{}')  # Parado: ya no acepta
+
+
+def test_drain_confirma_antes_de_cerrar_las_fuentes():
+    class FakeSource:
+        """Como PubSubSource: tras close() el cliente está cerrado y un ack ya no llega al broker."""
+        finished = False
+
+        def __init__(self):
+            self.closed = False
+            self.acks = []
+
+        def start(self, worker):
+            for i in range(20):
+                worker.submit('eventing', json.dumps({"id": i}).encode(), {}, ack=lambda: self.acks.append(self.closed))
+
+        def close(self):
+            self.closed = True
+
+    source = FakeSource()
+    worker = StreamingWorker({'batch_size': 4, 'batch_latency': 0.0}, analytics_factory=_SlowAnalytics).start([source])
+    worker.stop(drain=True)
+    assert source.closed and source.acks == [False] * 20
@@ -0,0 +1,42 @@
+import threading
+
+import numpy as np
+
+from TACTIX_LIVE.utils.telemetry import RingBuffer
+
+
+def test_ring_buffer_orden_y_update():
+    ring = RingBuffer(3, {'frame': np.int64, 'lat': np.float32, 'text': object})
+    seqs = [ring.append(i, np.nan, f"f{i}") for i in range(5)]
+    assert len(ring) == 3 and ring.written == 5
+
+    snap = ring.snapshot()
+    assert snap['frame'].tolist() == [4, 3, 2] and snap['text'].tolist() == ["f4", "f3", "f2"]
+    assert np.isnan(snap['lat']).all()
+    assert ring.values('frame', last=2, newest_first=False) == [3, 4]
+
+    # Una entrada ya sobrescrita no se corrige
+    assert not ring.update(seqs[0], 'lat', 1.0)
+    assert ring.update(seqs[4], 'lat', 7.0) and ring.snapshot()['lat'][0] == 7.0
+
+
+def test_snapshot_consistente_con_escritor_concurrente():
+    ring = RingBuffer(64, {'a': np.int64, 'b': np.int64})
+    stop = threading.Event()
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            ring.append(i, 2 * i)
+            i += 1
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        for _ in range(500):
+            snap = ring.snapshot()
+            assert (snap['b'] == 2 * snap['a']).all()
+            assert (np.diff(snap['a']) == -1).all()  # Contiguas, de la más nueva a la más vieja
+    finally:
+        stop.set()
+        thread.join()
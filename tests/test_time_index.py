@@ -0,0 +1,28 @@
+import numpy as np
+
+from TACTIX_LIVE.utils.time_index import TimeIndex, parse_game_time
+
+
+def test_lookup_por_periodo_y_tiempo():
+    # Orden del archivo: nulos de pre-partido, 1ª parte y 2ª parte (el reloj sigue en 45:00)
+    periods = [1, 1, 1, 1, 1, 2, 2, 2]
+    times = [np.nan, np.nan, 0.0, 0.04, 0.08, 2700.0, 2700.04, 2700.08]
+    index = TimeIndex(periods, times)
+
+    assert len(index) == 6
+    assert index.lookup(1, 0.0) == 2
+    assert index.lookup(1, 0.05) == 4
+    assert index.lookup(1, 10.0) == 5  # pasado el final de la 1ª parte -> inicio de la 2ª
+    assert index.lookup(2, parse_game_time("45:00.04")) == 6
+    assert index.lookup(2, 3000.0) is None
+    assert index.periods() == [1, 2]
+    assert index.bounds(2) == (2700.0, 2700.08)
+    assert index.bounds(3) is None
+
+
+def test_count_before_en_eventos_ordenados():
+    index = TimeIndex([1, 1, 2, 2], [10.0, 20.0, 2700.0, 2710.0])
+    assert index.count_before(1, 15.0) == 1
+    assert index.count_before(2, -np.inf) == 2
+    assert index.count_before(2, 2800.0) == 4
+    assert parse_game_time("63:10") == 3790.0
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from TACTIX_LIVE.utils.time_utils import time_to_seconds, times_to_seconds
+
+
+def test_formatos_soportados():
+    """Fecha + hora, HH:MM:SS, MM:SS y números se convierten igual que en los loaders antiguos"""
+    values = pd.Series(["2025-11-20 00:00:50.000", "01:02:03.5", "02:03.25", "12.5", 7, None, "None", ""],
+                       dtype=object)
+    result = times_to_seconds(values)
+    np.testing.assert_allclose(result[:5], [50.0, 3723.5, 123.25, 12.5, 7.0])
+    assert np.isnan(result[5:]).all()
+
+
+def test_columna_homogenea_con_nulos():
+    """El camino de ancho fijo respeta los nulos intercalados"""
+    values = pd.Series([None, "00:00:00.10", "00:00:00.20", None, "00:01:00.00"], dtype=object)
+    result = times_to_seconds(values)
+    np.testing.assert_allclose(result[[1, 2, 4]], [0.1, 0.2, 60.0])
+    assert np.isnan(result[[0, 3]]).all()
+
+
+def test_columna_fechas_pandas():
+    """Si pandas ya convirtió la columna a datetime, se usa la hora del día"""
+    values = pd.Series(pd.to_datetime(["2025-11-20 00:00:50", None]))
+    result = times_to_seconds(values)
+    assert result[0] == 50.0 and np.isnan(result[1])
+
+
+def test_escalar():
+    assert time_to_seconds("01:00") == 60.0
+    assert time_to_seconds(None) is None
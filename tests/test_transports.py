@@ -0,0 +1,96 @@
+import queue
+import socket
+import threading
+import time
+
+import pytest
+
+from TACTIX_LIVE.utils.transports import (KIND_SUBSCRIBE, FileSink, MemorySink, SocketBroker, SocketSink,
+                                          SocketSubscriber, create_sink, pack_frame, read_frames)
+
+
+def test_memory_sink_y_cola_llena():
+    sink = create_sink({'transport': {'type': 'memory', 'maxsize': 1}})
+    assert isinstance(sink, MemorySink)
+    assert sink.publish("tracking", b"uno", data_type="tracking").result() == "tracking"
+    with pytest.raises(queue.Full):
+        sink.publish("tracking", b"dos").result()
+    assert sink.get("tracking", timeout=1) == (b"uno", {"data_type": "tracking"})
+
+
+def test_file_sink_reproducible(tmp_path):
+    path = str(tmp_path / "stream.bin")
+    sink = FileSink(path)
+    sink.publish("tracking", b'{"frame": 1}').result()
+    sink.publish("eventing", b'{"type": "Pass"}', data_type="eventing").result()
+    sink.close()
+    assert list(read_frames(path)) == [("tracking", b'{"frame": 1}', {}),
+                                       ("eventing", b'{"type": "Pass"}', {"data_type": "eventing"})]
+
+
+def test_socket_broker_fan_out():
+    broker = SocketBroker("127.0.0.1:0").start()
+    try:
+        sub = SocketSubscriber(broker.address, ["tracking"], timeout=5)
+        # La suscripción viaja por otra conexión: reintentar hasta que el broker la registre
+        sink = SocketSink(broker.address)
+        for i in range(200):
+            sink.publish("eventing", b"ignorado")
+            sink.publish("tracking", str(i).encode()).result(timeout=5)
+            if broker._subscribers.get("tracking"):
+                break
+        sink.publish("tracking", b"fin").result(timeout=5)
+        received = []
+        while not received or received[-1] != b"fin":
+            topic, data, _ = sub.recv()
+            assert topic == "tracking"
+            received.append(data)
+        sink.close()
+        sub.close()
+    finally:
+        broker.close()
+
+
+def test_socket_broker_publicadores_concurrentes_y_suscriptor_lento():
+    broker = SocketBroker("127.0.0.1:0", max_queue=32).start()
+    host, port = broker.address.split(":")
+    try:
+        sub = SocketSubscriber(broker.address, ["tracking"], timeout=10)
+        slow = socket.socket()  # Se suscribe y no lee nunca (buffer de recepción mínimo)
+        slow.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        slow.connect((host, int(port)))
+        slow.sendall(pack_frame(KIND_SUBSCRIBE, "tracking"))
+        end = time.monotonic() + 5
+        while len(broker._queues) < 2 and time.monotonic() < end:
+            time.sleep(0.01)
+
+        n, size = 100, 128 << 10
+        received = []
+        reader = threading.Thread(target=lambda: received.extend(sub.recv()[1] for _ in range(2 * n)))
+        reader.start()
+
+        def publish(tag):
+            sink = SocketSink(broker.address)
+            for i in range(n):
+                sink.publish("tracking", bytes([tag, i]) * (size // 2)).result(timeout=10)
+                time.sleep(0.001)  # Al ritmo que lee el suscriptor normal
+            sink.close()
+
+        publishers = [threading.Thread(target=publish, args=(tag,)) for tag in (1, 2)]
+        for t in publishers:
+            t.start()
+        for t in publishers:
+            t.join(15)
+        reader.join(15)
+        # Tramas enteras (sin intercalar) y el lento desconectado sin frenar a los publicadores
+        assert sorted(received) == sorted(bytes([tag, i]) * (size // 2) for tag in (1, 2) for i in range(n))
+        assert list(broker._queues) == [next(iter(broker._subscribers["tracking"]))]
+        sub.close()
+        slow.close()
+    finally:
+        broker.close()
+
+
+def test_transporte_desconocido():
+    with pytest.raises(ValueError):
+        create_sink({'transport': {'type': 'carrier-pigeon'}})
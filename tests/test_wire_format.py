@@ -0,0 +1,108 @@
+from TACTIX_LIVE.utils.frame_store import FrameStore, Roster
+from TACTIX_LIVE.utils.wire_format import decode_frame, encode_frames, is_binary
+
+
+def _store():
+    roster = Roster()
+    t = roster.add_team(10, "Local")
+    roster.add_player(7, t, "Siete")
+    store = FrameStore(roster)
+    store.append([
+        {"frame": 1, "timestamp": "00:00:01.04", "period": 1, "possession": {"group": "home"},
+         "ball_data": {"x": 1.234, "y": -2.0, "z": None, "is_detected": True},
+         "player_data": [{"x": 10.126, "y": -33.5, "player_id": 7, "is_detected": False},
+                         {"x": 0.0, "y": 0.0, "player_id": 99}]},
+        {"frame": 2, "timestamp": None, "period": None, "ball_data": None, "player_data": []},
+    ])
+    return store
+
+
+def test_roundtrip_con_roster():
+    store = _store()
+    encoded = encode_frames(store)
+    assert len(encoded) == 2 and all(is_binary(b) for b in encoded)
+
+    first = decode_frame(encoded[0], store.roster)
+    expected = store.record(0)
+    assert first["possession"] == expected["possession"]
+    assert first["game_time"] == 1.04
+    assert first["ball_data"] == {"x": 1.23, "y": -2.0, "z": None, "is_detected": True}
+    assert first["player_data"][0] == {"x": 10.13, "y": -33.5, "player_id": 7, "is_detected": False,
+                                       "team_id": 10, "team_name": "Local", "player_name": "Siete"}
+    assert first["player_data"][1] == {"x": 0.0, "y": 0.0, "player_id": 99}
+
+    second = decode_frame(encoded[1])
+    assert second["timestamp"] is None and second["game_time"] is None
+    assert second["ball_data"]["is_detected"] is None and second["player_data"] == []
+
+
+def test_textos_demasiado_largos_no_se_truncan():
+    import json
+    from TACTIX_LIVE.utils.wire_format import KIND_FRAME, StreamDecoder, json_frame
+
+    store = _store()
+    store.append([{"frame": f, "timestamp": ts, "period": 1, "player_data": [{"x": x, "y": 1.0, "player_id": 7}]}
+                  for f, ts, x in ((3, "ñ" * 200, 1.0), (4, "00:00:01.12", 2.0))])
+    encoded = encode_frames(store, keyframe_interval=10)
+    assert encoded[2] is None  # No cabe: se envía en JSON, entero
+    assert json.loads(json_frame(store, 2))["timestamp"] == "ñ" * 200
+    assert encoded[3][3] == KIND_FRAME  # El siguiente no depende del frame que no fue en binario
+    decoder = StreamDecoder(store.roster)
+    decoded = [decoder.decode(b) for b in encoded if b is not None]
+    assert decoded[-1] == decode_frame(encode_frames(store, 3, 4)[0], store.roster) and decoder.dropped == 0
+
+
+def test_mas_compacto_que_json():
+    import json
+    store = _store()
+    assert len(encode_frames(store)[0]) < len(json.dumps(store.record(0)).encode()) / 2
+
+
+def test_delta_equivale_a_keyframes_y_resincroniza():
+    import numpy as np
+    from TACTIX_LIVE.utils.wire_format import KIND_DELTA, StreamDecoder
+
+    roster = Roster()
+    store = FrameStore(roster)
+    rng = np.random.default_rng(0)
+    pos = rng.uniform(-40, 40, size=(4, 2))
+    records = []
+    for i in range(30):
+        pos += rng.uniform(-0.3, 0.3, size=pos.shape)
+        if i == 12:
+            pos[0] += 5.0  # salto > 127 cm: va como absoluto
+        players = [{"x": float(x), "y": float(y), "player_id": 10 + k, "is_detected": bool(i % 2)}
+                   for k, (x, y) in enumerate(pos) if not (k == 3 and 5 <= i < 8)]  # el 3 desaparece y vuelve
+        records.append({"frame": i, "timestamp": f"00:00:{i:02d}.00", "period": 1,
+                        "possession": {"group": "home" if i < 20 else "away"}, "player_data": players})
+    store.append(records[:17])
+    store.append(records[17:])
+
+    full = encode_frames(store)
+    # Codificación por bloques (como en la carga progresiva)
+    delta = encode_frames(store, 0, 17, keyframe_interval=10) + encode_frames(store, 17, 30, keyframe_interval=10)
+    assert sum(map(len, delta)) < sum(map(len, full))
+    assert delta[11][3] == KIND_DELTA
+
+    decoder = StreamDecoder(roster)
+    assert [decoder.decode(b) for b in delta] == [decode_frame(b, roster) for b in full]
+
+    # Suscriptor tardío: descarta deltas hasta el siguiente keyframe
+    late = StreamDecoder(roster)
+    out = [late.decode(b) for b in delta[13:]]
+    assert out[:7] == [None] * 7 and late.dropped == 7
+    assert out[7] == decode_frame(full[20], roster)
+
+
+def test_roster_una_vez_y_resolucion_en_consumidor():
+    import json
+    from TACTIX_LIVE.utils.wire_format import read_roster, roster_message
+
+    store = _store()
+    frame = json.loads(json.dumps(store.record(0, enrich=False)))
+    assert "team_name" not in frame["player_data"][0]
+
+    roster = read_roster(roster_message(store.roster))
+    assert read_roster(encode_frames(store)[0]) is None and read_roster(b'{"frame": 1}') is None
+    roster.enrich(frame["player_data"])
+    assert frame["player_data"] == store.record(0)["player_data"]